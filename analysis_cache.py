@@ -0,0 +1,70 @@
+"""
+Analysis Cache Module
+
+A bounded, thread-safe LRU cache of analysis results keyed by position
+identity (the Zobrist key, which covers pieces, side to move, castling
+rights and en passant square but not the move clocks). Positions revisited
+through undo/redo, transpositions or hover previews are answered from the
+cache instead of being analyzed again. Hit, miss and eviction counters
+show how well it is working.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+class AnalysisCache:
+    """Least-recently-used map from position key to analysis results"""
+
+    def __init__(self, max_entries: int = 512):
+        """Create an empty cache holding at most max_entries positions"""
+        if max_entries < 1:
+            raise ValueError("Cache must hold at least one entry")
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[int, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: int) -> Optional[Any]:
+        """Get the cached value for a position (marking it recently used), or None"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key: int) -> Optional[Any]:
+        """Get the cached value without counting a hit or miss or changing its recency"""
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key: int, value: Any) -> None:
+        """Store a value for a position, evicting the least recently used entry if full"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Counters and current size"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "entries": len(self._entries)}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._entries
@@ -0,0 +1,332 @@
+"""
+Analysis Worker Module
+
+Runs position analysis on a background thread so tactical overlays never
+block the pygame frame. The main loop submits the current position as a
+PositionSnapshot; the worker decodes it into its own BoardState, runs every
+registered analyzer and posts an AnalysisResult to a queue that the main
+loop polls once per frame. Submitting a new position supersedes the old
+one: queued requests for older positions are skipped, running analyzers
+can stop early through their cancellation callback, and results for
+anything but the latest submission are discarded.
+
+Move previews work the same way: when a piece is selected the main loop
+submits its legal target squares, the worker analyzes the position after
+each move and the results are cached by (from, to) so hovering a square
+only looks up a dictionary. Previews have their own generation counter, so
+selecting a piece never cancels the analysis of the current position.
+
+Finished annotations are stored in an AnalysisCache keyed by the position's
+Zobrist key, shared by position and preview requests. Scrubbing back and
+forth with undo/redo, or hovering a move that leads to a position seen
+before, is answered from the cache (on submit, without a round trip to the
+thread) and only analyzers missing from a cached entry are run.
+"""
+
+import logging
+import queue
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from analysis_cache import AnalysisCache
+from chess_board import BoardState, Color
+from config import AnalysisConfig
+from mate_search import MateResult, MateSearch
+from position_snapshot import PositionSnapshot
+from tablebase import get_tablebase
+from tactical_search import MoveVerdict, TacticalSearch
+from tactics import TacticsReport, find_tactics
+
+logger = logging.getLogger(__name__)
+
+# An analyzer takes the position and an "is cancelled" callback and returns its annotation
+Analyzer = Callable[[BoardState, Callable[[], bool]], Any]
+
+@dataclass
+class AnalysisResult:
+    """Annotations computed for one submitted position"""
+    generation: int
+    snapshot: PositionSnapshot
+    zobrist_key: int
+    annotations: Dict[str, Any] = field(default_factory=dict)
+
+@dataclass
+class MovePreview:
+    """Annotations for the position after one candidate move"""
+    generation: int
+    move: Tuple[Tuple[int, int], Tuple[int, int]]
+    annotations: Dict[str, Any] = field(default_factory=dict)
+
+def analyze_legal_moves(board: BoardState, is_cancelled: Callable[[], bool]) -> Dict[Tuple[int, int], List[Tuple[int, int]]]:
+    """Legal target squares of every piece of the side to move, keyed by its square"""
+    legal_moves: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+    for move in board.generate_legal_moves():
+        targets = legal_moves.setdefault(move.from_square, [])
+        if move.to_square not in targets:  # One entry per promotion square
+            targets.append(move.to_square)
+    return legal_moves
+
+def analyze_game_status(board: BoardState, is_cancelled: Callable[[], bool]) -> Dict[str, bool]:
+    """Check, checkmate and stalemate flags for the side to move"""
+    has_moves = bool(board.generate_legal_moves())
+    return {"check": board.is_check,
+            "checkmate": board.is_check and not has_moves,
+            "stalemate": not board.is_check and not has_moves}
+
+def analyze_hanging_pieces(board: BoardState, is_cancelled: Callable[[], bool]) -> Dict[Color, List[Tuple[int, int]]]:
+    """Hanging pieces of both colors"""
+    return {Color.WHITE: board.get_hanging_pieces(Color.WHITE),
+            Color.BLACK: board.get_hanging_pieces(Color.BLACK)}
+
+# Analyzers only run on the worker thread, so one solver (and its transposition table) is reused
+_mate_search = MateSearch(tablebase=get_tablebase())
+
+def analyze_mate_threats(board: BoardState, is_cancelled: Callable[[], bool]) -> Dict[Color, MateResult]:
+    """Shortest forced mate each side has (or threatens, for the side not to move)"""
+    return {color: _mate_search.find_mate(board, AnalysisConfig.MATE_SEARCH_MAX_MOVES, color,
+                                          AnalysisConfig.MATE_SEARCH_NODE_LIMIT,
+                                          AnalysisConfig.MATE_SEARCH_TIME_LIMIT_MS, is_cancelled)
+            for color in (Color.WHITE, Color.BLACK)}
+
+def analyze_tactics(board: BoardState, is_cancelled: Callable[[], bool]) -> TacticsReport:
+    """Forks, pins and skewers for both colors"""
+    return find_tactics(board)
+
+_tactical_search = TacticalSearch(get_tablebase())
+
+def analyze_move_verdicts(board: BoardState,
+                          is_cancelled: Callable[[], bool]) -> Dict[Tuple[Tuple[int, int], Tuple[int, int]], MoveVerdict]:
+    """Tactical verdict for every legal move of the side to move, keyed by (from, to)"""
+    result = _tactical_search.analyze(board, AnalysisConfig.TACTICAL_SEARCH_TIME_LIMIT_MS,
+                                      AnalysisConfig.TACTICAL_SEARCH_MAX_DEPTH, is_cancelled=is_cancelled)
+    verdicts = {}
+    for verdict in result.verdicts:
+        # Verdicts are best first, so a promotion square keeps its best promotion
+        verdicts.setdefault((verdict.move.from_square, verdict.move.to_square), verdict)
+    return verdicts
+
+DEFAULT_ANALYZERS: Dict[str, Analyzer] = {
+    "legal_moves": analyze_legal_moves,
+    "game_status": analyze_game_status,
+    "hanging_pieces": analyze_hanging_pieces,
+    "mate_threats": analyze_mate_threats,
+    "tactics": analyze_tactics,
+    "move_verdicts": analyze_move_verdicts,
+}
+
+# Move verdicts are only shown for the side to move in the current position
+DEFAULT_PREVIEW_ANALYZERS: Dict[str, Analyzer] = {
+    "hanging_pieces": analyze_hanging_pieces,
+    "mate_threats": analyze_mate_threats,
+    "tactics": analyze_tactics,
+}
+
+class AnalysisWorker:
+    """Background thread that analyzes the most recently submitted position"""
+
+    def __init__(self, analyzers: Optional[Dict[str, Analyzer]] = None,
+                 preview_analyzers: Optional[Dict[str, Analyzer]] = None,
+                 cache: Optional[AnalysisCache] = None):
+        """Create the worker (call start() to launch the thread)"""
+        self.analyzers = dict(DEFAULT_ANALYZERS if analyzers is None else analyzers)
+        self.preview_analyzers = dict(DEFAULT_PREVIEW_ANALYZERS if preview_analyzers is None else preview_analyzers)
+        self.cache = cache if cache is not None else AnalysisCache(AnalysisConfig.CACHE_MAX_ENTRIES)
+        self.latest_result: Optional[AnalysisResult] = None
+        self._cache_hit_pending = False  # A submit() was answered from the cache since the last poll()
+        # Preview annotations for the current selection, keyed by (from, to)
+        self.preview_cache: Dict[Tuple[Tuple[int, int], Tuple[int, int]], Dict[str, Any]] = {}
+
+        self._requests: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._results: "queue.Queue[Any]" = queue.Queue()
+        self._generation = 0
+        self._preview_generation = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Launch the worker thread (daemon, so it never keeps the program alive)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="analysis-worker", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Cancel pending work and wait briefly for the thread to exit"""
+        if self._thread is not None:
+            self._generation += 1
+            self._preview_generation += 1
+            self._requests.put(None)
+            self._thread.join(AnalysisConfig.WORKER_STOP_TIMEOUT)
+            self._thread = None
+
+    def submit(self, board_state: BoardState) -> int:
+        """Queue the board's current position for analysis, superseding earlier submissions.
+
+        Positions already in the cache are answered immediately. Returns the
+        generation number that identifies the request.
+        """
+        self._generation += 1
+        snapshot = PositionSnapshot.from_board(board_state)
+        cached = self.cache.get(board_state.zobrist_key)
+        if cached is not None and all(key in cached for key in self.analyzers):
+            self.latest_result = AnalysisResult(self._generation, snapshot, board_state.zobrist_key, cached)
+            self._cache_hit_pending = True
+        else:
+            self._requests.put(("position", self._generation, snapshot))
+        return self._generation
+
+    def submit_previews(self, board_state: BoardState, from_square: Tuple[int, int],
+                        targets: List[Tuple[int, int]]) -> int:
+        """Queue "what if" analysis of moving the piece on from_square to each target.
+
+        Supersedes earlier previews and clears the preview cache. Returns the preview generation.
+        """
+        self.clear_previews()
+        self._requests.put(("preview", self._preview_generation, PositionSnapshot.from_board(board_state),
+                            from_square, list(targets)))
+        return self._preview_generation
+
+    def clear_previews(self) -> None:
+        """Cancel outstanding previews and forget cached ones (e.g. when the selection changes)"""
+        self._preview_generation += 1
+        self.preview_cache = {}
+
+    def is_current(self, generation: int) -> bool:
+        """Is this generation still the latest position submission?"""
+        return generation == self._generation
+
+    def is_current_preview(self, generation: int) -> bool:
+        """Is this generation still the latest preview submission?"""
+        return generation == self._preview_generation
+
+    def poll(self) -> bool:
+        """Collect finished results without blocking.
+
+        Returns True if annotations for the latest submissions arrived since the last
+        poll (stale results are dropped). Position results are kept in latest_result
+        and previews in preview_cache for drawing.
+        """
+        updated = self._cache_hit_pending
+        self._cache_hit_pending = False
+        while True:
+            try:
+                result = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(result, MovePreview):
+                if self.is_current_preview(result.generation):
+                    self.preview_cache[result.move] = result.annotations
+                    updated = True
+            elif self.is_current(result.generation):
+                self.latest_result = result
+                updated = True
+        return updated
+
+    def get_annotations(self, board_state: BoardState) -> Optional[Dict[str, Any]]:
+        """Get the latest annotations if they describe the board's current position, else None"""
+        result = self.latest_result
+        if result is None or not self.is_current(result.generation):
+            return None
+        if result.zobrist_key != board_state.zobrist_key:
+            return None
+        return result.annotations
+
+    def get_legal_moves(self, board_state: BoardState, square: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """Legal targets of the piece on a square, from the analysis when available"""
+        annotations = self.get_annotations(board_state)
+        if annotations is not None and annotations.get("legal_moves") is not None:
+            return list(annotations["legal_moves"].get(square, []))
+        return board_state.get_possible_moves(square[0], square[1])
+
+    def get_preview(self, from_square: Tuple[int, int], to_square: Tuple[int, int]) -> Optional[Dict[str, Any]]:
+        """Get the annotations after a previewed move, or None if not computed yet"""
+        return self.preview_cache.get((from_square, to_square))
+
+    def _run(self) -> None:
+        """Worker thread loop"""
+        while True:
+            # Keep only the newest request of each kind if several are waiting
+            pending = {}
+            request = self._requests.get()
+            while request is not None:
+                pending[request[0]] = request
+                try:
+                    request = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+            if request is None:
+                return
+
+            # The current position first: its overlay is visible without hovering
+            if "position" in pending:
+                _, generation, snapshot = pending["position"]
+                if self.is_current(generation):
+                    result = self._analyze(generation, snapshot)
+                    if result is not None:
+                        self._results.put(result)
+            if "preview" in pending:
+                self._analyze_previews(*pending["preview"][1:])
+
+    def _run_analyzers(self, analyzers: Dict[str, Analyzer], board: BoardState,
+                       is_cancelled: Callable[[], bool], count_lookup: bool = True) -> Optional[Dict[str, Any]]:
+        """Run analyzers on a board, reusing cached annotations; returns None if cancelled part way.
+
+        An analyzer that raises is logged and its annotation is None (not cached).
+        """
+        key = board.zobrist_key
+        cached = (self.cache.get(key) if count_lookup else self.cache.peek(key)) or {}
+        missing = [name for name in analyzers if name not in cached]
+        if not missing:
+            return cached
+
+        annotations = dict(cached)
+        failed = set()
+        for name in missing:
+            if is_cancelled():
+                return None
+            try:
+                annotations[name] = analyzers[name](board, is_cancelled)
+            except Exception:
+                # A broken analyzer must not kill the thread and every later overlay with it:
+                # its annotation is None and it is retried the next time the position is analyzed
+                logger.exception("Analyzer %r failed on %s", name, board.get_fen_position())
+                annotations[name] = None
+                failed.add(name)
+        if is_cancelled():
+            return None
+        self.cache.put(key, {name: value for name, value in annotations.items() if name not in failed})
+        return annotations
+
+    def _analyze(self, generation: int, snapshot: PositionSnapshot) -> Optional[AnalysisResult]:
+        """Run every analyzer on a snapshot; returns None if the request was superseded"""
+        board = snapshot.to_board()
+        # submit() already counted the cache lookup for this position
+        annotations = self._run_analyzers(self.analyzers, board, lambda: not self.is_current(generation),
+                                          count_lookup=False)
+        if annotations is None:
+            return None
+        return AnalysisResult(generation, snapshot, board.zobrist_key, annotations)
+
+    def _analyze_previews(self, generation: int, snapshot: PositionSnapshot, from_square: Tuple[int, int],
+                          targets: List[Tuple[int, int]]) -> None:
+        """Analyze the position after each candidate move, posting each preview as it completes"""
+        def is_cancelled() -> bool:
+            return not self.is_current_preview(generation)
+
+        board = snapshot.to_board()
+        from_row, from_col = from_square
+        for to_square in targets:
+            if is_cancelled():
+                return
+            # Promotions are previewed as queen promotions
+            try:
+                move = board.create_move(from_row, from_col, to_square[0], to_square[1])
+            except (AttributeError, IndexError):
+                logger.warning("Skipping preview of %s -> %s: no such move", from_square, to_square)
+                continue
+            board.push(move)
+            try:
+                annotations = self._run_analyzers(self.preview_analyzers, board, is_cancelled)
+            finally:
+                board.pop()
+            if annotations is not None:
+                self._results.put(MovePreview(generation, (from_square, to_square), annotations))
@@ -0,0 +1,241 @@
+"""
+Batch Analyzer Module
+
+Headless command-line entry point that runs Testy's tactical checks over
+PGN game collections. Games are streamed from the input one at a time,
+replayed through BoardState, and for every ply the played move is checked
+against the tactical search (does it lose material compared with the best
+alternative?) and the hanging pieces of both sides are recorded. Each game
+is written as one JSON line as soon as it is analyzed, so memory use does
+not grow with the size of the archive. Nothing here imports pygame.
+
+Analysis is CPU-bound pure Python, so with --workers the games are sharded
+across a process pool. Games are sent in chunks as their tags and SAN move
+lists (a few hundred bytes each, never a pickled BoardState); each worker
+keeps its own TacticalSearch. Only a bounded window of chunks is in flight
+at once and results are written in input order.
+
+Usage:
+    python batch_analyzer.py games.pgn                      # JSONL to stdout
+    python batch_analyzer.py a.pgn b.pgn -o annotations.jsonl
+    python batch_analyzer.py games.pgn --time-limit-ms 20   # Faster, shallower blunder checks
+    python batch_analyzer.py games.pgn --nodes 2000         # Reproducible node-limited checks
+    python batch_analyzer.py games.pgn --workers 0          # One worker process per available CPU
+    python batch_analyzer.py games.pgn --book book.bin      # Skip the checks for book moves
+    python batch_analyzer.py games.pgn --syzygy ~/syzygy    # Exact endgame verdicts from tablebases
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from chess_board import BoardState, Color, square_name
+from config import AnalysisConfig
+from opening_book import OpeningBook, load_random_table
+from pgn import PgnGame, read_games
+from tablebase import Tablebase
+from tactical_search import TacticalSearch
+
+DEFAULT_CHUNK_SIZE = 8        # Games per task sent to a worker process
+CHUNKS_IN_FLIGHT_PER_WORKER = 4  # Bounds memory while keeping every worker busy
+PROGRESS_INTERVAL = 2.0       # Seconds between progress lines
+
+# Per-process analysis state, set up by _init_worker
+_worker_search: Optional[TacticalSearch] = None
+_worker_limits: Tuple[Optional[float], int, Optional[int]] = (None, 0, None)
+_worker_book: Optional[OpeningBook] = None
+
+def _hanging_squares(board: BoardState, color: Color) -> List[str]:
+    """Square names of a color's hanging pieces"""
+    return [square_name(row, col) for row, col in board.get_hanging_pieces(color)]
+
+def analyze_game(game: PgnGame, search: TacticalSearch, time_limit_ms: Optional[float],
+                 max_depth: int, node_limit: Optional[int] = None,
+                 book: Optional[OpeningBook] = None) -> Dict[str, Any]:
+    """Replay a game and annotate every ply; returns a JSON-ready dict.
+
+    While the game follows the opening book the blunder check is skipped.
+    """
+    record: Dict[str, Any] = {"tags": game.tags, "plies": []}
+    try:
+        board = BoardState.from_fen(game.start_fen)
+    except ValueError as error:
+        record["error"] = f"Bad FEN tag: {error}"
+        return record
+
+    in_book = book is not None
+    for ply, san in enumerate(game.moves, start=1):
+        try:
+            move = board.parse_san(san)
+        except ValueError as error:
+            record["error"] = f"{error} at ply {ply}"
+            break
+
+        book_moves = [entry.uci for entry in book.entries(board)] if in_book else []
+        in_book = move.uci() in book_moves
+        if in_book:
+            # Known theory: no search needed
+            verdict = None
+            best = book_moves[0]
+            depth = 0
+        else:
+            # Judge the played move against every alternative before playing it
+            result = search.analyze(board, time_limit_ms, max_depth, node_limit)
+            verdict = next((v for v in result.verdicts if v.move.uci() == move.uci()), None)
+            best = result.best.move.uci() if result.best else None
+            depth = result.depth
+
+        board.push(move)
+        record["plies"].append({
+            "ply": ply,
+            "san": san,
+            "uci": move.uci(),
+            "book": in_book,
+            "loses_material": bool(verdict and verdict.loses_material),
+            "loss": verdict.loss if verdict else 0,
+            "best": best,
+            "depth": depth,
+            "hanging": {"white": _hanging_squares(board, Color.WHITE),
+                        "black": _hanging_squares(board, Color.BLACK)},
+        })
+    return record
+
+def iter_input_games(paths: List[str]) -> Iterator[PgnGame]:
+    """Stream games from each input path in turn ("-" reads standard input)"""
+    for path in paths:
+        if path == "-":
+            yield from read_games(sys.stdin)
+        else:
+            with open(path, "r", encoding="utf-8", errors="replace") as stream:
+                yield from read_games(stream)
+
+def iter_chunks(games: Iterator[PgnGame], chunk_size: int,
+                max_games: Optional[int] = None) -> Iterator[List[PgnGame]]:
+    """Group games into lists of chunk_size, stopping after max_games"""
+    chunk: List[PgnGame] = []
+    for count, game in enumerate(games):
+        if max_games is not None and count >= max_games:
+            break
+        chunk.append(game)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _init_worker(time_limit_ms: Optional[float], max_depth: int, node_limit: Optional[int],
+                 book_path: Optional[str] = None, random_table: Optional[Tuple[int, ...]] = None,
+                 syzygy_directories: Tuple[str, ...] = ()) -> None:
+    """Set up the search (with its opening book and tablebase) used by this process"""
+    global _worker_search, _worker_limits, _worker_book
+    _worker_search = TacticalSearch(Tablebase(syzygy_directories) if syzygy_directories else None)
+    _worker_limits = (time_limit_ms, max_depth, node_limit)
+    _worker_book = OpeningBook(book_path, random_table) if book_path else None
+
+def _analyze_chunk(games: List[PgnGame]) -> List[Dict[str, Any]]:
+    """Analyze a chunk of games with this process's search"""
+    time_limit_ms, max_depth, node_limit = _worker_limits
+    return [analyze_game(game, _worker_search, time_limit_ms, max_depth, node_limit, _worker_book)
+            for game in games]
+
+def _iter_results(chunks: Iterator[List[PgnGame]], workers: int,
+                  worker_args: Tuple[Any, ...]) -> Iterator[List[Dict[str, Any]]]:
+    """Analyzed chunks in input order, from this process or a pool of workers"""
+    if workers == 1:
+        _init_worker(*worker_args)
+        for chunk in chunks:
+            yield _analyze_chunk(chunk)
+        return
+
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=worker_args) as pool:
+        # Pool.imap would read the whole input ahead; a bounded window keeps memory flat
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(_analyze_chunk, (chunk,)))
+            if len(pending) >= workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+def _available_cpus() -> int:
+    """CPUs this process may run on: the affinity mask where the OS has one (it is
+    smaller than os.cpu_count() under taskset or a container CPU limit)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def _report_progress(games: int, plies: int, start_time: float, final: bool = False) -> None:
+    """Print games and plies analyzed so far with throughput to standard error"""
+    elapsed = max(time.perf_counter() - start_time, 1e-9)
+    prefix = "Analyzed" if final else "Progress:"
+    print(f"{prefix} {games} games ({plies} plies) in {elapsed:.1f}s - "
+          f"{games / elapsed:.2f} games/s, {plies / elapsed:.1f} plies/s", file=sys.stderr)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Annotate PGN games with Testy's tactical checks (JSONL output)")
+    parser.add_argument("inputs", nargs="+", help="PGN files to analyze ('-' for standard input)")
+    parser.add_argument("-o", "--output", help="JSONL file to write (default: standard output)")
+    parser.add_argument("--time-limit-ms", type=float, default=AnalysisConfig.TACTICAL_SEARCH_TIME_LIMIT_MS,
+                        help="blunder check time per ply in milliseconds")
+    parser.add_argument("--max-depth", type=int, default=AnalysisConfig.TACTICAL_SEARCH_MAX_DEPTH,
+                        help="deepest blunder check iteration")
+    parser.add_argument("--nodes", type=int, help="node limit per ply instead of a time limit (reproducible)")
+    parser.add_argument("--max-games", type=int, help="stop after this many games")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (0 = one per available CPU)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="games per worker task")
+    parser.add_argument("--quiet", action="store_true", help="no progress output")
+    parser.add_argument("--book", help="Polyglot opening book; book moves skip the blunder check")
+    parser.add_argument("--book-randoms", help="file with the 781 Polyglot Random64 numbers "
+                                               "(default: the standard table bundled with Testy)")
+    parser.add_argument("--syzygy", action="append", default=[],
+                        help="directory of Syzygy tablebase files for exact endgame verdicts (repeatable)")
+    args = parser.parse_args(argv)
+    if args.workers < 0 or args.chunk_size < 1:
+        parser.error("--workers must be at least 0 and --chunk-size at least 1")
+
+    workers = args.workers or _available_cpus()
+    random_table = None
+    if args.book:
+        try:
+            random_table = load_random_table(args.book_randoms)
+            OpeningBook(args.book, random_table).close()  # Fail here rather than in every worker
+        except (OSError, ValueError) as error:
+            parser.error(f"cannot use opening book: {error}")
+    if args.syzygy and not Tablebase(args.syzygy).available:
+        parser.error("no Syzygy tables loaded (needs python-chess and .rtbw files in the directories)")
+    worker_args = (None if args.nodes else args.time_limit_ms, args.max_depth, args.nodes, args.book, random_table,
+                   tuple(args.syzygy))
+    chunks = iter_chunks(iter_input_games(args.inputs), args.chunk_size, args.max_games)
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    games = 0
+    plies = 0
+    start_time = time.perf_counter()
+    last_report = start_time
+    try:
+        for records in _iter_results(chunks, workers, worker_args):
+            # Reported only when another chunk has arrived, so the final summary
+            # is not preceded by a progress line that says the same
+            if not args.quiet and games and time.perf_counter() - last_report >= PROGRESS_INTERVAL:
+                _report_progress(games, plies, start_time)
+                last_report = time.perf_counter()
+            for record in records:
+                games += 1
+                plies += len(record["plies"])
+                record["game"] = games
+                output.write(json.dumps(record) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    if not args.quiet:
+        _report_progress(games, plies, start_time, final=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,10 +9,14 @@ This module defines a comprehensive chess board state that tracks:
 - Game state information (turn, check status, etc.)
 """
 
-from typing import Optional, List, Tuple, Dict, Any
+from typing import Optional, List, Tuple, Dict, Any, Deque
 from enum import Enum
 from dataclasses import dataclass, field
+from collections import deque
 import copy
+import random
+import re
+from config import GameConstants
 
 class PieceType(Enum):
     """Chess piece types"""
@@ -23,11 +27,17 @@ class PieceType(Enum):
     QUEEN = "Q"
     KING = "K"
 
+    # Members are singletons: identity hashing keeps the (color, type) bitboard
+    # lookups in C instead of Enum's Python-level __hash__
+    __hash__ = object.__hash__
+
 class Color(Enum):
     """Chess piece colors"""
     WHITE = "w"
     BLACK = "b"
 
+    __hash__ = object.__hash__  # See PieceType
+
 class GamePhase(Enum):
     """Game phases"""
     OPENING = "opening"
@@ -86,7 +96,7 @@ class CastlingRights:
             self.black_kingside = False
             self.black_queenside = False
 
-@dataclass
+@dataclass(slots=True)
 class Move:
     """Represents a chess move with all relevant information"""
     from_square: Tuple[int, int]  # (row, col)
@@ -104,6 +114,165 @@ class Move:
     def __str__(self) -> str:
         return self.notation if self.notation else f"{self.from_square} -> {self.to_square}"
 
+    def uci(self) -> str:
+        """Coordinate notation like "e2e4" or "e7e8q" (independent of move history)"""
+        promotion = self.promotion.value.lower() if self.promotion else ""
+        return f"{square_name(*self.from_square)}{square_name(*self.to_square)}{promotion}"
+
+@dataclass
+class UndoRecord:
+    """The state a pushed move overwrites, so pop() can restore it without a full snapshot"""
+    move: Move
+    piece_had_moved: bool
+    rook_had_moved: bool
+    castling_rights: Tuple[bool, bool, bool, bool]  # (K, Q, k, q)
+    en_passant_target: Optional[Tuple[int, int]]
+    halfmove_clock: int
+    fullmove_number: int
+    last_move: Optional[Tuple[Tuple[int, int], Tuple[int, int]]]
+    is_check: bool
+    is_in_checkmate: bool
+    is_in_stalemate: bool
+    game_phase: GamePhase
+    zobrist_key: int
+
+# Standard material values used by the exchange and hanging-piece analysis
+PIECE_VALUES = {
+    PieceType.PAWN: 1,
+    PieceType.KNIGHT: 3,
+    PieceType.BISHOP: 3,
+    PieceType.ROOK: 5,
+    PieceType.QUEEN: 9,
+    PieceType.KING: 100  # King is invaluable
+}
+# Capturing order for exchanges: least valuable piece first
+PIECE_TYPES_BY_VALUE = (PieceType.PAWN, PieceType.KNIGHT, PieceType.BISHOP,
+                        PieceType.ROOK, PieceType.QUEEN, PieceType.KING)
+
+# Pieces a pawn may promote to, in the order moves are generated
+PROMOTION_PIECE_TYPES = (PieceType.QUEEN, PieceType.ROOK, PieceType.BISHOP, PieceType.KNIGHT)
+
+# Rook home squares and the castling right each one guards: (row, col) -> (color, kingside)
+ROOK_CORNERS = {
+    (7, 7): (Color.WHITE, True),
+    (7, 0): (Color.WHITE, False),
+    (0, 7): (Color.BLACK, True),
+    (0, 0): (Color.BLACK, False),
+}
+
+# Bitboard layout: one bit per square, index = row * 8 + col (bit 0 is a8, bit 63 is h1)
+def square_index(row: int, col: int) -> int:
+    """Convert (row, col) coordinates to a bitboard square index"""
+    return row * 8 + col
+
+def square_coords(square: int) -> Tuple[int, int]:
+    """Convert a bitboard square index back to (row, col) coordinates"""
+    return (square >> 3, square & 7)
+
+def square_name(row: int, col: int) -> str:
+    """Convert (row, col) coordinates to an algebraic square name (e.g. e4)"""
+    return f"{chr(ord('a') + col)}{8 - row}"
+
+# Lenient SAN reading: optional piece letter and from file/rank, "x", target square, promotion
+SAN_PATTERN = re.compile(r"^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$")
+
+def iter_bits(bitboard: int):
+    """Yield the square index of every set bit, lowest first"""
+    while bitboard:
+        lowest_bit = bitboard & -bitboard
+        yield lowest_bit.bit_length() - 1
+        bitboard ^= lowest_bit
+
+# Attack tables (computed once at import time)
+KNIGHT_OFFSETS = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
+KING_OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+ROOK_DIRECTIONS = ((0, 1), (0, -1), (1, 0), (-1, 0))      # Right, Left, Down, Up
+BISHOP_DIRECTIONS = ((1, 1), (1, -1), (-1, 1), (-1, -1))  # Diagonal directions
+QUEEN_DIRECTIONS = ROOK_DIRECTIONS + BISHOP_DIRECTIONS
+
+def _build_leaper_targets(offsets) -> List[Tuple[Tuple[int, int], ...]]:
+    """For every square, list the on-board squares reached by the given offsets"""
+    table = []
+    for square in range(64):
+        row, col = square >> 3, square & 7
+        table.append(tuple((row + dr, col + dc) for dr, dc in offsets
+                           if 0 <= row + dr < 8 and 0 <= col + dc < 8))
+    return table
+
+def _build_rays() -> List[Tuple[Tuple[Tuple[int, int], ...], ...]]:
+    """For every square and direction in QUEEN_DIRECTIONS, list the squares along the ray"""
+    table = []
+    for square in range(64):
+        row, col = square >> 3, square & 7
+        rays = []
+        for dr, dc in QUEEN_DIRECTIONS:
+            ray = []
+            new_row, new_col = row + dr, col + dc
+            while 0 <= new_row < 8 and 0 <= new_col < 8:
+                ray.append((new_row, new_col))
+                new_row, new_col = new_row + dr, new_col + dc
+            rays.append(tuple(ray))
+        table.append(tuple(rays))
+    return table
+
+def _targets_to_mask(targets) -> int:
+    """Convert a sequence of (row, col) squares to a bitboard"""
+    mask = 0
+    for row, col in targets:
+        mask |= 1 << (row * 8 + col)
+    return mask
+
+KNIGHT_TARGETS = _build_leaper_targets(KNIGHT_OFFSETS)
+KING_TARGETS = _build_leaper_targets(KING_OFFSETS)
+# Squares a pawn of the given color attacks (white pawns capture towards row 0)
+PAWN_ATTACK_TARGETS = {
+    Color.WHITE: _build_leaper_targets(((-1, -1), (-1, 1))),
+    Color.BLACK: _build_leaper_targets(((1, -1), (1, 1))),
+}
+# RAYS[square][i] follows QUEEN_DIRECTIONS[i]; indices 0-3 are orthogonal, 4-7 diagonal
+RAYS = _build_rays()
+
+KNIGHT_ATTACK_MASKS = [_targets_to_mask(targets) for targets in KNIGHT_TARGETS]
+KING_ATTACK_MASKS = [_targets_to_mask(targets) for targets in KING_TARGETS]
+PAWN_ATTACK_MASKS = {color: [_targets_to_mask(targets) for targets in tables]
+                     for color, tables in PAWN_ATTACK_TARGETS.items()}
+RAY_MASKS = [tuple(_targets_to_mask(ray) for ray in rays) for rays in RAYS]
+ALL_SQUARES = (1 << 64) - 1
+
+# Square-index versions of the tables, used by the incremental attack counts
+KNIGHT_SQUARES = [tuple(row * 8 + col for row, col in targets) for targets in KNIGHT_TARGETS]
+KING_SQUARES = [tuple(row * 8 + col for row, col in targets) for targets in KING_TARGETS]
+PAWN_ATTACK_SQUARES = {color: [tuple(row * 8 + col for row, col in targets) for targets in tables]
+                       for color, tables in PAWN_ATTACK_TARGETS.items()}
+RAY_SQUARES = [tuple(tuple(row * 8 + col for row, col in ray) for ray in rays) for rays in RAYS]
+# Index of the opposite direction in QUEEN_DIRECTIONS
+OPPOSITE_DIRECTION = (1, 0, 3, 2, 7, 6, 5, 4)
+
+def _build_direction_table() -> List[List[int]]:
+    """DIRECTION_BETWEEN[a][b] is the QUEEN_DIRECTIONS index leading from a to b, or -1"""
+    table = [[-1] * 64 for _ in range(64)]
+    for square in range(64):
+        for direction, ray in enumerate(RAY_SQUARES[square]):
+            for target in ray:
+                table[square][target] = direction
+    return table
+
+DIRECTION_BETWEEN = _build_direction_table()
+
+# Zobrist keys. The seed is fixed so keys are identical across runs and processes,
+# which lets them be stored in caches and on-disk indexes.
+_zobrist_random = random.Random(0x7E57)
+ZOBRIST_PIECE_KEYS = {(color, piece_type): [_zobrist_random.getrandbits(64) for _ in range(64)]
+                      for color in Color for piece_type in PieceType}
+ZOBRIST_CASTLING_KEYS = [_zobrist_random.getrandbits(64) for _ in range(4)]  # K, Q, k, q
+ZOBRIST_EN_PASSANT_KEYS = [_zobrist_random.getrandbits(64) for _ in range(8)]  # One per file
+ZOBRIST_BLACK_TO_MOVE = _zobrist_random.getrandbits(64)
+del _zobrist_random
+
+def _empty_piece_bitboards() -> Dict[Tuple[Color, PieceType], int]:
+    """Create an empty bitboard for every (color, piece type) pair"""
+    return {(color, piece_type): 0 for color in Color for piece_type in PieceType}
+
 @dataclass
 class BoardState:
     """
@@ -111,6 +280,18 @@ class BoardState:
     """
     # Current board position (8x8 grid)
     board: List[List[Optional[Piece]]] = field(default_factory=lambda: [[None for _ in range(8)] for _ in range(8)])
+
+    # Bitboards kept in sync with the board grid by set_piece()
+    piece_bitboards: Dict[Tuple[Color, PieceType], int] = field(default_factory=_empty_piece_bitboards)
+    color_bitboards: Dict[Color, int] = field(default_factory=lambda: {Color.WHITE: 0, Color.BLACK: 0})
+    occupied: int = 0
+
+    # Number of pieces of each color attacking each square (indexed by row * 8 + col),
+    # updated incrementally by set_piece()
+    attack_counts: Dict[Color, List[int]] = field(default_factory=lambda: {Color.WHITE: [0] * 64, Color.BLACK: [0] * 64})
+
+    # Zobrist hash of the position, updated incrementally (usable as a cache key)
+    zobrist_key: int = 0
     
     # Game state
     current_turn: Color = Color.WHITE
@@ -132,31 +313,73 @@ class BoardState:
     
     # Move history
     move_history: List[Move] = field(default_factory=list)
+    start_fen: str = ""  # FEN of the position move_history starts from (set on creation)
 
     # Last move for highlighting (None if no moves made yet)
     last_move: Optional[Tuple[Tuple[int, int], Tuple[int, int]]] = None  # ((from_row, from_col), (to_row, to_col))
 
     # Position repetition tracking (for threefold repetition rule)
-    position_history: List[str] = field(default_factory=list)
+    # Zobrist keys of every position reached, starting with the initial one
+    position_history: List[int] = field(default_factory=list)
 
-    # Undo/Redo functionality
-    undo_stack: List['BoardState'] = field(default_factory=list)
-    redo_stack: List['BoardState'] = field(default_factory=list)
+    # Undo/Redo functionality (undo records hold only the per-move delta; a deque so the
+    # oldest record can be dropped cheaply once the history limit is reached)
+    undo_stack: Deque[UndoRecord] = field(default_factory=deque)
+    redo_stack: List[Move] = field(default_factory=list)
 
     # Cached hanging pieces (updated only when board changes)
     _cached_hanging_pieces_white: List[Tuple[int, int]] = field(default_factory=list)
     _cached_hanging_pieces_black: List[Tuple[int, int]] = field(default_factory=list)
     _hanging_pieces_cache_valid: bool = False
+
+    # Cached checkers/pins/king-danger data for legal move generation, keyed by
+    # (zobrist_key, color) so any change to the pieces invalidates it
+    _legal_move_context: Optional[Tuple[Any, ...]] = None
+
+    # SAN lookup tables for the side to move, built from one legal move list and
+    # keyed by zobrist_key like the legal move context
+    _san_tables: Optional[Tuple[Any, ...]] = None
     
     def __post_init__(self):
         """Initialize the board with starting position"""
         if not any(any(row) for row in self.board):  # If board is empty
             self.setup_initial_position()
+        else:
+            self._rebuild_bitboards()
+            self._rebuild_attack_counts()
+        self.zobrist_key = self.compute_zobrist_key()
+        if not self.position_history:
+            self.position_history.append(self.zobrist_key)
+        if not self.start_fen:
+            self.start_fen = self.get_fen_position()
+
+    def _clear_board(self) -> None:
+        """Remove all pieces and reset the bitboards"""
+        self.board = [[None for _ in range(8)] for _ in range(8)]
+        self.piece_bitboards = _empty_piece_bitboards()
+        self.color_bitboards = {Color.WHITE: 0, Color.BLACK: 0}
+        self.occupied = 0
+        self.attack_counts = {Color.WHITE: [0] * 64, Color.BLACK: [0] * 64}
+        self.zobrist_key = 0
+
+    def _rebuild_bitboards(self) -> None:
+        """Recompute all bitboards from the board grid"""
+        self.piece_bitboards = _empty_piece_bitboards()
+        self.color_bitboards = {Color.WHITE: 0, Color.BLACK: 0}
+        self.occupied = 0
+        for row in range(8):
+            for col in range(8):
+                piece = self.board[row][col]
+                if piece:
+                    bit = 1 << square_index(row, col)
+                    self.piece_bitboards[(piece.color, piece.type)] |= bit
+                    self.color_bitboards[piece.color] |= bit
+                    self.occupied |= bit
     
     def setup_initial_position(self) -> None:
         """Set up the standard chess starting position"""
         # Clear the board
-        self.board = [[None for _ in range(8)] for _ in range(8)]
+        self._clear_board()
         
         # Place black pieces (rows 0-1)
         piece_order = [PieceType.ROOK, PieceType.KNIGHT, PieceType.BISHOP, PieceType.QUEEN,
@@ -164,20 +387,20 @@ class BoardState:
         
         # Black back rank
         for col, piece_type in enumerate(piece_order):
-            self.board[0][col] = Piece(piece_type, Color.BLACK)
+            self.set_piece(0, col, Piece(piece_type, Color.BLACK))
         
         # Black pawns
         for col in range(8):
-            self.board[1][col] = Piece(PieceType.PAWN, Color.BLACK)
+            self.set_piece(1, col, Piece(PieceType.PAWN, Color.BLACK))
         
         # Place white pieces (rows 6-7)
         # White pawns
         for col in range(8):
-            self.board[6][col] = Piece(PieceType.PAWN, Color.WHITE)
+            self.set_piece(6, col, Piece(PieceType.PAWN, Color.WHITE))
         
         # White back rank
         for col, piece_type in enumerate(piece_order):
-            self.board[7][col] = Piece(piece_type, Color.WHITE)
+            self.set_piece(7, col, Piece(piece_type, Color.WHITE))
     
     def get_piece(self, row: int, col: int) -> Optional[Piece]:
         """Get piece at a specific position"""
@@ -185,84 +408,146 @@ class BoardState:
             return self.board[row][col]
         return None
     
+    def _rebuild_attack_counts(self) -> None:
+        """Recompute the per-color attack counts from scratch"""
+        self.attack_counts = {Color.WHITE: [0] * 64, Color.BLACK: [0] * 64}
+        for square in iter_bits(self.occupied):
+            self._add_piece_attacks(self.board[square >> 3][square & 7], square, 1)
+
+    def _add_piece_attacks(self, piece: Piece, square: int, delta: int) -> None:
+        """Add delta to the attack count of every square the piece on this square attacks"""
+        counts = self.attack_counts[piece.color]
+        piece_type = piece.type
+        if piece_type == PieceType.PAWN:
+            targets = PAWN_ATTACK_SQUARES[piece.color][square]
+        elif piece_type == PieceType.KNIGHT:
+            targets = KNIGHT_SQUARES[square]
+        elif piece_type == PieceType.KING:
+            targets = KING_SQUARES[square]
+        else:
+            rays = RAY_SQUARES[square]
+            if piece_type == PieceType.ROOK:
+                rays = rays[:4]
+            elif piece_type == PieceType.BISHOP:
+                rays = rays[4:]
+            occupied = self.occupied
+            for ray in rays:
+                for target in ray:
+                    counts[target] += delta
+                    if occupied >> target & 1:
+                        break
+            return
+
+        for target in targets:
+            counts[target] += delta
+
+    def _update_sliders_through(self, square: int, delta: int) -> None:
+        """Extend (delta=1) or cut off (delta=-1) slider attacks that pass through a square.
+
+        Called when the square becomes empty or occupied: for every direction, the
+        first piece behind the square is found, and if it slides along that line its
+        attacks beyond the square are added or removed, up to the next blocker.
+        """
+        line_sliders = self._line_sliders()
+        occupied = self.occupied
+        rays = RAY_SQUARES[square]
+        ray_masks = RAY_MASKS[square]
+
+        for direction in range(8):
+            ahead = rays[direction]
+            if not ahead:
+                continue
+            backward = OPPOSITE_DIRECTION[direction]
+            sliders = line_sliders[direction >= 4]
+            if not ray_masks[backward] & sliders:
+                continue
+
+            # Find the first piece behind the square
+            for behind in rays[backward]:
+                if occupied >> behind & 1:
+                    break
+            else:
+                continue
+            if not sliders >> behind & 1:
+                continue
+
+            color = Color.WHITE if self.color_bitboards[Color.WHITE] >> behind & 1 else Color.BLACK
+            counts = self.attack_counts[color]
+            for target in ahead:
+                counts[target] += delta
+                if occupied >> target & 1:
+                    break
+
     def set_piece(self, row: int, col: int, piece: Optional[Piece]) -> None:
-        """Set piece at a specific position"""
+        """Set piece at a specific position (keeps bitboards, attack counts and Zobrist key in sync)"""
         if 0 <= row < 8 and 0 <= col < 8:
+            bit = 1 << (row * 8 + col)
+            old_piece = self.board[row][col]
+            square = row * 8 + col
+
+            # Take back the old piece's attacks, then re-route sliders whose rays
+            # pass through this square if it changes between empty and occupied
+            if old_piece:
+                self._add_piece_attacks(old_piece, square, -1)
+            if old_piece is None and piece is not None:
+                self._update_sliders_through(square, -1)
+            elif old_piece is not None and piece is None:
+                self._update_sliders_through(square, 1)
+
+            if old_piece:
+                self.piece_bitboards[(old_piece.color, old_piece.type)] &= ~bit
+                self.color_bitboards[old_piece.color] &= ~bit
+                self.occupied &= ~bit
+                self.zobrist_key ^= ZOBRIST_PIECE_KEYS[(old_piece.color, old_piece.type)][square]
+            if piece:
+                self.piece_bitboards[(piece.color, piece.type)] |= bit
+                self.color_bitboards[piece.color] |= bit
+                self.occupied |= bit
+                self.zobrist_key ^= ZOBRIST_PIECE_KEYS[(piece.color, piece.type)][square]
             self.board[row][col] = piece
-    
+
+            if piece:
+                self._add_piece_attacks(piece, square, 1)
+
+    def _zobrist_state_component(self) -> int:
+        """Zobrist contribution of side to move, castling rights and en passant file"""
+        key = 0
+        if self.current_turn == Color.BLACK:
+            key ^= ZOBRIST_BLACK_TO_MOVE
+        rights = self.castling_rights
+        for index, has_right in enumerate((rights.white_kingside, rights.white_queenside,
+                                           rights.black_kingside, rights.black_queenside)):
+            if has_right:
+                key ^= ZOBRIST_CASTLING_KEYS[index]
+        if self.en_passant_target:
+            # Only hash the en passant file when a pawn can actually capture there,
+            # so positions that differ only by an unusable target repeat correctly
+            ep_row, ep_col = self.en_passant_target
+            capturing_pawns = self.piece_bitboards[(self.current_turn, PieceType.PAWN)]
+            opponent = Color.BLACK if self.current_turn == Color.WHITE else Color.WHITE
+            if PAWN_ATTACK_MASKS[opponent][ep_row * 8 + ep_col] & capturing_pawns:
+                key ^= ZOBRIST_EN_PASSANT_KEYS[ep_col]
+        return key
+
+    def compute_zobrist_key(self) -> int:
+        """Compute the Zobrist key of the position from scratch"""
+        key = self._zobrist_state_component()
+        for (color, piece_type), bitboard in self.piece_bitboards.items():
+            piece_keys = ZOBRIST_PIECE_KEYS[(color, piece_type)]
+            for square in iter_bits(bitboard):
+                key ^= piece_keys[square]
+        return key
+
     def get_king_position(self, color: Color) -> Optional[Tuple[int, int]]:
         """Find the king of a specific color"""
-        for row in range(8):
-            for col in range(8):
-                piece = self.board[row][col]
-                if piece and piece.type == PieceType.KING and piece.color == color:
-                    return (row, col)
-        return None
+        king_bitboard = self.piece_bitboards[(color, PieceType.KING)]
+        if not king_bitboard:
+            return None
+        return square_coords((king_bitboard & -king_bitboard).bit_length() - 1)
     
     def is_square_attacked(self, row: int, col: int, by_color: Color) -> bool:
         """Check if a square is attacked by pieces of a specific color."""
-
-        # Check for pawn attacks
-        # White pawns attack from row+1 (lower rank), black pawns attack from row-1 (higher rank)
-        if by_color == Color.WHITE:
-            attack_row = row + 1  # White pawns attack from below
-        else:
-            attack_row = row - 1  # Black pawns attack from above
-
-        for dc in [-1, 1]:
-            attack_col = col + dc
-            if self._is_valid_square(attack_row, attack_col):
-                piece = self.get_piece(attack_row, attack_col)
-                if piece and piece.type == PieceType.PAWN and piece.color == by_color:
-                    return True
-
-        # Check for king attacks
-        for dr in [-1, 0, 1]:
-            for dc in [-1, 0, 1]:
-                if dr == 0 and dc == 0:
-                    continue
-                attack_row, attack_col = row + dr, col + dc
-                if self._is_valid_square(attack_row, attack_col):
-                    piece = self.get_piece(attack_row, attack_col)
-                    if piece and piece.type == PieceType.KING and piece.color == by_color:
-                        return True
-
-        # Check for knight attacks
-        knight_moves = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
-        for dr, dc in knight_moves:
-            attack_row, attack_col = row + dr, col + dc
-            if self._is_valid_square(attack_row, attack_col):
-                piece = self.get_piece(attack_row, attack_col)
-                if piece and piece.type == PieceType.KNIGHT and piece.color == by_color:
-                    return True
-
-        # Check for rook/queen attacks (horizontal and vertical)
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-        for dr, dc in directions:
-            for i in range(1, 8):
-                attack_row, attack_col = row + i * dr, col + i * dc
-                if not self._is_valid_square(attack_row, attack_col):
-                    break
-                piece = self.get_piece(attack_row, attack_col)
-                if piece:
-                    if piece.color == by_color and (piece.type == PieceType.ROOK or piece.type == PieceType.QUEEN):
-                        return True
-                    break  # Piece blocks further attacks in this direction
-
-        # Check for bishop/queen attacks (diagonal)
-        directions = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
-        for dr, dc in directions:
-            for i in range(1, 8):
-                attack_row, attack_col = row + i * dr, col + i * dc
-                if not self._is_valid_square(attack_row, attack_col):
-                    break
-                piece = self.get_piece(attack_row, attack_col)
-                if piece:
-                    if piece.color == by_color and (piece.type == PieceType.BISHOP or piece.type == PieceType.QUEEN):
-                        return True
-                    break  # Piece blocks further attacks in this direction
-
-        return False
+        return self.attack_counts[by_color][row * 8 + col] > 0
     
     def is_king_in_check(self, color: Color) -> bool:
         """Check if the king of a specific color is in check"""
@@ -270,7 +555,61 @@ class BoardState:
         if not king_pos:
             return False
         return self.is_square_attacked(king_pos[0], king_pos[1], Color.BLACK if color == Color.WHITE else Color.WHITE)
-    
+
+    def gives_check(self, move: Move) -> bool:
+        """Would this (legal) move put the opponent's king in check? The board is not changed."""
+        color = move.piece.color
+        enemy_king = self.piece_bitboards[(Color.BLACK if color == Color.WHITE else Color.WHITE, PieceType.KING)]
+        if not enemy_king:
+            return False
+        king_square = enemy_king.bit_length() - 1
+        to_square = move.to_square[0] * 8 + move.to_square[1]
+        piece_type = move.promotion or move.piece.type
+
+        # Direct checks by leapers (the king itself never gives direct check)
+        if piece_type == PieceType.PAWN and PAWN_ATTACK_MASKS[color][to_square] & enemy_king:
+            return True
+        if piece_type == PieceType.KNIGHT and KNIGHT_ATTACK_MASKS[to_square] & enemy_king:
+            return True
+        return self._gives_slider_check(move, king_square)
+
+    def _gives_slider_check(self, move: Move, king_square: int) -> bool:
+        """Is the king attacked by a slider (directly or by discovery) after the move?"""
+        color = move.piece.color
+        from_bit = 1 << (move.from_square[0] * 8 + move.from_square[1])
+        to_bit = 1 << (move.to_square[0] * 8 + move.to_square[1])
+        piece_type = move.promotion or move.piece.type
+
+        occupied = (self.occupied & ~from_bit) | to_bit
+        queens = self.piece_bitboards[(color, PieceType.QUEEN)]
+        straight = (queens | self.piece_bitboards[(color, PieceType.ROOK)]) & ~from_bit
+        diagonal = (queens | self.piece_bitboards[(color, PieceType.BISHOP)]) & ~from_bit
+        if piece_type in (PieceType.ROOK, PieceType.QUEEN):
+            straight |= to_bit
+        if piece_type in (PieceType.BISHOP, PieceType.QUEEN):
+            diagonal |= to_bit
+
+        if move.is_en_passant:
+            captured_row, captured_col = move.from_square[0], move.to_square[1]
+            occupied &= ~(1 << (captured_row * 8 + captured_col))
+        elif move.is_castle:
+            row = move.from_square[0]
+            rook_from, rook_to = (7, 5) if move.castle_kingside else (0, 3)
+            rook_from_bit, rook_to_bit = 1 << (row * 8 + rook_from), 1 << (row * 8 + rook_to)
+            occupied = (occupied & ~rook_from_bit) | rook_to_bit
+            straight = (straight & ~rook_from_bit) | rook_to_bit
+
+        for direction in range(8):
+            sliders = straight if direction < 4 else diagonal
+            if not RAY_MASKS[king_square][direction] & sliders:
+                continue
+            for target in RAY_SQUARES[king_square][direction]:
+                if occupied >> target & 1:
+                    if sliders >> target & 1:
+                        return True
+                    break
+        return False
+
     def can_castle(self, color: Color, kingside: bool) -> bool:
         """Check if castling is possible"""
         if not self.castling_rights.can_castle(color, kingside):
@@ -289,8 +628,11 @@ class BoardState:
                 if self.is_square_attacked(king_row, col, Color.BLACK if color == Color.WHITE else Color.WHITE):
                     return False
         else:
-            # Check squares b1/c1/d1 for white, b8/c8/d8 for black
-            for col in [1, 2, 3]:
+            # Check squares b1/c1/d1 for white, b8/c8/d8 for black are empty; only
+            # c1/d1 (c8/d8) must be safe since the king never crosses the b-file
+            if self.board[king_row][1] is not None:
+                return False
+            for col in [2, 3]:
                 if self.board[king_row][col] is not None:
                     return False
                 if self.is_square_attacked(king_row, col, Color.BLACK if color == Color.WHITE else Color.WHITE):
@@ -313,16 +655,14 @@ class BoardState:
         self._cached_hanging_pieces_white = []
         self._cached_hanging_pieces_black = []
 
-        # Check all pieces on the board
-        for row in range(8):
-            for col in range(8):
-                piece = self.get_piece(row, col)
-                if piece:
-                    if self._is_piece_hanging_simple(row, col):
-                        if piece.color == Color.WHITE:
-                            self._cached_hanging_pieces_white.append((row, col))
-                        else:
-                            self._cached_hanging_pieces_black.append((row, col))
+        # One attacker enumeration serves every occupied square
+        for (row, col), exchange_value in self.get_exchange_evaluations().items():
+            piece = self.board[row][col]
+            if exchange_value > 0 and piece.type != PieceType.KING:
+                if piece.color == Color.WHITE:
+                    self._cached_hanging_pieces_white.append((row, col))
+                else:
+                    self._cached_hanging_pieces_black.append((row, col))
 
         self._hanging_pieces_cache_valid = True
 
@@ -330,103 +670,268 @@ class BoardState:
         """Invalidate the hanging pieces cache (call when board changes)"""
         self._hanging_pieces_cache_valid = False
 
-    def _is_piece_hanging_simple(self, row: int, col: int) -> bool:
-        """Simple check: is piece attacked but not defended?"""
-        piece = self.get_piece(row, col)
-        if not piece:
-            return False
-
-        enemy_color = Color.BLACK if piece.color == Color.WHITE else Color.WHITE
-
-
-        # Step 1: Is it attacked by an enemy?
-        if not self.is_square_attacked(row, col, enemy_color):
-            return False
-
-        # Step 2: Is it defended by a friendly piece?
-        if self.is_square_attacked(row, col, piece.color):
-            return False  # It's defended, so not hanging
-
-        return True  # Attacked but not defended = hanging
-
-    def _get_attackers(self, target_row: int, target_col: int, attacker_color: Color) -> List[Tuple[int, int]]:
-        """Get all pieces of the given color that attack the target square"""
-        attackers = []
-
-        for row in range(8):
-            for col in range(8):
-                piece = self.get_piece(row, col)
-                if piece and piece.color == attacker_color:
-                    # Check if this piece can attack the target square
-                    possible_moves = self._get_piece_attacks(row, col)
-                    if (target_row, target_col) in possible_moves:
-                        attackers.append((row, col))
-
-        return attackers
-
-    def _get_piece_attacks(self, row: int, col: int) -> List[Tuple[int, int]]:
-        """Get all squares this piece attacks (not filtered by check legality)"""
-        piece = self.get_piece(row, col)
-        if not piece:
-            return []
-
+    def _line_sliders(self) -> Tuple[int, int]:
+        """Get (rooks and queens, bishops and queens) of both colors, indexed by direction >= 4"""
+        bitboards = self.piece_bitboards
+        queens = bitboards[(Color.WHITE, PieceType.QUEEN)] | bitboards[(Color.BLACK, PieceType.QUEEN)]
+        return (bitboards[(Color.WHITE, PieceType.ROOK)] | bitboards[(Color.BLACK, PieceType.ROOK)] | queens,
+                bitboards[(Color.WHITE, PieceType.BISHOP)] | bitboards[(Color.BLACK, PieceType.BISHOP)] | queens)
+
+    def _attackers_to(self, square: int, occupied: int) -> int:
+        """Get the bitboard of pieces (both colors) attacking a square, given an occupancy"""
+        bitboards = self.piece_bitboards
+        attackers = ((PAWN_ATTACK_MASKS[Color.BLACK][square] & bitboards[(Color.WHITE, PieceType.PAWN)]) |
+                     (PAWN_ATTACK_MASKS[Color.WHITE][square] & bitboards[(Color.BLACK, PieceType.PAWN)]) |
+                     (KNIGHT_ATTACK_MASKS[square] & (bitboards[(Color.WHITE, PieceType.KNIGHT)] |
+                                                     bitboards[(Color.BLACK, PieceType.KNIGHT)])) |
+                     (KING_ATTACK_MASKS[square] & (bitboards[(Color.WHITE, PieceType.KING)] |
+                                                   bitboards[(Color.BLACK, PieceType.KING)])))
+        line_sliders = self._line_sliders()
+        for direction in range(8):
+            attackers |= self._first_slider_on_ray(square, direction, occupied, line_sliders)
+        return attackers & occupied
+
+    @staticmethod
+    def _first_slider_on_ray(square: int, direction: int, occupied: int, line_sliders: Tuple[int, int]) -> int:
+        """Get the bit of the first piece along a ray if it slides along that line, else 0"""
+        sliders = line_sliders[direction >= 4]
+        if not RAY_MASKS[square][direction] & sliders & occupied:
+            return 0
+        for target in RAY_SQUARES[square][direction]:
+            if occupied >> target & 1:
+                return (1 << target) & sliders
+        return 0
+
+    def static_exchange_evaluation(self, row: int, col: int) -> int:
+        """Material the opponent gains by capturing the piece on this square (static exchange).
+
+        The opponent captures first with their least valuable attacker; after that both
+        sides recapture with their cheapest piece or stop when continuing would lose
+        material. X-ray attackers behind sliders join in as the pieces in front of them
+        capture. Pins are not considered. Negative when the capture itself loses material;
+        0 for an empty square or one the opponent cannot capture on.
+        """
+        square = row * 8 + col
+        if not self.occupied >> square & 1:
+            return 0
+        return self._exchange_value(square, self._attackers_to(square, self.occupied))
+
+    def get_exchange_evaluations(self) -> Dict[Tuple[int, int], int]:
+        """Static exchange evaluation for every occupied square in one pass.
+
+        Attackers of every square are enumerated once by walking each piece's attacks,
+        instead of searching outwards from each square separately.
+        """
+        attackers_by_square = [0] * 64
+        occupied = self.occupied
+        for square in iter_bits(occupied):
+            piece = self.board[square >> 3][square & 7]
+            bit = 1 << square
+            for target in iter_bits(self.attacks_from(piece, square) & occupied):
+                attackers_by_square[target] |= bit
+
+        return {square_coords(square): self._exchange_value(square, attackers_by_square[square])
+                for square in iter_bits(occupied)}
+
+    def attacks_from(self, piece: Piece, square: int) -> int:
+        """Bitboard of the squares a piece on square (row * 8 + col) attacks in this position"""
         if piece.type == PieceType.PAWN:
-            return self._get_pawn_attacks(row, col, piece.color)
-        elif piece.type == PieceType.ROOK:
-            return self._get_rook_moves(row, col, piece.color)
-        elif piece.type == PieceType.KNIGHT:
-            return self._get_knight_moves(row, col, piece.color)
+            return PAWN_ATTACK_MASKS[piece.color][square]
+        if piece.type == PieceType.KNIGHT:
+            return KNIGHT_ATTACK_MASKS[square]
+        if piece.type == PieceType.KING:
+            return KING_ATTACK_MASKS[square]
+
+        rays = RAY_SQUARES[square]
+        if piece.type == PieceType.ROOK:
+            rays = rays[:4]
         elif piece.type == PieceType.BISHOP:
-            return self._get_bishop_moves(row, col, piece.color)
-        elif piece.type == PieceType.QUEEN:
-            return self._get_queen_moves(row, col, piece.color)
-        elif piece.type == PieceType.KING:
-            return self._get_king_attacks(row, col, piece.color)
-
-        return []
-
-    def _get_pawn_attacks(self, row: int, col: int, color: Color) -> List[Tuple[int, int]]:
-        """Get squares a pawn attacks (diagonal captures only)"""
-        attacks = []
-        direction = -1 if color == Color.WHITE else 1
-
-        # Check diagonal attacks
-        for dc in [-1, 1]:
-            attack_row = row + direction
-            attack_col = col + dc
-            if self._is_valid_square(attack_row, attack_col):
-                attacks.append((attack_row, attack_col))
-
+            rays = rays[4:]
+        occupied = self.occupied
+        attacks = 0
+        for ray in rays:
+            for target in ray:
+                attacks |= 1 << target
+                if occupied >> target & 1:
+                    break
         return attacks
 
-    def _get_king_attacks(self, row: int, col: int, color: Color) -> List[Tuple[int, int]]:
-        """Get squares a king attacks (excludes castling)"""
-        attacks = []
-        king_moves = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
-
-        for dr, dc in king_moves:
-            new_row, new_col = row + dr, col + dc
-            if self._is_valid_square(new_row, new_col):
-                attacks.append((new_row, new_col))
+    def _exchange_value(self, square: int, attackers: int) -> int:
+        """Run the capture sequence on an occupied square (swap algorithm)"""
+        target = self.board[square >> 3][square & 7]
+        side = Color.BLACK if target.color == Color.WHITE else Color.WHITE
+        occupied = self.occupied
+
+        from_bit, capturer_value = self._least_valuable_attacker(attackers & occupied, side)
+        if not from_bit:
+            return 0  # The square cannot be captured on
+        line_sliders = self._line_sliders()
+
+        # gains[d] is the balance for the side making capture d; the last entry is speculative
+        # (it assumes the capturer is taken back) and only bounds the decision before it
+        gains = [PIECE_VALUES[target.type]]
+        while from_bit:
+            # No early cutoff: it would keep the sign of the result but not its size
+            gains.append(capturer_value - gains[-1])
+
+            # Remove the capturer and reveal any slider behind it
+            occupied ^= from_bit
+            direction = DIRECTION_BETWEEN[square][from_bit.bit_length() - 1]
+            if direction >= 0:
+                attackers |= self._first_slider_on_ray(square, direction, occupied, line_sliders)
+            side = Color.BLACK if side == Color.WHITE else Color.WHITE
+            from_bit, capturer_value = self._least_valuable_attacker(attackers & occupied, side)
+
+        # Back up the sequence: after the first capture, each side may stand pat instead of recapturing
+        for depth in range(len(gains) - 2, 0, -1):
+            gains[depth - 1] = -max(-gains[depth - 1], gains[depth])
+        return gains[0]
+
+    def _least_valuable_attacker(self, attackers: int, color: Color) -> Tuple[int, int]:
+        """Get (bit, value) of the cheapest attacker of the given color, or (0, 0)"""
+        attackers &= self.color_bitboards[color]
+        if attackers:
+            for piece_type in PIECE_TYPES_BY_VALUE:
+                candidates = attackers & self.piece_bitboards[(color, piece_type)]
+                if candidates:
+                    return candidates & -candidates, PIECE_VALUES[piece_type]
+        return 0, 0
+
+    @classmethod
+    def from_fen(cls, fen: str) -> 'BoardState':
+        """Create a board directly from a FEN string. Raises ValueError if the FEN is malformed.
+
+        The halfmove and fullmove fields are optional and default to 0 and 1.
+        """
+        fields = fen.split()
+        if len(fields) not in (4, 6):
+            raise ValueError(f"FEN must have 4 or 6 fields: {fen!r}")
+        placement, active_color, castling, ep_square = fields[:4]
+
+        # Piece placement (rank 8 first, which is row 0)
+        ranks = placement.split("/")
+        if len(ranks) != 8:
+            raise ValueError(f"FEN placement must have 8 ranks: {placement!r}")
+        grid = [[None for _ in range(8)] for _ in range(8)]
+        king_counts = {Color.WHITE: 0, Color.BLACK: 0}
+        for row, rank in enumerate(ranks):
+            col = 0
+            for char in rank:
+                if char in "12345678":
+                    col += int(char)
+                    continue
+                if char.upper() not in "PNBRQK" or col > 7:
+                    raise ValueError(f"Invalid FEN rank {rank!r}")
+                color = Color.WHITE if char.isupper() else Color.BLACK
+                piece_type = PieceType(char.upper())
+                if piece_type == PieceType.KING:
+                    king_counts[color] += 1
+                grid[row][col] = Piece(piece_type, color)
+                col += 1
+            if col != 8:
+                raise ValueError(f"FEN rank does not cover 8 squares: {rank!r}")
+        if king_counts[Color.WHITE] != 1 or king_counts[Color.BLACK] != 1:
+            raise ValueError("FEN must contain exactly one king per color")
+
+        # Side to move
+        if active_color not in ("w", "b"):
+            raise ValueError(f"Invalid FEN active color: {active_color!r}")
 
-        return attacks
+        # Castling rights
+        if castling != "-" and (not castling or any(char not in "KQkq" for char in castling)):
+            raise ValueError(f"Invalid FEN castling field: {castling!r}")
+        castling_rights = CastlingRights("K" in castling, "Q" in castling, "k" in castling, "q" in castling)
 
-    def _get_piece_value(self, row: int, col: int) -> int:
-        """Get the standard chess piece value"""
-        piece = self.get_piece(row, col)
-        if not piece:
-            return 0
+        # En passant target
+        en_passant_target = None
+        if ep_square != "-":
+            if len(ep_square) != 2 or ep_square[0] not in "abcdefgh" or ep_square[1] not in "36":
+                raise ValueError(f"Invalid FEN en passant square: {ep_square!r}")
+            en_passant_target = (8 - int(ep_square[1]), ord(ep_square[0]) - ord("a"))
+
+        # Clocks
+        halfmove_clock, fullmove_number = 0, 1
+        if len(fields) == 6:
+            try:
+                halfmove_clock, fullmove_number = int(fields[4]), int(fields[5])
+            except ValueError:
+                raise ValueError(f"Invalid FEN move counters: {fields[4]!r} {fields[5]!r}") from None
+
+        return cls.from_position(grid,
+                                 Color.WHITE if active_color == "w" else Color.BLACK,
+                                 castling_rights, en_passant_target,
+                                 halfmove_clock, fullmove_number)
+
+    @classmethod
+    def from_position(cls, grid: List[List[Optional[Piece]]], current_turn: Color,
+                      castling_rights: CastlingRights, en_passant_target: Optional[Tuple[int, int]] = None,
+                      halfmove_clock: int = 0, fullmove_number: int = 1) -> 'BoardState':
+        """Create a board from a filled 8x8 piece grid and the remaining position fields.
+
+        Castling rights whose king or rook is not on its home square are dropped.
+        Raises ValueError if the en passant target does not follow a double pawn push.
+        """
+        # A castling right needs the king and that rook on their home squares
+        rights = {}
+        for (row, col), (color, kingside) in ROOK_CORNERS.items():
+            king, rook = grid[row][4], grid[row][col]
+            rights[(color, kingside)] = (castling_rights.can_castle(color, kingside) and
+                                         king is not None and king.type == PieceType.KING and king.color == color and
+                                         rook is not None and rook.type == PieceType.ROOK and rook.color == color)
+        castling_rights = CastlingRights(rights[(Color.WHITE, True)], rights[(Color.WHITE, False)],
+                                         rights[(Color.BLACK, True)], rights[(Color.BLACK, False)])
+
+        # The target is behind a pawn of the side not to move that has just advanced two squares
+        if en_passant_target is not None:
+            target_row, target_col = en_passant_target
+            expected_row = 2 if current_turn == Color.WHITE else 5  # Rank 6 or rank 3
+            pawn = None
+            if target_row == expected_row:
+                pawn = grid[target_row + (1 if current_turn == Color.WHITE else -1)][target_col]
+            if pawn is None or pawn.type != PieceType.PAWN or pawn.color == current_turn:
+                raise ValueError(f"En passant target {square_name(*en_passant_target)} does not follow "
+                                 f"a double pawn push by {'black' if current_turn == Color.WHITE else 'white'}")
+
+        # Pieces off their starting squares (or without the matching castling right) have moved
+        for row in range(8):
+            for col in range(8):
+                piece = grid[row][col]
+                if piece is None:
+                    continue
+                home_row = 7 if piece.color == Color.WHITE else 0
+                if piece.type == PieceType.PAWN:
+                    piece.has_moved = row != (6 if piece.color == Color.WHITE else 1)
+                elif piece.type == PieceType.KING:
+                    piece.has_moved = not ((row, col) == (home_row, 4) and
+                                           (castling_rights.can_castle(piece.color, True) or
+                                            castling_rights.can_castle(piece.color, False)))
+                elif piece.type == PieceType.ROOK:
+                    corner = ROOK_CORNERS.get((row, col))
+                    piece.has_moved = not (corner and corner[0] == piece.color and
+                                           castling_rights.can_castle(*corner))
+
+        # __post_init__ builds the bitboards, Zobrist key and position history
+        board = cls(board=grid,
+                    current_turn=current_turn,
+                    halfmove_clock=halfmove_clock,
+                    fullmove_number=fullmove_number,
+                    castling_rights=castling_rights,
+                    en_passant_target=en_passant_target)
+        board.is_check = board.is_king_in_check(board.current_turn)
+        board._update_game_status()
+        return board
 
-        values = {
-            PieceType.PAWN: 1,
-            PieceType.KNIGHT: 3,
-            PieceType.BISHOP: 3,
-            PieceType.ROOK: 5,
-            PieceType.QUEEN: 9,
-            PieceType.KING: 100  # King is invaluable
-        }
+    def copy(self) -> 'BoardState':
+        """Independent copy of the position and its repetition history.
 
-        return values.get(piece.type, 0)
+        The copy starts its own move history: undo/redo records are not carried over.
+        """
+        grid = [[copy.copy(piece) for piece in row] for row in self.board]
+        board = BoardState.from_position(grid, self.current_turn, copy.copy(self.castling_rights),
+                                         self.en_passant_target, self.halfmove_clock, self.fullmove_number)
+        board.position_history = list(self.position_history)
+        board._update_game_status()
+        return board
 
     def get_fen_position(self) -> str:
         """Generate FEN (Forsyth-Edwards Notation) string for the current position"""
@@ -468,9 +973,7 @@ class BoardState:
         
         # En passant target
         if self.en_passant_target:
-            col_letter = chr(ord('a') + self.en_passant_target[1])
-            row_number = 8 - self.en_passant_target[0]
-            ep_target = f"{col_letter}{row_number}"
+            ep_target = square_name(*self.en_passant_target)
         else:
             ep_target = "-"
         
@@ -480,10 +983,6 @@ class BoardState:
         
         return f"{board_fen} {active_color} {castling} {ep_target} {halfmove} {fullmove}"
     
-    def copy(self) -> 'BoardState':
-        """Create a deep copy of the board state"""
-        return copy.deepcopy(self)
-    
     def __str__(self) -> str:
         """String representation of the board"""
         result = "  a b c d e f g h\n"
@@ -500,41 +999,271 @@ class BoardState:
         return result
 
     def get_possible_moves(self, row: int, col: int) -> List[Tuple[int, int]]:
-        """Get all legal moves for a piece at the given position (filters out moves that leave king in check)"""
+        """Get all legal target squares for the piece at the given position (a promotion counts once)"""
         piece = self.get_piece(row, col)
         if not piece:
             return []
+        targets = []
+        for move in self._generate_moves(piece.color):
+            if move.from_square == (row, col) and move.to_square not in targets:
+                targets.append(move.to_square)
+        return targets
+
+    def generate_legal_moves(self, captures_only: bool = False) -> List[Move]:
+        """Get every legal move for the side to move as fully tagged Move objects.
+
+        Promotions yield one move per promotion piece; castling, en passant and
+        double pawn pushes come with their flags already set. With captures_only,
+        only captures (including en passant) and promotions are returned.
+        """
+        return self._generate_moves(self.current_turn, captures_only)
+
+    def _generate_moves(self, color: Color, captures_only: bool = False) -> List[Move]:
+        """Legal moves for color, straight from the attack and pin bitboards.
+
+        Each piece's targets are its attack bitboard (plus pushes for pawns) masked
+        with the squares it may land on. King steps are legal when the enemy attack
+        counts leave the target unattacked; other pieces must land inside the check
+        mask and stay on their pin ray. With captures_only, quiet moves are never built.
+        """
+        enemy_color = Color.BLACK if color == Color.WHITE else Color.WHITE
+        own = self.color_bitboards[color]
+        enemy = self.color_bitboards[enemy_color]
+        occupied = self.occupied
+        landing = enemy if captures_only else ALL_SQUARES & ~own
+        check_mask, pins, king_xrays = self._get_legal_move_context(color)
+        enemy_counts = self.attack_counts[enemy_color]
+        board = self.board
+        forward = -8 if color == Color.WHITE else 8
+        double_push_row = 6 if color == Color.WHITE else 1
+        promotion_row = 0 if color == Color.WHITE else 7
+        en_passant_square = (self.en_passant_target[0] * 8 + self.en_passant_target[1]
+                             if self.en_passant_target and color == self.current_turn else None)
 
-        # Get all pseudo-legal moves first
-        if piece.type == PieceType.PAWN:
-            pseudo_moves = self._get_pawn_moves(row, col, piece.color)
-        elif piece.type == PieceType.ROOK:
-            pseudo_moves = self._get_rook_moves(row, col, piece.color)
-        elif piece.type == PieceType.KNIGHT:
-            pseudo_moves = self._get_knight_moves(row, col, piece.color)
-        elif piece.type == PieceType.BISHOP:
-            pseudo_moves = self._get_bishop_moves(row, col, piece.color)
-        elif piece.type == PieceType.QUEEN:
-            pseudo_moves = self._get_queen_moves(row, col, piece.color)
-        elif piece.type == PieceType.KING:
-            pseudo_moves = self._get_king_moves(row, col, piece.color)
-        else:
-            return []
+        moves = []
+        for square in iter_bits(own):
+            row, col = square >> 3, square & 7
+            piece = board[row][col]
+            if piece.type == PieceType.KING:
+                for target in iter_bits(KING_ATTACK_MASKS[square] & landing):
+                    if not (enemy_counts[target] or king_xrays >> target & 1):
+                        moves.append(self.create_move(row, col, target >> 3, target & 7))
+                if not captures_only:
+                    # can_castle() checks the rights, the empty squares and the king's path
+                    for kingside, to_col in ((True, 6), (False, 2)):
+                        if self.can_castle(color, kingside):
+                            moves.append(self.create_move(row, col, row, to_col))
+                continue
+            if not check_mask:
+                continue  # Double check: only the king can move
+
+            allowed = check_mask & pins.get(square, ALL_SQUARES)
+            if piece.type != PieceType.PAWN:
+                for target in iter_bits(self.attacks_from(piece, square) & landing & allowed):
+                    moves.append(self.create_move(row, col, target >> 3, target & 7))
+                continue
+
+            targets = PAWN_ATTACK_MASKS[color][square] & enemy
+            push_square = square + forward
+            if not occupied >> push_square & 1:
+                if not captures_only or push_square >> 3 == promotion_row:
+                    targets |= 1 << push_square
+                    double_square = push_square + forward
+                    if row == double_push_row and not occupied >> double_square & 1:
+                        targets |= 1 << double_square
+            for target in iter_bits(targets & allowed):
+                if target >> 3 == promotion_row:
+                    for promotion in PROMOTION_PIECE_TYPES:
+                        moves.append(self.create_move(row, col, target >> 3, target & 7, promotion))
+                else:
+                    moves.append(self.create_move(row, col, target >> 3, target & 7))
+            if (en_passant_square is not None and PAWN_ATTACK_MASKS[color][square] >> en_passant_square & 1 and
+                    self._is_move_legal(row, col, en_passant_square >> 3, en_passant_square & 7)):
+                # En passant removes two pieces from a rank at once, so test it directly
+                moves.append(self.create_move(row, col, en_passant_square >> 3, en_passant_square & 7))
+        return moves
 
-        # Filter out moves that would leave the king in check
-        legal_moves = []
-        for move_row, move_col in pseudo_moves:
-            if self._is_move_legal(row, col, move_row, move_col):
-                legal_moves.append((move_row, move_col))
+    def _get_san_tables(self) -> Tuple[Dict[str, Move], Dict[Tuple[Any, ...], str]]:
+        """Get (SAN -> move, move key -> SAN) for the side to move, without check suffixes.
+
+        Built from a single generate_legal_moves() call per position: moves are
+        grouped by piece type and target square, so disambiguation only looks at
+        the other legal moves in the same group.
+        """
+        if self._san_tables is not None and self._san_tables[0] == self.zobrist_key:
+            return self._san_tables[1], self._san_tables[2]
+
+        moves = self.generate_legal_moves()
+        rivals: Dict[Tuple[PieceType, Tuple[int, int]], List[Tuple[int, int]]] = {}
+        for move in moves:
+            if move.piece.type not in (PieceType.PAWN, PieceType.KING):
+                rivals.setdefault((move.piece.type, move.to_square), []).append(move.from_square)
+
+        san_to_move = {}
+        move_to_san = {}
+        for move in moves:
+            san = self._format_san(move, rivals.get((move.piece.type, move.to_square), ()))
+            san_to_move[san] = move
+            move_to_san[(move.from_square, move.to_square, move.promotion)] = san
+
+        self._san_tables = (self.zobrist_key, san_to_move, move_to_san)
+        return san_to_move, move_to_san
+
+    @staticmethod
+    def _format_san(move: Move, rival_squares) -> str:
+        """SAN for a move without the check suffix; rival_squares are the from-squares of
+        same-type pieces that can also legally reach the target"""
+        if move.is_castle:
+            return "O-O" if move.castle_kingside else "O-O-O"
+
+        target = square_name(*move.to_square)
+        from_name = square_name(*move.from_square)
+        if move.piece.type == PieceType.PAWN:
+            san = f"{from_name[0]}x{target}" if move.captured_piece else target
+            return f"{san}={move.promotion.value}" if move.promotion else san
+
+        disambiguation = ""
+        others = [square for square in rival_squares if square != move.from_square]
+        if others:
+            if all(col != move.from_square[1] for _, col in others):
+                disambiguation = from_name[0]
+            elif all(row != move.from_square[0] for row, _ in others):
+                disambiguation = from_name[1]
+            else:
+                disambiguation = from_name
+        capture = "x" if move.captured_piece else ""
+        return f"{move.piece.type.value}{disambiguation}{capture}{target}"
+
+    def move_to_san(self, move: Move) -> str:
+        """Standard algebraic notation for a legal move, with "+" or "#" (the board is not changed)"""
+        san = self._get_san_tables()[1].get((move.from_square, move.to_square, move.promotion))
+        if san is None:
+            raise ValueError(f"Illegal move {move.uci()}")
+        if not self.gives_check(move):
+            return san
+
+        # Only checking moves need the reply generation that tells mate from check
+        self.push(move)
+        try:
+            is_mate = not self.generate_legal_moves()
+        finally:
+            self.pop()
+        return san + ("#" if is_mate else "+")
+
+    def parse_san(self, san: str) -> Move:
+        """Find the legal move for a SAN string such as "Nbd7", "exd5", "O-O" or "e8=Q+".
+
+        Check and annotation suffixes are ignored, "0-0" is accepted for castling
+        and over-specified moves like "Ngf3" are matched. Raises ValueError.
+        """
+        text = san.strip().rstrip("+#!?").replace("0", "O")
+        san_to_move = self._get_san_tables()[0]
+        move = san_to_move.get(text)
+        if move is not None:
+            return move
+
+        # Not canonical: match the pattern against the same legal moves
+        match = SAN_PATTERN.match(text)
+        if not match:
+            raise ValueError(f"Unreadable move '{san}'")
+        piece_letter, from_file, from_rank, target, promotion_letter = match.groups()
+        piece_type = PieceType(piece_letter or "P")
+        promotion = PieceType(promotion_letter) if promotion_letter else None
+        candidates = []
+        for move in san_to_move.values():
+            from_name = square_name(*move.from_square)
+            if (move.piece.type == piece_type and square_name(*move.to_square) == target and
+                    move.promotion == promotion and from_file in (None, from_name[0]) and
+                    from_rank in (None, from_name[1])):
+                candidates.append(move)
+        if len(candidates) != 1:
+            problem = "Ambiguous" if candidates else "Illegal"
+            raise ValueError(f"{problem} move '{san}'")
+        return candidates[0]
+
+    def _get_legal_move_context(self, color: Color) -> Tuple[int, Dict[int, int], int]:
+        """Get (check_mask, pins, king_xrays) for a color, computed once per position.
+
+        check_mask: squares a non-king move must land on (all squares when not in
+        check, the checker plus blocking squares for a single check, none for double check).
+        pins: pinned piece square -> bitboard of the ray it may move along.
+        king_xrays: squares behind the king on a checking slider's line, which the
+        attack counts miss because the king itself blocks the ray.
+        """
+        cache_key = (self.zobrist_key, color)
+        if self._legal_move_context is not None and self._legal_move_context[0] == cache_key:
+            return self._legal_move_context[1]
+
+        enemy = Color.BLACK if color == Color.WHITE else Color.WHITE
+        bitboards = self.piece_bitboards
+        king_bitboard = bitboards[(color, PieceType.KING)]
+        check_mask = ALL_SQUARES
+        pins = {}
+        king_xrays = 0
+
+        if king_bitboard:
+            king_square = king_bitboard.bit_length() - 1
+            own_pieces = self.color_bitboards[color]
+
+            # Leaper checkers
+            checkers = ((PAWN_ATTACK_MASKS[color][king_square] & bitboards[(enemy, PieceType.PAWN)]) |
+                        (KNIGHT_ATTACK_MASKS[king_square] & bitboards[(enemy, PieceType.KNIGHT)]))
+            block_mask = checkers
+
+            # Slider checkers and pins: walk each ray out from the king
+            queens = bitboards[(enemy, PieceType.QUEEN)]
+            rooks_queens = bitboards[(enemy, PieceType.ROOK)] | queens
+            bishops_queens = bitboards[(enemy, PieceType.BISHOP)] | queens
+            ray_masks = RAY_MASKS[king_square]
+            for direction, ray in enumerate(RAYS[king_square]):
+                sliders = rooks_queens if direction < 4 else bishops_queens
+                if not ray_masks[direction] & sliders:
+                    continue
+                between = 0
+                pinned_square = None
+                for ray_row, ray_col in ray:
+                    square = ray_row * 8 + ray_col
+                    bit = 1 << square
+                    between |= bit
+                    if not self.occupied & bit:
+                        continue
+                    if own_pieces & bit:
+                        if pinned_square is not None:
+                            break  # Two friendly pieces shield the king
+                        pinned_square = square
+                        continue
+                    if sliders & bit:
+                        if pinned_square is None:
+                            checkers |= bit
+                            block_mask |= between
+                            behind_king = RAYS[king_square][OPPOSITE_DIRECTION[direction]]
+                            if behind_king:
+                                king_xrays |= 1 << (behind_king[0][0] * 8 + behind_king[0][1])
+                        else:
+                            pins[pinned_square] = between
+                    break
 
-        return legal_moves
+            if checkers & (checkers - 1):
+                check_mask = 0
+            elif checkers:
+                check_mask = block_mask
+
+        context = (check_mask, pins, king_xrays)
+        self._legal_move_context = (cache_key, context)
+        return context
 
     def _is_move_legal(self, from_row: int, from_col: int, to_row: int, to_col: int) -> bool:
-        """Check if a move is legal (doesn't leave own king in check)"""
+        """Check if a move is legal (doesn't leave own king in check) by trying it on the board"""
         # Save current state
         piece = self.get_piece(from_row, from_col)
         captured_piece = self.get_piece(to_row, to_col)
 
+        # An en passant capture also removes the pawn beside the moving pawn
+        en_passant_pawn = None
+        if piece.type == PieceType.PAWN and captured_piece is None and from_col != to_col:
+            en_passant_pawn = self.get_piece(from_row, to_col)
+            self.set_piece(from_row, to_col, None)
+
         # Make temporary move
         self.set_piece(to_row, to_col, piece)
         self.set_piece(from_row, from_col, None)
@@ -545,143 +1274,11 @@ class BoardState:
         # Restore original state
         self.set_piece(from_row, from_col, piece)
         self.set_piece(to_row, to_col, captured_piece)
+        if en_passant_pawn:
+            self.set_piece(from_row, to_col, en_passant_pawn)
 
         return is_legal
 
-    def _is_valid_square(self, row: int, col: int) -> bool:
-        """Check if a square is within board bounds"""
-        return 0 <= row < 8 and 0 <= col < 8
-
-    def _is_square_empty_or_enemy(self, row: int, col: int, color: Color) -> bool:
-        """Check if a square is empty or contains an enemy piece"""
-        if not self._is_valid_square(row, col):
-            return False
-        piece = self.get_piece(row, col)
-        return piece is None or piece.color != color
-
-    def _get_pawn_moves(self, row: int, col: int, color: Color) -> List[Tuple[int, int]]:
-        """Get possible moves for a pawn"""
-        moves = []
-        direction = -1 if color == Color.WHITE else 1  # White moves up (-1), Black moves down (+1)
-        start_row = 6 if color == Color.WHITE else 1
-
-        # Forward move
-        new_row = row + direction
-        if self._is_valid_square(new_row, col) and self.get_piece(new_row, col) is None:
-            moves.append((new_row, col))
-
-            # Double forward move from starting position
-            if row == start_row:
-                new_row = row + 2 * direction
-                if self._is_valid_square(new_row, col) and self.get_piece(new_row, col) is None:
-                    moves.append((new_row, col))
-
-        # Diagonal captures
-        for dc in [-1, 1]:
-            new_row, new_col = row + direction, col + dc
-            if self._is_valid_square(new_row, new_col):
-                piece = self.get_piece(new_row, new_col)
-                if piece and piece.color != color:
-                    moves.append((new_row, new_col))
-
-        # En passant capture
-        if self.en_passant_target:
-            ep_row, ep_col = self.en_passant_target
-            if row + direction == ep_row and abs(col - ep_col) == 1:
-                moves.append((ep_row, ep_col))
-
-        return moves
-
-    def _get_rook_moves(self, row: int, col: int, color: Color) -> List[Tuple[int, int]]:
-        """Get possible moves for a rook"""
-        moves = []
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]  # Right, Left, Down, Up
-
-        for dr, dc in directions:
-            for i in range(1, 8):
-                new_row, new_col = row + i * dr, col + i * dc
-                if not self._is_valid_square(new_row, new_col):
-                    break
-
-                piece = self.get_piece(new_row, new_col)
-                if piece is None:
-                    moves.append((new_row, new_col))
-                elif piece.color != color:
-                    moves.append((new_row, new_col))
-                    break
-                else:
-                    break
-
-        return moves
-
-    def _get_knight_moves(self, row: int, col: int, color: Color) -> List[Tuple[int, int]]:
-        """Get possible moves for a knight"""
-        moves = []
-        knight_moves = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
-
-        for dr, dc in knight_moves:
-            new_row, new_col = row + dr, col + dc
-            if self._is_square_empty_or_enemy(new_row, new_col, color):
-                moves.append((new_row, new_col))
-
-        return moves
-
-    def _get_bishop_moves(self, row: int, col: int, color: Color) -> List[Tuple[int, int]]:
-        """Get possible moves for a bishop"""
-        moves = []
-        directions = [(1, 1), (1, -1), (-1, 1), (-1, -1)]  # Diagonal directions
-
-        for dr, dc in directions:
-            for i in range(1, 8):
-                new_row, new_col = row + i * dr, col + i * dc
-                if not self._is_valid_square(new_row, new_col):
-                    break
-
-                piece = self.get_piece(new_row, new_col)
-                if piece is None:
-                    moves.append((new_row, new_col))
-                elif piece.color != color:
-                    moves.append((new_row, new_col))
-                    break
-                else:
-                    break
-
-        return moves
-
-    def _get_queen_moves(self, row: int, col: int, color: Color) -> List[Tuple[int, int]]:
-        """Get possible moves for a queen (combination of rook and bishop)"""
-        return self._get_rook_moves(row, col, color) + self._get_bishop_moves(row, col, color)
-
-    def _get_king_moves(self, row: int, col: int, color: Color) -> List[Tuple[int, int]]:
-        """Get possible moves for a king"""
-        moves = []
-        king_moves = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
-
-        for dr, dc in king_moves:
-            new_row, new_col = row + dr, col + dc
-            if self._is_square_empty_or_enemy(new_row, new_col, color):
-                moves.append((new_row, new_col))
-
-        # Add castling moves
-        if self.can_castle(color, True):  # Kingside
-            moves.append((row, 6))  # King moves to g-file
-        if self.can_castle(color, False):  # Queenside
-            moves.append((row, 2))  # King moves to c-file
-
-        return moves
-
-    def _is_castling_move(self, from_row: int, from_col: int, to_row: int, to_col: int) -> bool:
-        """Check if a move is a castling move"""
-        piece = self.get_piece(from_row, from_col)
-        if not piece or piece.type != PieceType.KING:
-            return False
-
-        # King must move exactly 2 squares horizontally
-        if from_row != to_row or abs(to_col - from_col) != 2:
-            return False
-
-        return True
-
     def _execute_castling(self, from_row: int, from_col: int, to_row: int, to_col: int) -> None:
         """Execute castling by moving both king and rook"""
         # Determine if kingside or queenside
@@ -713,94 +1310,106 @@ class BoardState:
             king.has_moved = True
             self.castling_rights.lose_all_castling_rights(king.color)
 
-    def _save_state_for_undo(self) -> None:
-        """Save current board state to undo stack and clear redo stack"""
-        # Create a deep copy of the current state for undo
-        state_copy = self.copy()
-        state_copy.undo_stack = []  # Don't copy the undo/redo stacks
-        state_copy.redo_stack = []
-
-        # Add to undo stack (limit to 50 moves to prevent memory issues)
-        self.undo_stack.append(state_copy)
-        if len(self.undo_stack) > 50:
-            self.undo_stack.pop(0)
-
-        # Clear redo stack since we're making a new move
-        self.redo_stack.clear()
-
-    def make_move(self, from_row: int, from_col: int, to_row: int, to_col: int) -> bool:
-        """Execute a move if it's legal. Returns True if move was successful."""
-        # Validate the move is in the list of possible moves
-        possible_moves = self.get_possible_moves(from_row, from_col)
-        if (to_row, to_col) not in possible_moves:
-            return False
-
-        # Get the piece to move
-        piece = self.get_piece(from_row, from_col)
-        if not piece:
-            return False
-
-        # Verify it's the correct player's turn
-        if piece.color != self.current_turn:
-            return False
-
-        # Save state for undo before making the move
-        self._save_state_for_undo()
+    def create_move(self, from_row: int, from_col: int, to_row: int, to_col: int,
+                     promotion: Optional[PieceType] = None) -> Move:
+        """Build a fully tagged Move for the piece on the from-square, ready for push().
+
+        There is no legality check; pawn moves to the last rank promote to a queen
+        unless promotion says otherwise.
+        """
+        piece = self.board[from_row][from_col]
+        captured_piece = self.board[to_row][to_col]
+        move = Move(from_square=(from_row, from_col), to_square=(to_row, to_col),
+                    piece=piece, captured_piece=captured_piece)
+
+        if piece.type == PieceType.KING:
+            if from_row == to_row and abs(to_col - from_col) == 2:
+                move.is_castle = True
+                move.castle_kingside = to_col > from_col
+        elif piece.type == PieceType.PAWN:
+            if abs(to_row - from_row) == 2:
+                move.is_double_pawn_push = True
+            elif captured_piece is None and from_col != to_col:
+                # Diagonal move onto an empty square is an en passant capture
+                move.is_en_passant = True
+                move.captured_piece = self.board[from_row][to_col]
+            if to_row == 0 or to_row == 7:
+                move.promotion = promotion or PieceType.QUEEN
+
+        return move
+
+    def push(self, move: Move) -> None:
+        """Play a move built by create_move() and record what it overwrites for pop().
+
+        Only is_check is refreshed; checkmate/stalemate status is left to the caller.
+        """
+        from_row, from_col = move.from_square
+        to_row, to_col = move.to_square
+        piece = self.board[from_row][from_col]
+        rights = self.castling_rights
+
+        rook = None
+        if move.is_castle:
+            rook = self.board[from_row][7 if move.castle_kingside else 0]
+
+        self.undo_stack.append(UndoRecord(
+            move=move,
+            piece_had_moved=piece.has_moved,
+            rook_had_moved=rook.has_moved if rook else False,
+            castling_rights=(rights.white_kingside, rights.white_queenside,
+                             rights.black_kingside, rights.black_queenside),
+            en_passant_target=self.en_passant_target,
+            halfmove_clock=self.halfmove_clock,
+            fullmove_number=self.fullmove_number,
+            last_move=self.last_move,
+            is_check=self.is_check,
+            is_in_checkmate=self.is_in_checkmate,
+            is_in_stalemate=self.is_in_stalemate,
+            game_phase=self.game_phase,
+            zobrist_key=self.zobrist_key,
+        ))
+
+        # Remove the old side/castling/en passant contribution; pieces are
+        # re-hashed by set_piece() as they move
+        self.zobrist_key ^= self._zobrist_state_component()
 
         # Invalidate hanging pieces cache since board will change
         self._invalidate_hanging_pieces_cache()
 
-        # Store captured piece for move history
-        captured_piece = self.get_piece(to_row, to_col)
-
-        # Check if this is a castling move
-        if self._is_castling_move(from_row, from_col, to_row, to_col):
+        if move.is_castle:
             # Execute castling (moves both king and rook)
             self._execute_castling(from_row, from_col, to_row, to_col)
         else:
-            # Execute regular move
-            self.set_piece(to_row, to_col, piece)
+            if move.is_en_passant:
+                # The captured pawn sits beside the moving pawn, not on the target square
+                self.set_piece(from_row, to_col, None)
+
+            if move.promotion:
+                self.set_piece(to_row, to_col, Piece(move.promotion, piece.color, True))
+            else:
+                self.set_piece(to_row, to_col, piece)
             self.set_piece(from_row, from_col, None)
 
             # Mark piece as moved (important for castling and pawn double moves)
             piece.has_moved = True
 
-            # Update castling rights based on piece moves
+            # Update castling rights: king moves lose both, and any move from or onto
+            # a rook's home square loses the right that rook guards
             if piece.type == PieceType.KING:
-                # King moved - lose all castling rights for this color
-                self.castling_rights.lose_all_castling_rights(piece.color)
-            elif piece.type == PieceType.ROOK:
-                # Rook moved - lose castling rights for the specific side
-                if from_col == 0:  # Queenside rook
-                    self.castling_rights.lose_castling_right(piece.color, False)
-                elif from_col == 7:  # Kingside rook
-                    self.castling_rights.lose_castling_right(piece.color, True)
-
-            # Also check if a rook was captured that would affect castling rights
-            if captured_piece and captured_piece.type == PieceType.ROOK:
-                if to_col == 0:  # Queenside rook captured
-                    self.castling_rights.lose_castling_right(captured_piece.color, False)
-                elif to_col == 7:  # Kingside rook captured
-                    self.castling_rights.lose_castling_right(captured_piece.color, True)
-
-        # Handle special pawn moves
-        if piece.type == PieceType.PAWN:
-            # Check for double move to set en passant target
-            if abs(to_row - from_row) == 2:
-                self.en_passant_target = (from_row + (to_row - from_row) // 2, to_col)
-            else:
-                self.en_passant_target = None
-
-            # Handle en passant capture
-            if captured_piece is None and abs(to_col - from_col) == 1:
-                # This is an en passant capture, remove the captured pawn
-                captured_pawn_row = from_row
-                self.set_piece(captured_pawn_row, to_col, None)
+                rights.lose_all_castling_rights(piece.color)
+            if (from_row, from_col) in ROOK_CORNERS:
+                rights.lose_castling_right(*ROOK_CORNERS[(from_row, from_col)])
+            if (to_row, to_col) in ROOK_CORNERS:
+                rights.lose_castling_right(*ROOK_CORNERS[(to_row, to_col)])
+
+        # Set the en passant target after a double pawn push
+        if move.is_double_pawn_push:
+            self.en_passant_target = ((from_row + to_row) // 2, to_col)
         else:
             self.en_passant_target = None
 
         # Update move counters
-        if captured_piece or piece.type == PieceType.PAWN:
+        if move.captured_piece or piece.type == PieceType.PAWN:
             self.halfmove_clock = 0
         else:
             self.halfmove_clock += 1
@@ -811,34 +1420,113 @@ class BoardState:
         if self.current_turn == Color.WHITE:
             self.fullmove_number += 1
 
+        self.zobrist_key ^= self._zobrist_state_component()
+        self.position_history.append(self.zobrist_key)
+
         # Update check status for the new player to move
         self.is_check = self.is_king_in_check(self.current_turn)
 
-        # Update checkmate and stalemate status
+        # Store move in history and remember it for highlighting
+        move.move_number = self.fullmove_number
+        self.move_history.append(move)
+        self.last_move = (move.from_square, move.to_square)
+
+    def pop(self) -> Move:
+        """Take back the most recently pushed move and return it"""
+        record = self.undo_stack.pop()
+        move = record.move
+        from_row, from_col = move.from_square
+        to_row, to_col = move.to_square
+
+        # Invalidate hanging pieces cache since board will change
+        self._invalidate_hanging_pieces_cache()
+
+        if move.is_castle:
+            rook_from_col, rook_to_col = (7, 5) if move.castle_kingside else (0, 3)
+            rook = self.board[from_row][rook_to_col]
+            self.set_piece(from_row, rook_from_col, rook)
+            self.set_piece(from_row, rook_to_col, None)
+            if rook:
+                rook.has_moved = record.rook_had_moved
+            self.set_piece(from_row, from_col, move.piece)
+            self.set_piece(to_row, to_col, None)
+        else:
+            self.set_piece(from_row, from_col, move.piece)
+            if move.is_en_passant:
+                self.set_piece(to_row, to_col, None)
+                self.set_piece(from_row, to_col, move.captured_piece)
+            else:
+                self.set_piece(to_row, to_col, move.captured_piece)
+        move.piece.has_moved = record.piece_had_moved
+
+        rights = self.castling_rights
+        (rights.white_kingside, rights.white_queenside,
+         rights.black_kingside, rights.black_queenside) = record.castling_rights
+        self.en_passant_target = record.en_passant_target
+        self.halfmove_clock = record.halfmove_clock
+        self.fullmove_number = record.fullmove_number
+        self.current_turn = move.piece.color
+        self.last_move = record.last_move
+        self.is_check = record.is_check
+        self.is_in_checkmate = record.is_in_checkmate
+        self.is_in_stalemate = record.is_in_stalemate
+        self.game_phase = record.game_phase
+        self.zobrist_key = record.zobrist_key
+        self.position_history.pop()
+        self.move_history.pop()
+
+        return move
+
+    def _update_game_status(self) -> None:
+        """Update checkmate, stalemate and draw status for the player to move"""
         if self.is_check:
-            self.is_in_checkmate =self.is_checkmate(self.current_turn)
+            self.is_in_checkmate = self.is_checkmate(self.current_turn)
+            self.is_in_stalemate = False
         else:
-            self.is_in_checkmate =False
-            self.is_in_stalemate =self.is_stalemate(self.current_turn)
-
-        # Create and store move in history
-        move = Move(
-            from_square=(from_row, from_col),
-            to_square=(to_row, to_col),
-            piece=piece,
-            captured_piece=captured_piece,
-            move_number=self.fullmove_number
-        )
-        self.move_history.append(move)
+            self.is_in_checkmate = False
+            self.is_in_stalemate = self.is_stalemate(self.current_turn)
+
+        # Checkmate on the move that reaches a draw condition still wins
+        if not self.is_in_checkmate and (self.is_threefold_repetition() or self.is_fifty_move_draw()):
+            self.game_phase = GamePhase.DRAW
+
+    def get_repetition_count(self) -> int:
+        """Count how often the current position has occurred (including now)"""
+        # Positions before the last capture or pawn move cannot repeat, and only
+        # positions with the same side to move (every second entry) can match
+        recent_positions = self.position_history[-(self.halfmove_clock + 1):]
+        return recent_positions[::-2].count(self.zobrist_key)
+
+    def is_threefold_repetition(self) -> bool:
+        """Check if the current position has occurred at least three times"""
+        return self.get_repetition_count() >= 3
+
+    def is_fifty_move_draw(self) -> bool:
+        """Check if fifty moves by each side have passed without a capture or pawn move"""
+        return self.halfmove_clock >= 100
+
+    def is_draw(self) -> bool:
+        """Check if the game is drawn by threefold repetition or the fifty-move rule"""
+        return self.is_threefold_repetition() or self.is_fifty_move_draw()
+
+    def _commit_move(self, move: Move) -> None:
+        """Play a user move: clear redo history, push it and bound the undo history"""
+        # Clear redo stack since we're making a new move
+        self.redo_stack.clear()
+        move.notation = self._get_san_tables()[1].get((move.from_square, move.to_square, move.promotion), "")
+        self.push(move)
 
-        # Update last move for highlighting
-        self.last_move = ((from_row, from_col), (to_row, to_col))
+        # Limit undo history to prevent unbounded growth over long games. Not a deque
+        # maxlen: push() inside a search or move_to_san() would then evict records
+        if len(self.undo_stack) > GameConstants.UNDO_HISTORY_LIMIT:
+            self.undo_stack.popleft()
 
-        return True
+        self._update_game_status()
+        if move.notation and self.is_check:
+            move.notation += "#" if self.is_in_checkmate else "+"
 
-    def make_move_with_promotion(self, from_row: int, from_col: int, to_row: int, to_col: int,
-                                promotion_piece: PieceType = PieceType.QUEEN) -> bool:
-        """Execute a move with optional pawn promotion. Returns True if move was successful."""
+    def make_move(self, from_row: int, from_col: int, to_row: int, to_col: int) -> bool:
+        """Execute a move if it's legal. Returns True if move was successful."""
         # Validate the move is in the list of possible moves
         possible_moves = self.get_possible_moves(from_row, from_col)
         if (to_row, to_col) not in possible_moves:
@@ -853,79 +1541,27 @@ class BoardState:
         if piece.color != self.current_turn:
             return False
 
-        # Save state for undo before making the move
-        self._save_state_for_undo()
-
-        # Store captured piece for move history
-        captured_piece = self.get_piece(to_row, to_col)
-
-        # Check for pawn promotion
-        is_promotion = False
-        if piece.type == PieceType.PAWN:
-            if (piece.color == Color.WHITE and to_row == 0) or (piece.color == Color.BLACK and to_row == 7):
-                is_promotion = True
-                # Create the promoted piece
-                piece = Piece(promotion_piece, piece.color, True)
-
-        # Execute the move
-        self.set_piece(to_row, to_col, piece)
-        self.set_piece(from_row, from_col, None)
-
-        # Mark piece as moved (important for castling and pawn double moves)
-        piece.has_moved = True
-
-        # Handle special pawn moves (only if not promoting)
-        if piece.type == PieceType.PAWN and not is_promotion:
-            # Check for double move to set en passant target
-            if abs(to_row - from_row) == 2:
-                self.en_passant_target = (from_row + (to_row - from_row) // 2, to_col)
-            else:
-                self.en_passant_target = None
-
-            # Handle en passant capture
-            if captured_piece is None and abs(to_col - from_col) == 1:
-                # This is an en passant capture, remove the captured pawn
-                captured_pawn_row = from_row
-                self.set_piece(captured_pawn_row, to_col, None)
-        else:
-            self.en_passant_target = None
-
-        # Update move counters
-        if captured_piece or piece.type == PieceType.PAWN:
-            self.halfmove_clock = 0
-        else:
-            self.halfmove_clock += 1
-
-        # Switch turns
-        self.current_turn = Color.BLACK if self.current_turn == Color.WHITE else Color.WHITE
-
-        if self.current_turn == Color.WHITE:
-            self.fullmove_number += 1
+        self._commit_move(self.create_move(from_row, from_col, to_row, to_col))
+        return True
 
-        # Update check status for the new player to move
-        self.is_check = self.is_king_in_check(self.current_turn)
+    def make_move_with_promotion(self, from_row: int, from_col: int, to_row: int, to_col: int,
+                                promotion_piece: PieceType = PieceType.QUEEN) -> bool:
+        """Execute a move with optional pawn promotion. Returns True if move was successful."""
+        # Validate the move is in the list of possible moves
+        possible_moves = self.get_possible_moves(from_row, from_col)
+        if (to_row, to_col) not in possible_moves:
+            return False
 
-        # Update checkmate and stalemate status
-        if self.is_check:
-            self.is_in_checkmate =self.is_checkmate(self.current_turn)
-        else:
-            self.is_in_checkmate =False
-            self.is_in_stalemate =self.is_stalemate(self.current_turn)
-
-        # Create and store move in history
-        move = Move(
-            from_square=(from_row, from_col),
-            to_square=(to_row, to_col),
-            piece=piece,
-            captured_piece=captured_piece,
-            promotion=promotion_piece if is_promotion else None,
-            move_number=self.fullmove_number
-        )
-        self.move_history.append(move)
+        # Get the piece to move
+        piece = self.get_piece(from_row, from_col)
+        if not piece:
+            return False
 
-        # Update last move for highlighting
-        self.last_move = ((from_row, from_col), (to_row, to_col))
+        # Verify it's the correct player's turn
+        if piece.color != self.current_turn:
+            return False
 
+        self._commit_move(self.create_move(from_row, from_col, to_row, to_col, promotion_piece))
         return True
 
     def is_pawn_promotion(self, from_row: int, from_col: int, to_row: int, to_col: int) -> bool:
@@ -948,16 +1584,7 @@ class BoardState:
         if not self.is_king_in_check(color):
             return False
 
-        # Check if any piece of this color has legal moves
-        for row in range(8):
-            for col in range(8):
-                piece = self.get_piece(row, col)
-                if piece and piece.color == color:
-                    legal_moves = self.get_possible_moves(row, col)
-                    if legal_moves:  # If any piece has legal moves, not checkmate
-                        return False
-
-        return True
+        return not self._generate_moves(color)
 
     def is_stalemate(self, color: Color) -> bool:
         """Check if the specified color is in stalemate (no legal moves but not in check)"""
@@ -965,16 +1592,7 @@ class BoardState:
         if self.is_king_in_check(color):
             return False
 
-        # Check if any piece of this color has legal moves
-        for row in range(8):
-            for col in range(8):
-                piece = self.get_piece(row, col)
-                if piece and piece.color == color:
-                    legal_moves = self.get_possible_moves(row, col)
-                    if legal_moves:  # If any piece has legal moves, not stalemate
-                        return False
-
-        return True
+        return not self._generate_moves(color)
 
     def can_undo(self) -> bool:
         """Check if undo is possible"""
@@ -989,34 +1607,7 @@ class BoardState:
         if not self.can_undo():
             return False
 
-        # Save current state to redo stack
-        current_state = self.copy()
-        current_state.undo_stack = []
-        current_state.redo_stack = []
-        self.redo_stack.append(current_state)
-
-        # Restore previous state from undo stack
-        previous_state = self.undo_stack.pop()
-
-        # Invalidate hanging pieces cache since board state will change
-        self._invalidate_hanging_pieces_cache()
-
-        # Copy all fields from previous state (except undo/redo stacks)
-        self.board = previous_state.board
-        self.current_turn = previous_state.current_turn
-        self.move_number = previous_state.move_number
-        self.halfmove_clock = previous_state.halfmove_clock
-        self.fullmove_number = previous_state.fullmove_number
-        self.castling_rights = previous_state.castling_rights
-        self.en_passant_target = previous_state.en_passant_target
-        self.is_check = previous_state.is_check
-        self.is_in_checkmate = previous_state.is_in_checkmate
-        self.is_in_stalemate = previous_state.is_in_stalemate
-        self.game_phase = previous_state.game_phase
-        self.move_history = previous_state.move_history
-        self.last_move = previous_state.last_move
-        self.position_history = previous_state.position_history
-
+        self.redo_stack.append(self.pop())
         return True
 
     def redo_move(self) -> bool:
@@ -1024,34 +1615,8 @@ class BoardState:
         if not self.can_redo():
             return False
 
-        # Save current state to undo stack
-        current_state = self.copy()
-        current_state.undo_stack = []
-        current_state.redo_stack = []
-        self.undo_stack.append(current_state)
-
-        # Restore next state from redo stack
-        next_state = self.redo_stack.pop()
-
-        # Invalidate hanging pieces cache since board state will change
-        self._invalidate_hanging_pieces_cache()
-
-        # Copy all fields from next state (except undo/redo stacks)
-        self.board = next_state.board
-        self.current_turn = next_state.current_turn
-        self.move_number = next_state.move_number
-        self.halfmove_clock = next_state.halfmove_clock
-        self.fullmove_number = next_state.fullmove_number
-        self.castling_rights = next_state.castling_rights
-        self.en_passant_target = next_state.en_passant_target
-        self.is_check = next_state.is_check
-        self.is_in_checkmate = next_state.is_in_checkmate
-        self.is_in_stalemate = next_state.is_in_stalemate
-        self.game_phase = next_state.game_phase
-        self.move_history = next_state.move_history
-        self.last_move = next_state.last_move
-        self.position_history = next_state.position_history
-
+        self.push(self.redo_stack.pop())
+        self._update_game_status()
         return True
 
 # Example usage and testing
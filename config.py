@@ -5,6 +5,8 @@ This module contains all constants, settings, and configuration values
 used throughout the application.
 """
 
+import os
+
 class GameConfig:
     """Main game configuration settings"""
 
@@ -109,6 +111,25 @@ class AnimationConfig:
     # Move animation
     MOVE_INDICATOR_RADIUS_FACTOR = 0.25  # Radius as factor of square size
 
+class AnalysisConfig:
+    """Background analysis settings"""
+
+    WORKER_STOP_TIMEOUT = 1.0  # Seconds to wait for the analysis thread on shutdown
+    CACHE_MAX_ENTRIES = 512    # Analyzed positions kept for undo/redo and hover previews
+
+    # Mate threat search (per side, per position)
+    MATE_SEARCH_MAX_MOVES = 3        # Look for mate in 1, 2 and 3
+    MATE_SEARCH_TIME_LIMIT_MS = 30   # One frame at 30 FPS
+    MATE_SEARCH_NODE_LIMIT = 20000
+
+    # Blunder check: material search over every legal move of the side to move
+    TACTICAL_SEARCH_TIME_LIMIT_MS = 50
+    TACTICAL_SEARCH_MAX_DEPTH = 4
+
+    # Syzygy endgame tablebases (optional, needs python-chess); directories with .rtbw/.rtbz files
+    SYZYGY_DIRECTORIES = tuple(path for path in os.environ.get("TESTY_SYZYGY_PATH", "").split(os.pathsep) if path)
+    SYZYGY_PROBE_CACHE_ENTRIES = 100_000
+
 class GameConstants:
     """Chess game constants"""
 
@@ -117,6 +138,7 @@ class GameConstants:
 
     # File paths
     PIECE_IMAGE_DIRECTORY = "pngs/2x/"
+    SAVED_GAME_FILE = "testy_game.pgn"  # Written by S, read back by L
 
     # Piece size factors
     PAWN_SIZE_FACTOR = 0.65     # Pawns are 65% of square size
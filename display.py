@@ -5,10 +5,11 @@ This module handles the visual representation of the chess board and game state.
 It provides functionality to display the board, pieces, and game information.
 """
 
-from typing import Optional, Tuple, List
+from typing import Any, Dict, Optional, Tuple, List
 import pygame
 import json
 import os
+import time
 from chess_board import BoardState, Piece, Color, PieceType
 from config import GameConfig, Colors, AnimationConfig, GameConstants
 
@@ -55,8 +56,9 @@ class ChessDisplay:
         # Load piece images (placeholder - you'd load actual piece images here)
         self.piece_images = self._load_piece_images()
 
-        # Create move indicator circle surface once
+        # Create move indicator circle surfaces once (red marks moves that lose material)
         self.move_indicator = self._create_move_indicator()
+        self.blunder_move_indicator = self._create_move_indicator(Colors.ANNOTATION_WARNING)
 
         # Help panel dimensions and positioning
         self.help_panel_width = int(window_width * GameConfig.HELP_PANEL_WIDTH_PERCENTAGE)
@@ -70,13 +72,22 @@ class ChessDisplay:
         # Help options - load from settings file if available
         self.settings_file = ".testy"
         self.help_options = [
-            {"name": "Hanging Pieces (h)", "key": "hanging_pieces", "enabled": False}
+            {"name": "Hanging Pieces (h)", "key": "hanging_pieces", "enabled": False},
+            {"name": "Immediate Threats (m)", "key": "mate_threats", "enabled": False},
+            {"name": "Blunder Check (b)", "key": "move_verdicts", "enabled": False},
+            {"name": "Simple Forks (k)", "key": "forks", "enabled": False},
+            {"name": "Pins & Skewers (p)", "key": "pins_skewers", "enabled": False}
         ]
         self._load_settings()
 
         # Checkmate animation variables
         self.checkmate_animation_start_time = None
         self.checkmate_king_position = None
+
+        # What the last frame drew, so update_display() only redraws what changed
+        self._drawn_layout = None        # Flip, helper checkboxes and stalemate overlay
+        self._drawn_square_states = None
+        self._drawn_tactic_lines = None
     
     def _load_piece_images(self) -> dict:
         """Load and scale piece images from PNG files"""
@@ -120,7 +131,7 @@ class ChessDisplay:
 
         return images
 
-    def _create_move_indicator(self) -> pygame.Surface:
+    def _create_move_indicator(self, color: Tuple[int, int, int] = Colors.ANNOTATION_NEUTRAL) -> pygame.Surface:
         """Create a translucent circle surface for move indicators"""
         # Create a surface with per-pixel alpha
         circle_surface = pygame.Surface((self.square_size, self.square_size), pygame.SRCALPHA)
@@ -130,8 +141,8 @@ class ChessDisplay:
         center_x = self.square_size // 2
         center_y = self.square_size // 2
 
-        # Draw translucent circle (light grey with alpha for subtle visibility)
-        circle_color = (*Colors.ANNOTATION_NEUTRAL, 100)  # Light grey with transparency
+        # Draw translucent circle (light grey by default, with alpha for subtle visibility)
+        circle_color = (*color, 100)
         pygame.draw.circle(circle_surface, circle_color, (center_x, center_y), circle_radius)
 
         return circle_surface
@@ -229,9 +240,9 @@ class ChessDisplay:
                 return option["enabled"]
         return False
 
-    def draw_move_indicator(self, screen, x: int, y: int) -> None:
-        """Draw the pre-created move indicator at specified position"""
-        screen.blit(self.move_indicator, (x, y))
+    def draw_move_indicator(self, screen, x: int, y: int, loses_material: bool = False) -> None:
+        """Draw the pre-created move indicator at specified position (red if the move loses material)"""
+        screen.blit(self.blunder_move_indicator if loses_material else self.move_indicator, (x, y))
 
     def draw_hanging_piece_indicator(self, screen, x: int, y: int, is_player_piece: bool) -> None:
         """Draw an indicator for hanging pieces - red for player (danger), green for opponent (opportunity)"""
@@ -247,13 +258,64 @@ class ChessDisplay:
         border_rect = pygame.Rect(x, y, self.square_size, self.square_size)
         pygame.draw.rect(screen, indicator_color, border_rect, border_thickness)
 
+    def draw_mate_threat_indicator(self, screen, x: int, y: int, mate_in: int, is_player_mate: bool) -> None:
+        """Label the target square of a mating move with "M<n>" - green for the player's mate, red for a threat"""
+        indicator_color = Colors.ANNOTATION_POSITIVE if is_player_mate else Colors.ANNOTATION_WARNING
+
+        # Small filled tag in the top-left corner of the square
+        label_surface = self.font_small.render(f"M{mate_in}", True, Colors.RGB_WHITE)
+        tag_rect = pygame.Rect(x + 2, y + 2, label_surface.get_width() + 6, label_surface.get_height())
+        pygame.draw.rect(screen, indicator_color, tag_rect, border_radius=3)
+        screen.blit(label_surface, (tag_rect.x + 3, tag_rect.y))
+
+    def _get_square_center(self, square: Tuple[int, int], is_board_flipped: bool) -> Tuple[int, int]:
+        """Screen coordinates of the center of a board square"""
+        row, col = square
+        display_row = (7 - row) if is_board_flipped else row
+        display_col = (7 - col) if is_board_flipped else col
+        return (self.board_margin_x + display_col * self.square_size + self.square_size // 2,
+                self.board_margin_y + display_row * self.square_size + self.square_size // 2)
+
+    def draw_tactic_line(self, screen, squares: List[Tuple[int, int]], is_player_tactic: bool,
+                         is_board_flipped: bool) -> None:
+        """Draw a line from an attacking piece through the squares it targets - green for the player, red for the opponent"""
+        line_color = Colors.ANNOTATION_POSITIVE if is_player_tactic else Colors.ANNOTATION_WARNING
+        points = [self._get_square_center(square, is_board_flipped) for square in squares]
+        pygame.draw.lines(screen, line_color, False, points, 3)
+        # Dot on the attacking piece so the direction is clear
+        pygame.draw.circle(screen, line_color, points[0], max(3, self.square_size // 12))
+
+    def _get_tactic_lines(self, tactics, is_board_flipped: bool) -> List[Tuple[List[Tuple[int, int]], bool]]:
+        """(squares, is_player_tactic) for each enabled fork, pin and skewer line of a TacticsReport"""
+        player_color = Color.BLACK if is_board_flipped else Color.WHITE
+        lines = []
+        if self.is_help_option_enabled("forks"):
+            for fork in tactics.forks:
+                for target in fork.targets:
+                    lines.append(([fork.attacker, target], fork.color == player_color))
+        if self.is_help_option_enabled("pins_skewers"):
+            for pin in tactics.pins:
+                lines.append(([pin.attacker, pin.pinned, pin.behind], pin.color == player_color))
+            for skewer in tactics.skewers:
+                lines.append(([skewer.attacker, skewer.front, skewer.behind], skewer.color == player_color))
+        return lines
+
+    def draw_tactics(self, screen, tactics, is_board_flipped: bool) -> None:
+        """Draw enabled fork, pin and skewer annotations (a TacticsReport)"""
+        for squares, is_player_tactic in self._get_tactic_lines(tactics, is_board_flipped):
+            self.draw_tactic_line(screen, squares, is_player_tactic, is_board_flipped)
+
     def is_animation_active(self) -> bool:
         """Check if any animations are currently running"""
         return self.checkmate_animation_start_time is not None
 
+    def _is_checkmate_animation_running(self) -> bool:
+        """Is the checkmated king still turning (it stays upside down afterwards)?"""
+        return (self.checkmate_animation_start_time is not None and
+                time.time() - self.checkmate_animation_start_time <= AnimationConfig.CHECKMATE_ROTATION_DURATION)
+
     def start_checkmate_animation(self, board_state: BoardState) -> None:
         """Start the checkmate animation for the losing king"""
-        import time
         self.checkmate_animation_start_time = time.time()
 
         # Find the checkmated king position
@@ -295,58 +357,114 @@ class ChessDisplay:
             text_rect = text_surface.get_rect(center=(x + self.square_size//2, y + self.square_size//2))
             screen.blit(text_surface, text_rect)
 
-    def draw_board(self, screen, board_state: BoardState, selected_square_coords: Optional[Tuple[int, int]] = None,
-                   highlighted_moves: List[Tuple[int, int]] = None, is_board_flipped: bool = False) -> None:
-        """Draw the chess board with pieces"""
-        if highlighted_moves is None:
-            highlighted_moves = []
-        
-        # Draw the board squares
+    def _get_square_states(self, board_state: BoardState, selected_square_coords: Optional[Tuple[int, int]],
+                           highlighted_moves: List[Tuple[int, int]], is_board_flipped: bool,
+                           annotations: Optional[Dict[str, Any]]) -> List[tuple]:
+        """What each square shows, indexed by row * 8 + col; an unchanged state needs no redraw"""
+        # Annotations come from the analysis worker (for the current position or a
+        # hovered move preview); until they arrive nothing is drawn
+        hanging_piece_colors = {}
+        if annotations and self.is_help_option_enabled("hanging_pieces"):
+            for color, squares in (annotations.get("hanging_pieces") or {}).items():
+                for square in squares:
+                    hanging_piece_colors[square] = color
+
+        # Verdicts for the selected piece's moves (blunder check)
+        move_verdicts = {}
+        if annotations and selected_square_coords and self.is_help_option_enabled("move_verdicts"):
+            move_verdicts = annotations.get("move_verdicts") or {}
+
+        # Target square of each side's mating move -> (color, moves to mate)
+        mate_targets = {}
+        if annotations and self.is_help_option_enabled("mate_threats"):
+            for color, mate in (annotations.get("mate_threats") or {}).items():
+                if mate.first_move is not None:
+                    mate_targets[mate.first_move.to_square] = (color, mate.mate_in)
+
+        # Player = pieces on bottom (white when not flipped, black when flipped)
+        player_color = Color.BLACK if is_board_flipped else Color.WHITE
+        states = []
         for row in range(8):
             for col in range(8):
-                # Apply flipping transformation
-                display_row = (7 - row) if is_board_flipped else row
-                display_col = (7 - col) if is_board_flipped else col
-                x = self.board_margin_x + display_col * self.square_size
-                y = self.board_margin_y + display_row * self.square_size
-                
                 # Determine square color (use original coordinates for coloring)
                 is_light = (row + col) % 2 == 0
                 color = self.LIGHT_SQUARE if is_light else self.DARK_SQUARE
 
                 # Apply last move highlighting (lichess-style green overlay)
-                if board_state.last_move:
-                    from_square, to_square = board_state.last_move
-                    if (row, col) == from_square or (row, col) == to_square:
-                        color = Colors.LIGHT_SQUARE_LAST_MOVE if is_light else Colors.DARK_SQUARE_LAST_MOVE
+                if board_state.last_move and (row, col) in board_state.last_move:
+                    color = Colors.LIGHT_SQUARE_LAST_MOVE if is_light else Colors.DARK_SQUARE_LAST_MOVE
 
                 # Highlight selected square only
-                if selected_square_coords and selected_square_coords == (row, col):
+                if selected_square_coords == (row, col):
                     color = self.SELECTED
 
-                # Draw the square
-                pygame.draw.rect(screen, color,
-                               (x, y, self.square_size, self.square_size))
-
-                # Draw piece if present
                 piece = board_state.get_piece(row, col)
-                if piece:
-                    self.draw_piece(screen, piece, x, y, row, col)
+                piece_key = (piece.color, piece.type) if piece else None
 
-                # Draw move indicator circle for possible moves
+                # Move indicator circle for possible moves: False = normal, True = loses material
+                loses_material = None
                 if (row, col) in highlighted_moves:
-                    self.draw_move_indicator(screen, x, y)
-
-                # Draw hanging piece indicator if enabled
-                if self.is_help_option_enabled("hanging_pieces") and piece:
-                    hanging_pieces = board_state.get_hanging_pieces(piece.color)
-                    if (row, col) in hanging_pieces:
-                        # Determine player color based on board orientation
-                        # Player = pieces on bottom (white when not flipped, black when flipped)
-                        player_color = Color.BLACK if is_board_flipped else Color.WHITE
-                        is_player_piece = (piece.color == player_color)
-                        self.draw_hanging_piece_indicator(screen, x, y, is_player_piece)
-        
+                    verdict = move_verdicts.get((selected_square_coords, (row, col)))
+                    loses_material = verdict is not None and verdict.loses_material
+
+                hanging_color = hanging_piece_colors.get((row, col))
+                is_player_hanging = None if hanging_color is None else hanging_color == player_color
+
+                mate = None
+                if (row, col) in mate_targets:
+                    mate_color, mate_in = mate_targets[(row, col)]
+                    mate = (mate_in, mate_color == player_color)
+
+                # The checkmated king changes once more when its rotation finishes
+                king_rotated = (piece is not None and (row, col) == self.checkmate_king_position and
+                                not self._is_checkmate_animation_running())
+
+                states.append((piece_key, color, loses_material, is_player_hanging, mate, king_rotated))
+        return states
+
+    def _get_square_rect(self, row: int, col: int, is_board_flipped: bool) -> pygame.Rect:
+        """Screen rectangle of a board square"""
+        display_row = (7 - row) if is_board_flipped else row
+        display_col = (7 - col) if is_board_flipped else col
+        return pygame.Rect(self.board_margin_x + display_col * self.square_size,
+                           self.board_margin_y + display_row * self.square_size,
+                           self.square_size, self.square_size)
+
+    def _draw_square(self, screen, board_state: BoardState, row: int, col: int, state: tuple,
+                     is_board_flipped: bool) -> pygame.Rect:
+        """Draw one square with its piece and annotations; returns the square's rectangle"""
+        _, color, loses_material, is_player_hanging, mate, _ = state
+        rect = self._get_square_rect(row, col, is_board_flipped)
+        pygame.draw.rect(screen, color, rect)
+
+        piece = board_state.get_piece(row, col)
+        if piece:
+            self.draw_piece(screen, piece, rect.x, rect.y, row, col)
+        if loses_material is not None:
+            self.draw_move_indicator(screen, rect.x, rect.y, loses_material)
+        if is_player_hanging is not None:
+            self.draw_hanging_piece_indicator(screen, rect.x, rect.y, is_player_hanging)
+        if mate is not None:
+            self.draw_mate_threat_indicator(screen, rect.x, rect.y, *mate)
+        return rect
+
+    def draw_board(self, screen, board_state: BoardState, selected_square_coords: Optional[Tuple[int, int]] = None,
+                   highlighted_moves: List[Tuple[int, int]] = None, is_board_flipped: bool = False,
+                   annotations: Optional[Dict[str, Any]] = None) -> None:
+        """Draw the chess board with pieces and any background analysis annotations"""
+        if highlighted_moves is None:
+            highlighted_moves = []
+
+        # Draw the board squares
+        states = self._get_square_states(board_state, selected_square_coords, highlighted_moves,
+                                         is_board_flipped, annotations)
+        for square, state in enumerate(states):
+            self._draw_square(screen, board_state, square >> 3, square & 7, state, is_board_flipped)
+
+        # Draw tactic lines on top of the pieces
+        if annotations and annotations.get("tactics"):
+            self.draw_tactics(screen, annotations["tactics"], is_board_flipped)
+
         # Draw board border (use actual board size based on squares)
         actual_board_size = self.square_size * 8
         border_rect = pygame.Rect(self.board_margin_x - 2, self.board_margin_y - 2,
@@ -364,7 +482,6 @@ class ChessDisplay:
             piece.type == PieceType.KING and
             (board_row, board_col) == self.checkmate_king_position):
 
-            import time
             elapsed_time = time.time() - self.checkmate_animation_start_time
             self.draw_rotating_king(screen, piece, x, y, elapsed_time)
             return
@@ -513,8 +630,16 @@ class ChessDisplay:
             self.draw_text(screen, move_text, history_x, history_y + 30 + i * line_height, self.font_small)
     
     def update_display(self, screen, board_state: BoardState, selected_square_coords: Optional[Tuple[int, int]] = None,
-                      highlighted_moves: List[Tuple[int, int]] = None, is_board_flipped: bool = False) -> None:
-        """Update the entire display"""
+                      highlighted_moves: List[Tuple[int, int]] = None, is_board_flipped: bool = False,
+                      annotations: Optional[Dict[str, Any]] = None) -> List[pygame.Rect]:
+        """Redraw what changed since the last frame and return the dirty screen rectangles.
+
+        Squares are compared by what they show (piece, highlight, move dot and
+        annotations), so a hover, selection or move redraws only the squares it
+        touches. Flipping the board, toggling a helper, the stalemate overlay, the
+        checkmate animation and the first frame after the promotion dialog redraw
+        the whole window.
+        """
         # Check for checkmate and start animation if needed
         if board_state.is_in_checkmate and self.checkmate_animation_start_time is None:
             self.start_checkmate_animation(board_state)
@@ -523,18 +648,55 @@ class ChessDisplay:
             self.checkmate_animation_start_time = None
             self.checkmate_king_position = None
 
-        # Clear screen
-        screen.fill(self.RGB_WHITE)
+        if highlighted_moves is None:
+            highlighted_moves = []
+        square_states = self._get_square_states(board_state, selected_square_coords, highlighted_moves,
+                                                is_board_flipped, annotations)
+        tactics = annotations.get("tactics") if annotations else None
+        tactic_lines = self._get_tactic_lines(tactics, is_board_flipped) if tactics else []
+        layout = (is_board_flipped, tuple(option["enabled"] for option in self.help_options),
+                  board_state.is_in_stalemate)
+
+        if (layout != self._drawn_layout or self._drawn_square_states is None or board_state.is_in_stalemate or
+                self._is_checkmate_animation_running()):
+            # Clear screen and draw all components
+            screen.fill(self.RGB_WHITE)
+            self.draw_board(screen, board_state, selected_square_coords, highlighted_moves, is_board_flipped,
+                            annotations)
+            self.draw_help_panel(screen)
+
+            # Draw stalemate overlay if needed
+            if board_state.is_in_stalemate:
+                self.draw_stalemate_overlay(screen)
+            dirty_rects = [screen.get_rect()]
+        else:
+            if tactic_lines != self._drawn_tactic_lines:
+                # Tactic lines cross many squares: when they change, all squares are redrawn
+                for square, state in enumerate(square_states):
+                    self._draw_square(screen, board_state, square >> 3, square & 7, state, is_board_flipped)
+                for squares, is_player_tactic in tactic_lines:
+                    self.draw_tactic_line(screen, squares, is_player_tactic, is_board_flipped)
+                dirty_rects = [pygame.Rect(self.board_margin_x, self.board_margin_y,
+                                           self.square_size * 8, self.square_size * 8)]
+            else:
+                dirty_rects = [self._draw_square(screen, board_state, square >> 3, square & 7, state,
+                                                 is_board_flipped)
+                               for square, state in enumerate(square_states)
+                               if state != self._drawn_square_states[square]]
 
-        # Draw all components
-        self.draw_board(screen, board_state, selected_square_coords, highlighted_moves, is_board_flipped)
-        self.draw_help_panel(screen)
+                # Put back the parts of the tactic lines that pass through redrawn squares
+                for rect in dirty_rects:
+                    screen.set_clip(rect)
+                    for squares, is_player_tactic in tactic_lines:
+                        self.draw_tactic_line(screen, squares, is_player_tactic, is_board_flipped)
+                screen.set_clip(None)
 
-        # Draw stalemate overlay if needed
-        if board_state.is_in_stalemate:
-            self.draw_stalemate_overlay(screen)
+        self._drawn_layout = layout
+        self._drawn_square_states = square_states
+        self._drawn_tactic_lines = tactic_lines
 
-        # Note: pygame.display.flip() is called in the main loop, not here
+        # Note: the main loop presents the returned rectangles with pygame.display.update()
+        return dirty_rects
 
     def draw_stalemate_overlay(self, screen) -> None:
         """Draw a semi-transparent stalemate message overlay with rubber stamp effect"""
@@ -644,6 +806,9 @@ class ChessDisplay:
 
         pygame.display.flip()
 
+        # The overlay covers the whole window, so the next frame must redraw everything
+        self._drawn_square_states = None
+
         # Wait for user selection
         while True:
             for event in pygame.event.get():
@@ -1,9 +1,12 @@
 import pygame
 import sys
+import time
 from chess_board import BoardState
 from display import ChessDisplay
-from config import GameConfig, Colors
+from config import GameConfig, GameConstants, Colors
+from pgn import game_from_board, read_games, replay, write_game
 from sound_manager import get_sound_manager
+from analysis_worker import AnalysisWorker
 
 # Initialize Pygame
 pygame.init()
@@ -27,10 +30,17 @@ sound_manager = get_sound_manager()
 
 # Create global board state in starting position
 board_state = BoardState()
+game_tags = {"Event": "Testy game", "Date": time.strftime("%Y.%m.%d")}  # PGN tags for saving
 
 # Create display object
 display = ChessDisplay(WINDOW_WIDTH, WINDOW_HEIGHT)
 
+# Background analysis keeps tactical helpers off the rendering thread
+analysis_worker = AnalysisWorker()
+analysis_worker.start()
+analyzed_position_key = None  # Zobrist key of the last position submitted for analysis
+previewed_selection = None  # (position key, selected square) whose move previews were submitted
+
 # Button properties using config values
 button_width = int(WINDOW_WIDTH * GameConfig.BUTTON_WIDTH_PERCENTAGE)
 button_height = int(WINDOW_HEIGHT * GameConfig.BUTTON_HEIGHT_PERCENTAGE)
@@ -98,6 +108,37 @@ while is_running:
             elif event.key == pygame.K_h:  # H key to toggle hanging pieces
                 display.toggle_help_option("hanging_pieces")
                 needs_redraw = True
+            elif event.key == pygame.K_m:  # M key to toggle mate threats
+                display.toggle_help_option("mate_threats")
+                needs_redraw = True
+            elif event.key == pygame.K_b:  # B key to toggle blunder check
+                display.toggle_help_option("move_verdicts")
+                needs_redraw = True
+            elif event.key == pygame.K_k:  # K key to toggle forks
+                display.toggle_help_option("forks")
+                needs_redraw = True
+            elif event.key == pygame.K_p:  # P key to toggle pins and skewers
+                display.toggle_help_option("pins_skewers")
+                needs_redraw = True
+            elif event.key == pygame.K_s:  # S key to save the game as PGN
+                try:
+                    with open(GameConstants.SAVED_GAME_FILE, "w", encoding="utf-8") as pgn_file:
+                        write_game(pgn_file, game_from_board(board_state, game_tags))
+                except OSError:
+                    sound_manager.play_error_sound()
+            elif event.key == pygame.K_l:  # L key to load the saved game
+                try:
+                    with open(GameConstants.SAVED_GAME_FILE, "r", encoding="utf-8") as pgn_file:
+                        loaded_game = next(read_games(pgn_file))
+                    board_state = replay(loaded_game)
+                except (OSError, ValueError, StopIteration):
+                    sound_manager.play_error_sound()
+                else:
+                    game_tags = loaded_game.tags
+                    # Clear any current selection
+                    selected_square_coords = None
+                    highlighted_moves = []
+                    needs_redraw = True
         elif event.type == pygame.MOUSEBUTTONDOWN:
             mouse_pos = pygame.mouse.get_pos()
             
@@ -124,8 +165,8 @@ while is_running:
                             piece = board_state.get_piece(square[0], square[1])
                             if piece and piece.color == board_state.current_turn:
                                 selected_square_coords = square
-                                # Calculate possible moves for the selected piece
-                                highlighted_moves = board_state.get_possible_moves(square[0], square[1])
+                                # Possible moves for the selected piece (from the analysis cache when ready)
+                                highlighted_moves = analysis_worker.get_legal_moves(board_state, square)
                                 # Reset hover state since highlighted_moves changed
                                 last_hovered_square = None
                                 last_hover_was_legal = False
@@ -175,12 +216,30 @@ while is_running:
                                 piece = board_state.get_piece(square[0], square[1])
                                 if piece and piece.color == board_state.current_turn:
                                     selected_square_coords = square
-                                    highlighted_moves = board_state.get_possible_moves(square[0], square[1])
+                                    highlighted_moves = analysis_worker.get_legal_moves(board_state, square)
                                     # Reset hover state since highlighted_moves changed
                                     last_hovered_square = None
                                     last_hover_was_legal = False
                                     needs_redraw = True
     
+    # Submit the position for analysis whenever it changes (moves, undo, redo)
+    if board_state.zobrist_key != analyzed_position_key:
+        analyzed_position_key = board_state.zobrist_key
+        analysis_worker.submit(board_state)
+
+    # Precompute "what if" previews for every legal move of the selected piece
+    current_selection = (board_state.zobrist_key, selected_square_coords) if selected_square_coords else None
+    if current_selection != previewed_selection:
+        previewed_selection = current_selection
+        if selected_square_coords:
+            analysis_worker.submit_previews(board_state, selected_square_coords, highlighted_moves)
+        else:
+            analysis_worker.clear_previews()
+
+    # Redraw when fresh annotations arrive from the worker
+    if analysis_worker.poll():
+        needs_redraw = True
+
     # Check for smart hover detection (only redraw when entering/leaving legal move squares)
     current_mouse_pos = pygame.mouse.get_pos()
 
@@ -216,7 +275,17 @@ while is_running:
     # Only redraw if something changed
     if needs_redraw:
         # Draw the chess board (with flip consideration)
-        display.update_display(screen, board_state, selected_square_coords, highlighted_moves, is_board_flipped)
+        # Show the hovered move's preview instead of the current position's annotations
+        annotations = analysis_worker.get_annotations(board_state)
+        if selected_square_coords and last_hover_was_legal:
+            preview = analysis_worker.get_preview(selected_square_coords, last_hovered_square)
+            if preview is not None:
+                # Move verdicts describe the selected piece's moves, so they stay visible while previewing
+                current_verdicts = annotations.get("move_verdicts") if annotations else None
+                annotations = dict(preview, move_verdicts=current_verdicts)
+
+        dirty_rects = display.update_display(screen, board_state, selected_square_coords, highlighted_moves,
+                                             is_board_flipped, annotations)
 
         # Draw flip button
         button_color = Colors.BUTTON_HOVER_COLOR if flip_button_rect.collidepoint(current_mouse_pos) else Colors.BUTTON_BACKGROUND_COLOR
@@ -229,13 +298,14 @@ while is_running:
         text_rect = text_surface.get_rect(center=flip_button_rect.center)
         screen.blit(text_surface, text_rect)
 
-        # Update the display
-        pygame.display.flip()
+        # Present only the changed squares (and the small flip button) instead of flipping the whole window
+        pygame.display.update(dirty_rects + [flip_button_rect])
         needs_redraw = False
 
     # Much lower CPU usage - only check for events frequently
     clock.tick(30)  # Reduced from 60 FPS to 30 FPS
 
-# Quit Pygame
+# Stop background analysis and quit Pygame
+analysis_worker.stop()
 pygame.quit()
 sys.exit()
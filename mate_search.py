@@ -0,0 +1,278 @@
+"""
+Mate Search Module
+
+Finds forced mates (mate in 1, 2 or 3 moves) for either side of a
+position. The search is a negamax alpha-beta over push()/pop() with mate
+scores measured from the root, so the shortest mate is preferred. Moves
+that give check are tried first, only checking moves are considered on the
+attacker's final move (nothing else can mate), and a transposition table
+keyed by the Zobrist hash shares work between move orders and between the
+iterations of the mate-in-1, 2, 3 deepening loop.
+
+Every search runs under a SearchBudget (node count and wall-clock limit) so
+the GUI can ask for an answer within one frame; when the budget runs out
+the deepest completed result is returned with complete=False.
+
+With a Syzygy tablebase, endgame positions where a side cannot win are cut
+off at once: nobody can force mate from a drawn position, and the losing
+side never can.
+"""
+
+import copy
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from chess_board import BoardState, Color, Move, PieceType
+from tablebase import Tablebase, WDL_CURSED_WIN, WDL_LOSS, WDL_WIN
+
+# Scores within MAX_MATE_PLIES of MATE_SCORE are mates; MATE_SCORE - n means mate in n plies
+MATE_SCORE = 100_000
+MAX_MATE_PLIES = 64
+
+# Transposition table bound types
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+# Identity of a move across positions: from square, to square, promotion
+MoveKey = Tuple[Tuple[int, int], Tuple[int, int], Optional[PieceType]]
+
+class SearchAborted(Exception):
+    """Raised inside a search when its budget runs out"""
+    pass
+
+class SearchBudget:
+    """Node and time limits for a search (None means unlimited), plus an optional cancel callback"""
+
+    def __init__(self, node_limit: Optional[int] = None, time_limit_ms: Optional[float] = None,
+                 is_cancelled: Optional[Callable[[], bool]] = None):
+        self.node_limit = node_limit
+        self.deadline = time.perf_counter() + time_limit_ms / 1000.0 if time_limit_ms is not None else None
+        self.is_cancelled = is_cancelled
+        self.nodes = 0
+
+    def visit(self) -> None:
+        """Count a node, raising SearchAborted once the budget is spent"""
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            raise SearchAborted()
+        # Checked on every node: a node costs far more than perf_counter(), and
+        # checking less often let searches overrun a one-frame budget by a lot
+        if self.expired():
+            raise SearchAborted()
+
+    def expired(self) -> bool:
+        """Has the deadline passed or the search been cancelled? (no node is counted)"""
+        return ((self.deadline is not None and time.perf_counter() > self.deadline) or
+                (self.is_cancelled is not None and self.is_cancelled()))
+
+@dataclass
+class TTEntry:
+    """Transposition table entry"""
+    depth: int
+    score: int
+    bound: int
+    best_move: Optional[MoveKey] = None  # (from, to, promotion) of the best move found
+
+@dataclass
+class MateResult:
+    """Outcome of a mate search for one side"""
+    color: Color
+    mate_in: Optional[int] = None  # Moves by the attacking side, None if no mate was found
+    moves: List[Move] = field(default_factory=list)  # Principal variation starting with the mating move
+    nodes: int = 0
+    complete: bool = True  # False if the budget ran out before every depth was searched
+
+    @property
+    def first_move(self) -> Optional[Move]:
+        """The move that starts the mate, if one was found"""
+        return self.moves[0] if self.moves else None
+
+class MateSearch:
+    """Mate-in-N solver with a persistent transposition table"""
+
+    def __init__(self, table_size: int = 200_000, tablebase: Optional[Tablebase] = None):
+        """Create a solver; the table is cleared when it grows past table_size entries"""
+        self.table_size = table_size
+        self.tablebase = tablebase
+        self.table: Dict[int, TTEntry] = {}
+        self._budget: Optional[SearchBudget] = None
+
+    def clear(self) -> None:
+        """Forget all transposition table entries"""
+        self.table.clear()
+
+    def find_mate(self, board: BoardState, max_moves: int = 3, color: Optional[Color] = None,
+                  node_limit: Optional[int] = None, time_limit_ms: Optional[float] = None,
+                  is_cancelled: Optional[Callable[[], bool]] = None) -> MateResult:
+        """Search for the shortest forced mate by color (default: the side to move) within max_moves.
+
+        For the side not to move this answers "what does the opponent threaten": the
+        position is searched as if it were their turn. The board is left unchanged.
+        """
+        if color is None:
+            color = board.current_turn
+        result = MateResult(color)
+
+        if color != board.current_turn:
+            if board.is_check:
+                return result  # Passing the move while in check is not a legal position
+            board = _with_side_to_move(board, color)
+
+        self._budget = SearchBudget(node_limit, time_limit_ms, is_cancelled)
+        try:
+            for mate_in in range(1, max_moves + 1):
+                plies = 2 * mate_in - 1
+                # Only ask whether a mate this short exists: scores above alpha are mates within plies
+                score = self._negamax(board, plies, 0, MATE_SCORE - plies - 1, MATE_SCORE)
+                if score >= MATE_SCORE - plies:
+                    result.mate_in = (MATE_SCORE - score + 1) // 2
+                    result.moves = self._principal_variation(board, MATE_SCORE - score)
+                    break
+        except SearchAborted:
+            result.complete = False
+        finally:
+            result.nodes = self._budget.nodes
+            self._budget = None
+        return result
+
+    def _negamax(self, board: BoardState, depth: int, ply: int, alpha: int, beta: int) -> int:
+        """Score from the side to move's view: MATE_SCORE - n for mate in n plies, 0 otherwise"""
+        self._budget.visit()
+
+        if self.tablebase is not None and self.tablebase.covers(board):
+            # A short forced mate is always a real win, so anything less rules mates out
+            wdl = self.tablebase.probe_wdl(board)
+            if wdl is not None and (abs(wdl) <= WDL_CURSED_WIN or
+                                    (wdl == WDL_WIN and beta <= 0) or (wdl == WDL_LOSS and alpha >= 0)):
+                return 0
+
+        key = board.zobrist_key
+        entry = self.table.get(key)
+        tt_move = None
+        if entry is not None:
+            tt_move = entry.best_move
+            if entry.depth >= depth:
+                score = _score_from_table(entry.score, ply)
+                if (entry.bound == EXACT or
+                        (entry.bound == LOWER_BOUND and score >= beta) or
+                        (entry.bound == UPPER_BOUND and score <= alpha)):
+                    return score
+
+        moves = board.generate_legal_moves()
+        if not moves:
+            return -(MATE_SCORE - ply) if board.is_check else 0
+        if depth <= 0:
+            return 0  # No mate within the horizon
+
+        # A mate can never be shorter than the next ply; stop if that cannot beat alpha
+        if MATE_SCORE - ply - 1 <= alpha:
+            return alpha
+
+        original_alpha = alpha
+        best_score = -MATE_SCORE
+        best_move = None
+        for move, gives_check in self._ordered_moves(board, moves, tt_move):
+            # On the last ply only a checking move can deliver mate
+            if depth == 1 and not gives_check:
+                best_score = max(best_score, 0)
+                continue
+
+            board.push(move)
+            try:
+                score = -self._negamax(board, depth - 1, ply + 1, -beta, -alpha)
+            finally:
+                board.pop()
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+
+        if best_score <= original_alpha:
+            bound = UPPER_BOUND
+        elif best_score >= beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        self._store(key, depth, _score_to_table(best_score, ply), bound, best_move)
+        return best_score
+
+    def _ordered_moves(self, board: BoardState, moves: List[Move],
+                       tt_move: Optional[MoveKey]) -> List[Tuple[Move, bool]]:
+        """Order moves: table move, then checks, then captures and promotions, then the rest"""
+        scored = []
+        for move in moves:
+            gives_check = board.gives_check(move)
+            if tt_move is not None and _move_key(move) == tt_move:
+                priority = 0
+            elif gives_check:
+                priority = 1
+            elif move.captured_piece or move.promotion:
+                priority = 2
+            else:
+                priority = 3
+            scored.append((priority, move, gives_check))
+
+        scored.sort(key=lambda item: item[0])
+        return [(move, gives_check) for _, move, gives_check in scored]
+
+    def _store(self, key: int, depth: int, score: int, bound: int, best_move: Optional[Move]) -> None:
+        """Save a search result, keeping deeper entries for the same position"""
+        entry = self.table.get(key)
+        if entry is not None and entry.depth > depth:
+            return
+        if len(self.table) >= self.table_size:
+            self.table.clear()
+        self.table[key] = TTEntry(depth, score, bound, _move_key(best_move) if best_move else None)
+
+    def _principal_variation(self, board: BoardState, plies: int) -> List[Move]:
+        """Follow table moves from the root to recover the mating line"""
+        line = []
+        for _ in range(plies):
+            entry = self.table.get(board.zobrist_key)
+            if entry is None or entry.best_move is None:
+                break
+            move = next((m for m in board.generate_legal_moves() if _move_key(m) == entry.best_move), None)
+            if move is None:
+                break
+            board.push(move)
+            line.append(move)
+        for _ in line:
+            board.pop()
+        return line
+
+def _move_key(move: Move) -> MoveKey:
+    """Identity of a move for the transposition table (cheaper than building its uci() string)"""
+    return move.from_square, move.to_square, move.promotion
+
+def _score_to_table(score: int, ply: int) -> int:
+    """Store mate scores relative to the node rather than the root"""
+    if score >= MATE_SCORE - MAX_MATE_PLIES:
+        return score + ply
+    if score <= -(MATE_SCORE - MAX_MATE_PLIES):
+        return score - ply
+    return score
+
+def _score_from_table(score: int, ply: int) -> int:
+    """Convert a stored mate score back to a distance from the root"""
+    if score >= MATE_SCORE - MAX_MATE_PLIES:
+        return score - ply
+    if score <= -(MATE_SCORE - MAX_MATE_PLIES):
+        return score + ply
+    return score
+
+def _with_side_to_move(board: BoardState, color: Color) -> BoardState:
+    """Copy of the position with the given side to move (no en passant square)"""
+    grid = [[copy.copy(board.board[row][col]) for col in range(8)] for row in range(8)]
+    return BoardState.from_position(grid, color, copy.copy(board.castling_rights), None,
+                                    board.halfmove_clock, board.fullmove_number)
+
+def find_mate(board: BoardState, max_moves: int = 3, color: Optional[Color] = None,
+              node_limit: Optional[int] = None, time_limit_ms: Optional[float] = None,
+              is_cancelled: Optional[Callable[[], bool]] = None,
+              tablebase: Optional[Tablebase] = None) -> MateResult:
+    """Search for a forced mate with a fresh solver (see MateSearch.find_mate)"""
+    return MateSearch(tablebase=tablebase).find_mate(board, max_moves, color, node_limit, time_limit_ms, is_cancelled)
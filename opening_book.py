@@ -0,0 +1,153 @@
+"""
+Opening Book Module
+
+Reads opening books in the Polyglot .bin format, so analysis can skip
+positions that are known theory. A book is a file of 16-byte entries
+(position key, move, weight, learn data; all big-endian) sorted by key.
+The file is memory-mapped and the entries for a position are found with a
+binary search, so opening even a large book is instant and costs almost no
+memory.
+
+Polyglot keys are Zobrist hashes over a fixed, published table of 781
+64-bit numbers ("Random64"), bundled in polyglot_random. A different
+table can be loaded from a text file with one number per line.
+"""
+
+import mmap
+from dataclasses import dataclass
+from struct import Struct
+from typing import List, Optional, Sequence, Tuple
+
+from chess_board import BoardState, Color, Move, PieceType, square_name
+from polyglot_random import RANDOM64
+
+ENTRY = Struct(">QHHI")  # Key, move, weight, learn
+KEY = Struct(">Q")
+RANDOM_TABLE_SIZE = 781
+
+# Offsets into the Random64 table
+POLYGLOT_PIECE_KINDS = {PieceType.PAWN: 0, PieceType.KNIGHT: 1, PieceType.BISHOP: 2,
+                        PieceType.ROOK: 3, PieceType.QUEEN: 4, PieceType.KING: 5}
+CASTLING_OFFSET = 768    # White kingside, white queenside, black kingside, black queenside
+EN_PASSANT_OFFSET = 772  # One per file
+TURN_OFFSET = 780        # Added when white is to move
+
+PROMOTION_CODES = {1: PieceType.KNIGHT, 2: PieceType.BISHOP, 3: PieceType.ROOK, 4: PieceType.QUEEN}
+
+# Castling is stored as the king capturing its own rook
+CASTLING_MOVES = {"e1h1": "e1g1", "e1a1": "e1c1", "e8h8": "e8g8", "e8a8": "e8c8"}
+
+@dataclass(frozen=True)
+class BookEntry:
+    """A book move for a position"""
+    uci: str      # Move in coordinate notation, castling as the king's two-square move
+    weight: int   # Relative frequency or quality of the move
+    learn: int = 0
+
+def load_random_table(path: Optional[str] = None) -> Tuple[int, ...]:
+    """Get the 781 Polyglot Random64 numbers: the bundled table, or a file with one
+    number per line (decimal or 0x hex). Raises ValueError for a file of the wrong size."""
+    if not path:
+        return RANDOM64
+    with open(path, "r", encoding="utf-8") as stream:
+        numbers = tuple(int(token, 0) for token in stream.read().split())
+    if len(numbers) != RANDOM_TABLE_SIZE:
+        raise ValueError(f"{path} has {len(numbers)} numbers, Polyglot needs {RANDOM_TABLE_SIZE}")
+    return numbers
+
+def polyglot_key(board: BoardState, random_table: Sequence[int]) -> int:
+    """Polyglot hash of a position"""
+    key = 0
+    for row in range(8):
+        for col in range(8):
+            piece = board.board[row][col]
+            if piece:
+                kind = 2 * POLYGLOT_PIECE_KINDS[piece.type] + (1 if piece.color == Color.WHITE else 0)
+                key ^= random_table[64 * kind + 8 * (7 - row) + col]
+
+    rights = board.castling_rights
+    for index, allowed in enumerate((rights.white_kingside, rights.white_queenside,
+                                     rights.black_kingside, rights.black_queenside)):
+        if allowed:
+            key ^= random_table[CASTLING_OFFSET + index]
+
+    # The en passant file only counts if a pawn of the side to move could capture there
+    if board.en_passant_target:
+        target_row, target_col = board.en_passant_target
+        pawn_row = target_row + (1 if board.current_turn == Color.WHITE else -1)
+        for col in (target_col - 1, target_col + 1):
+            piece = board.board[pawn_row][col] if 0 <= col < 8 else None
+            if piece and piece.type == PieceType.PAWN and piece.color == board.current_turn:
+                key ^= random_table[EN_PASSANT_OFFSET + target_col]
+                break
+
+    if board.current_turn == Color.WHITE:
+        key ^= random_table[TURN_OFFSET]
+    return key
+
+def decode_move(code: int) -> str:
+    """Polyglot move bits to coordinate notation (castling is still king-takes-rook)"""
+    to_file, to_rank = code & 7, (code >> 3) & 7
+    from_file, from_rank = (code >> 6) & 7, (code >> 9) & 7
+    promotion = PROMOTION_CODES.get((code >> 12) & 7)
+    uci = f"{square_name(7 - from_rank, from_file)}{square_name(7 - to_rank, to_file)}"
+    return uci + promotion.value.lower() if promotion else uci
+
+class OpeningBook:
+    """A memory-mapped Polyglot book"""
+
+    def __init__(self, path: str, random_table: Optional[Sequence[int]] = None):
+        """Open a book; the Random64 table comes from load_random_table() unless given"""
+        self.path = path
+        self.random_table = tuple(random_table) if random_table is not None else load_random_table()
+        if len(self.random_table) != RANDOM_TABLE_SIZE:
+            raise ValueError(f"Polyglot needs {RANDOM_TABLE_SIZE} random numbers")
+        self._file = open(path, "rb")
+        size = self._file.seek(0, 2)
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self.count = size // ENTRY.size
+
+    def entries(self, board: BoardState) -> List[BookEntry]:
+        """Book entries for a position, highest weight first"""
+        key = polyglot_key(board, self.random_table)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if KEY.unpack_from(self._map, middle * ENTRY.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        king = board.get_king_position(board.current_turn)
+        king_on_home_square = king is not None and square_name(*king) in ("e1", "e8")
+        entries = []
+        while low < self.count:
+            entry_key, code, weight, learn = ENTRY.unpack_from(self._map, low * ENTRY.size)
+            if entry_key != key:
+                break
+            uci = decode_move(code)
+            if king_on_home_square and uci[:2] == square_name(*king):
+                uci = CASTLING_MOVES.get(uci, uci)
+            entries.append(BookEntry(uci, weight, learn))
+            low += 1
+        entries.sort(key=lambda entry: entry.weight, reverse=True)
+        return entries
+
+    def moves(self, board: BoardState) -> List[Move]:
+        """Legal moves that are in the book for a position, highest weight first"""
+        legal_moves = {move.uci(): move for move in board.generate_legal_moves()}
+        return [legal_moves[entry.uci] for entry in self.entries(board) if entry.uci in legal_moves]
+
+    def __contains__(self, board: BoardState) -> bool:
+        return bool(self.entries(board))
+
+    def close(self) -> None:
+        if self._map:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "OpeningBook":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,160 @@
+"""
+Perft Benchmark Module
+
+Perft ("performance test") walks the legal move tree to a fixed depth and
+counts the leaf nodes. Comparing the counts against published reference
+values verifies the move generator (castling, en passant, promotion, pins,
+checks), and timing the walk measures generator throughput in nodes per
+second so regressions can be caught between releases.
+
+Usage:
+    python perft.py                              # Run the reference suite
+    python perft.py --max-nodes 0                # Run every depth in the suite
+    python perft.py --fen "<fen>" --depth 3      # Count one position
+    python perft.py --depth 3 --divide           # Per-move breakdown of the start position
+"""
+
+import argparse
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from chess_board import BoardState
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# Reference positions with known leaf counts: (name, fen, {depth: nodes})
+REFERENCE_POSITIONS: List[Tuple[str, str, Dict[int, int]]] = [
+    ("Start position", START_FEN,
+     {1: 20, 2: 400, 3: 8902, 4: 197281}),
+    ("Kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     {1: 48, 2: 2039, 3: 97862}),
+    ("Position 3 (en passant pins)", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     {1: 14, 2: 191, 3: 2812, 4: 43238, 5: 674624}),
+    ("Position 4 (promotions)", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     {1: 6, 2: 264, 3: 9467, 4: 422333}),
+    ("Position 5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     {1: 44, 2: 1486, 3: 62379}),
+    ("Position 6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     {1: 46, 2: 2079, 3: 89890}),
+    ("Illegal en passant (pinned on rank)", "3k4/3p4/8/K1P4r/8/8/8/8 b - - 0 1",
+     {6: 1134888}),
+    ("Illegal en passant (pinned on diagonal)", "8/8/4k3/8/2p5/8/B2P2K1/8 w - - 0 1",
+     {6: 1015133}),
+    ("En passant capture gives check", "8/8/1k6/2b5/2pP4/8/5K2/8 b - d3 0 1",
+     {6: 1440467}),
+    ("Short castling gives check", "5k2/8/8/8/8/8/8/4K2R w K - 0 1",
+     {6: 661072}),
+    ("Long castling gives check", "3k4/8/8/8/8/8/8/R3K3 w Q - 0 1",
+     {6: 803711}),
+    ("Castling rights", "r3k2r/1b4bq/8/8/8/8/7B/R3K2R w KQkq - 0 1",
+     {4: 1274206}),
+    ("Castling prevented", "r3k2r/8/3Q4/8/8/5q2/8/R3K2R b KQkq - 0 1",
+     {4: 1720476}),
+    ("Promote out of check", "2K2r2/4P3/8/8/8/8/8/3k4 w - - 0 1",
+     {6: 3821001}),
+    ("Discovered check", "8/8/1P2K3/8/2n5/1q6/8/5k2 b - - 0 1",
+     {5: 1004658}),
+    ("Promote to give check", "4k3/1P6/8/8/8/8/K7/8 w - - 0 1",
+     {6: 217342}),
+    ("Underpromote to give check", "8/P1k5/K7/8/8/8/8/8 w - - 0 1",
+     {6: 92683}),
+    ("Self stalemate", "K1k5/8/P7/8/8/8/8/8 w - - 0 1",
+     {6: 2217}),
+    ("Stalemate and checkmate", "8/k1P5/8/1K6/8/8/8/8 w - - 0 1",
+     {7: 567584}),
+    ("Stalemate and checkmate 2", "8/8/2k5/5q2/5n2/8/5K2/8 b - - 0 1",
+     {4: 23527}),
+]
+
+def perft(board: BoardState, depth: int) -> int:
+    """Count the leaf nodes of the legal move tree to the given depth"""
+    if depth <= 0:
+        return 1
+
+    moves = board.generate_legal_moves()
+    if depth == 1:
+        return len(moves)  # Bulk counting: leaves need no make/unmake
+
+    nodes = 0
+    for move in moves:
+        board.push(move)
+        nodes += perft(board, depth - 1)
+        board.pop()
+    return nodes
+
+def divide(board: BoardState, depth: int) -> Dict[str, int]:
+    """Count leaf nodes below each root move (keyed by coordinate notation)"""
+    counts = {}
+    for move in board.generate_legal_moves():
+        board.push(move)
+        counts[move.uci()] = perft(board, depth - 1)
+        board.pop()
+    return counts
+
+def timed_perft(board: BoardState, depth: int) -> Tuple[int, float]:
+    """Run perft and return (nodes, elapsed seconds)"""
+    start_time = time.perf_counter()
+    nodes = perft(board, depth)
+    return nodes, time.perf_counter() - start_time
+
+def _format_rate(nodes: int, elapsed: float) -> str:
+    """Format a nodes-per-second figure"""
+    rate = nodes / elapsed if elapsed > 0 else float("inf")
+    return f"{rate:,.0f} nps"
+
+def run_suite(max_nodes: Optional[int] = 100_000) -> bool:
+    """Run the reference suite, skipping counts above max_nodes. Returns True if all pass."""
+    all_passed = True
+    total_nodes = 0
+    total_time = 0.0
+
+    for name, fen, expected_counts in REFERENCE_POSITIONS:
+        for depth, expected in sorted(expected_counts.items()):
+            if max_nodes and expected > max_nodes:
+                continue
+            nodes, elapsed = timed_perft(BoardState.from_fen(fen), depth)
+            total_nodes += nodes
+            total_time += elapsed
+            status = "ok" if nodes == expected else f"FAIL (expected {expected:,})"
+            if nodes != expected:
+                all_passed = False
+            print(f"{name:<40} depth {depth}: {nodes:>10,} {status:<24} "
+                  f"{elapsed:7.2f}s {_format_rate(nodes, elapsed)}")
+
+    print(f"\nTotal: {total_nodes:,} nodes in {total_time:.2f}s ({_format_rate(total_nodes, total_time)})")
+    print("All counts match" if all_passed else "MISMATCHES FOUND")
+    return all_passed
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Perft move generator benchmark and correctness suite")
+    parser.add_argument("--fen", help="position to count (default: run the reference suite)")
+    parser.add_argument("--depth", type=int, help="search depth for --fen or --divide")
+    parser.add_argument("--divide", action="store_true", help="print the node count below each root move")
+    parser.add_argument("--max-nodes", type=int, default=100_000,
+                        help="skip suite entries with more nodes than this (0 runs everything)")
+    args = parser.parse_args(argv)
+
+    if args.fen is None and args.depth is None:
+        return 0 if run_suite(args.max_nodes) else 1
+
+    board = BoardState.from_fen(args.fen or START_FEN)
+    depth = args.depth or 1
+
+    if args.divide:
+        start_time = time.perf_counter()
+        counts = divide(board, depth)
+        elapsed = time.perf_counter() - start_time
+        for move_text, count in sorted(counts.items()):
+            print(f"{move_text}: {count:,}")
+        nodes = sum(counts.values())
+        print(f"\nMoves: {len(counts)}")
+    else:
+        nodes, elapsed = timed_perft(board, depth)
+
+    print(f"Nodes: {nodes:,}  Time: {elapsed:.2f}s  ({_format_rate(nodes, elapsed)})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
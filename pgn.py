@@ -0,0 +1,294 @@
+"""
+PGN Module
+
+Reading and writing games in Portable Game Notation. The reader is a
+generator that yields one game at a time, so collections of any size are
+streamed rather than loaded. It keeps the tags, the main line in SAN and
+the comments on it; variations, NAGs and move numbers are skipped. Games
+are replayed through BoardState, and the writer serializes a board's
+move_history back to SAN movetext.
+
+PgnFile adds random access to games in a file on disk: the first pass over
+the file records the byte offset where every game starts, so loading game
+N afterwards is a seek and a single game parse rather than a rescan.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from chess_board import BoardState, Color, GamePhase, PieceType
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+SEVEN_TAG_ROSTER = ("Event", "Site", "Date", "Round", "White", "Black", "Result")
+SETUP_TAGS = ("SetUp", "FEN")  # Written together, only for games with a custom start position
+RESULT_TOKENS = ("1-0", "0-1", "1/2-1/2", "*")
+MAX_LINE_LENGTH = 80  # Movetext line width recommended by the PGN standard
+
+_TAG_PATTERN = re.compile(r'^\[(\w+)\s+"((?:[^"\\]|\\.)*)"\]\s*$')
+_MOVE_NUMBER_PATTERN = re.compile(r"^\d+\.+")
+
+@dataclass
+class PgnGame:
+    """Tags, main-line SAN moves and comments of one game"""
+    tags: Dict[str, str] = field(default_factory=dict)
+    moves: List[str] = field(default_factory=list)
+    comments: Dict[int, str] = field(default_factory=dict)  # Comment after this many moves (0 = before the first)
+    result: str = "*"
+
+    @property
+    def start_fen(self) -> str:
+        """FEN of the starting position (from the FEN tag, or the standard start)"""
+        return self.tags.get("FEN", START_FEN)
+
+def _iter_games(lines: Iterable[Tuple[int, str]]) -> Iterator[Tuple[int, PgnGame]]:
+    """Parse (byte offset, line) pairs into (offset of the game's first line, game) pairs"""
+    game = PgnGame()
+    game_offset: Optional[int] = None
+    in_movetext = False
+    in_comment = False     # Inside a {...} comment spanning lines
+    variation_depth = 0    # Inside (...) variations
+    comment_parts: List[str] = []
+
+    def add_comment(text: str) -> None:
+        text = " ".join(text.split())
+        if text and not variation_depth:
+            ply = len(game.moves)
+            game.comments[ply] = f"{game.comments[ply]} {text}" if ply in game.comments else text
+
+    for offset, line in lines:
+        stripped = line.strip()
+        if not in_comment and not variation_depth:
+            if not stripped or line.startswith("%"):
+                continue  # Blank or escaped line
+            if game_offset is None:
+                game_offset = offset
+            tag_match = _TAG_PATTERN.match(stripped)
+            if tag_match:
+                if in_movetext:
+                    # A tag after movetext without a result starts the next game
+                    yield game_offset, game
+                    game = PgnGame()
+                    game_offset = offset
+                    in_movetext = False
+                game.tags[tag_match.group(1)] = re.sub(r"\\(.)", r"\1", tag_match.group(2))
+                continue
+
+        position = 0
+        while position < len(stripped):
+            char = stripped[position]
+            if in_comment:
+                end = stripped.find("}", position)
+                if end < 0:
+                    comment_parts.append(stripped[position:])
+                    break
+                comment_parts.append(stripped[position:end])
+                add_comment(" ".join(comment_parts))
+                in_comment = False
+                position = end + 1
+                continue
+            if char == "{":
+                in_comment = True
+                comment_parts = []
+                position += 1
+                continue
+            if char == ";":
+                add_comment(stripped[position + 1:])
+                break  # Rest-of-line comment
+            if char == "(":
+                variation_depth += 1
+                position += 1
+                continue
+            if char == ")":
+                variation_depth = max(0, variation_depth - 1)
+                position += 1
+                continue
+            if char.isspace():
+                position += 1
+                continue
+
+            # Read one token up to whitespace or a delimiter
+            end = position
+            while end < len(stripped) and not stripped[end].isspace() and stripped[end] not in "{}();":
+                end += 1
+            token = stripped[position:end]
+            position = end
+            if variation_depth:
+                continue
+
+            in_movetext = True
+            token = _MOVE_NUMBER_PATTERN.sub("", token)
+            if not token or token.startswith("$"):
+                continue
+            if token in RESULT_TOKENS:
+                game.result = token
+                yield game_offset, game
+                game = PgnGame()
+                game_offset = None
+                in_movetext = False
+                continue
+            game.moves.append(token)
+
+    if in_movetext or game.tags or game.moves:
+        yield game_offset or 0, game
+
+def read_games(stream: TextIO) -> Iterator[PgnGame]:
+    """Stream the games in PGN text one at a time"""
+    for _, game in _iter_games((0, line) for line in stream):
+        yield game
+
+def replay(game: PgnGame) -> BoardState:
+    """Play a game's moves from its starting position; raises ValueError for an illegal move"""
+    board = BoardState.from_fen(game.start_fen)
+    for ply, san in enumerate(game.moves, start=1):
+        try:
+            move = board.parse_san(san)
+        except ValueError as error:
+            raise ValueError(f"{error} at ply {ply}") from None
+        board.make_move_with_promotion(*move.from_square, *move.to_square, move.promotion or PieceType.QUEEN)
+    return board
+
+def game_result(board: BoardState) -> str:
+    """PGN result token for the position a game has reached"""
+    if board.is_in_checkmate:
+        return "0-1" if board.current_turn == Color.WHITE else "1-0"
+    if board.is_in_stalemate or board.game_phase == GamePhase.DRAW:
+        return "1/2-1/2"
+    return "*"
+
+def game_from_board(board: BoardState, tags: Optional[Dict[str, str]] = None) -> PgnGame:
+    """Build a PgnGame from a board's move_history (SAN is regenerated from the start position).
+
+    The result comes from the board, or from a Result tag while the game is unfinished.
+    """
+    game = PgnGame(tags={name: value for name, value in (tags or {}).items() if name not in SETUP_TAGS},
+                   result=game_result(board))
+    if game.result == "*":
+        game.result = game.tags.get("Result", "*")
+    if board.start_fen != START_FEN:
+        game.tags["SetUp"] = "1"
+        game.tags["FEN"] = board.start_fen
+
+    replay_board = BoardState.from_fen(board.start_fen)
+    for move in board.move_history:
+        own_move = replay_board.create_move(*move.from_square, *move.to_square, move.promotion)
+        game.moves.append(replay_board.move_to_san(own_move))
+        replay_board.push(own_move)
+    return game
+
+def format_game(game: PgnGame) -> str:
+    """PGN text for one game: the seven tag roster, other tags, then wrapped movetext.
+
+    SetUp and FEN come last, SetUp right before FEN, and only for a game that
+    does not start from the standard position.
+    """
+    tags = {name: value for name, value in game.tags.items() if name not in SETUP_TAGS}
+    tags["Result"] = game.result
+    if game.start_fen != START_FEN:
+        tags["SetUp"] = "1"
+        tags["FEN"] = game.start_fen
+    lines = []
+    for name in SEVEN_TAG_ROSTER + tuple(name for name in tags if name not in SEVEN_TAG_ROSTER):
+        value = tags.get(name, "?").replace("\\", "\\\\").replace('"', '\\"')
+        lines.append(f'[{name} "{value}"]')
+    lines.append("")
+
+    fen_fields = game.start_fen.split()
+    white_to_move = len(fen_fields) < 2 or fen_fields[1] == "w"
+    move_number = int(fen_fields[5]) if len(fen_fields) >= 6 else 1
+    tokens = []
+    if 0 in game.comments:
+        tokens.append(f"{{{game.comments[0]}}}")
+    for ply, san in enumerate(game.moves):
+        # Black's moves get a number only at the start or after a comment
+        if white_to_move:
+            tokens.append(f"{move_number}.")
+        elif ply == 0 or ply in game.comments:
+            tokens.append(f"{move_number}...")
+        tokens.append(san)
+        if ply + 1 in game.comments:
+            tokens.append(f"{{{game.comments[ply + 1]}}}")
+        if not white_to_move:
+            move_number += 1
+        white_to_move = not white_to_move
+    tokens.append(game.result)
+
+    line = ""
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > MAX_LINE_LENGTH:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    lines.append(line)
+    return "\n".join(lines) + "\n"
+
+def write_game(stream: TextIO, game: PgnGame) -> None:
+    """Append one game to a PGN stream (followed by the separating blank line)"""
+    stream.write(format_game(game) + "\n")
+
+class PgnFile:
+    """A PGN file on disk with streaming iteration and random access by game number"""
+
+    def __init__(self, path: str, encoding: str = "utf-8"):
+        self.path = path
+        self.encoding = encoding
+        self.offsets: List[int] = []  # Byte offset of each game found so far
+        self.is_fully_indexed = False
+
+    def _scan(self, start: int) -> Iterator[Tuple[int, PgnGame]]:
+        """Parse games from a byte offset onwards, yielding (offset, game)"""
+        with open(self.path, "rb") as stream:
+            stream.seek(start)
+            yield from _iter_games(self._lines(stream, start))
+
+    def _lines(self, stream: BinaryIO, offset: int) -> Iterator[Tuple[int, str]]:
+        """Decoded lines with their byte offsets"""
+        for raw_line in stream:
+            yield offset, raw_line.decode(self.encoding, errors="replace")
+            offset += len(raw_line)
+
+    def _record(self, number: int, offset: int) -> None:
+        """Remember where game number starts (games are found in order)"""
+        if number == len(self.offsets):
+            self.offsets.append(offset)
+
+    def _scan_from_index(self) -> Iterator[Tuple[int, PgnGame]]:
+        """Continue the scan from the last indexed game, yielding (number, game)"""
+        first = max(len(self.offsets) - 1, 0)
+        start = self.offsets[first] if self.offsets else 0
+        for number, (offset, game) in enumerate(self._scan(start), start=first):
+            self._record(number, offset)
+            yield number, game
+        self.is_fully_indexed = True
+
+    def __iter__(self) -> Iterator[PgnGame]:
+        """Stream every game from the start, indexing offsets along the way"""
+        for number, (offset, game) in enumerate(self._scan(0)):
+            self._record(number, offset)
+            yield game
+        self.is_fully_indexed = True
+
+    def build_index(self) -> int:
+        """Index the rest of the file; returns the number of games"""
+        if not self.is_fully_indexed:
+            for _ in self._scan_from_index():
+                pass
+        return len(self.offsets)
+
+    def game(self, number: int) -> PgnGame:
+        """Load game number (0-based): a seek if it is indexed, otherwise the scan continues to it"""
+        if number < 0:
+            raise IndexError("Game numbers start at 0")
+        if number >= len(self.offsets) and not self.is_fully_indexed:
+            for found, game in self._scan_from_index():
+                if found == number:
+                    return game
+        if number >= len(self.offsets):
+            raise IndexError(f"{self.path} has only {len(self.offsets)} games")
+        for _, game in self._scan(self.offsets[number]):
+            return game
+        raise IndexError(f"No game at offset {self.offsets[number]}")
+
+    def __len__(self) -> int:
+        return self.build_index()
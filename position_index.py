@@ -0,0 +1,300 @@
+"""
+Position Index Module
+
+An on-disk index from position to the games and plies where it occurred,
+for questions like "have I seen this position before, and what did I play
+there?" across a whole archive without loading it into memory.
+
+The key is the board's Zobrist key, which covers the same fields as
+get_fen_position() apart from the move clocks and is stable between runs
+(the key tables are built from a fixed seed). Each occurrence is a 16-byte
+record (key, game id, ply, flags) and records are stored sorted by key in
+segment files inside the index directory. Segments are memory-mapped and
+searched with a binary search, so a lookup touches a few pages and resident
+memory stays small however big the archive grows.
+
+Adding games is incremental: records are buffered and each flush() writes a
+new sorted segment, and compact() merges all segments into one with a
+streaming merge. A sources.json manifest maps game ids back to the PGN file
+and game number they came from (see pgn.PgnFile for loading them).
+
+Usage:
+    python position_index.py build archive.pgn --index games.idx
+    python position_index.py build archive.pgn --index games.idx --annotations annotations.jsonl
+    python position_index.py query --index games.idx --fen "<fen>"
+"""
+
+import argparse
+import heapq
+import json
+import mmap
+import os
+import sys
+from dataclasses import dataclass
+from struct import Struct
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from chess_board import BoardState
+from pgn import PgnFile, PgnGame
+
+RECORD = Struct("<QIHH")  # Zobrist key, game id, ply, flags
+KEY = Struct("<Q")
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".idx"
+SOURCES_FILE = "sources.json"
+DEFAULT_BUFFER_RECORDS = 1_000_000  # About 16 MB of records before a segment is written
+
+# Record flags
+FLAG_LOST_MATERIAL = 1  # The move played from this position lost material (from the batch analyzer)
+
+@dataclass(frozen=True)
+class PositionHit:
+    """One occurrence of a position: the position after ply moves of a game"""
+    game_id: int
+    ply: int
+    flags: int = 0
+
+    @property
+    def lost_material(self) -> bool:
+        """Did the move played from this position lose material?"""
+        return bool(self.flags & FLAG_LOST_MATERIAL)
+
+class _Segment:
+    """One sorted, memory-mapped record file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.count = len(self._map) // RECORD.size
+
+    def _key_at(self, index: int) -> int:
+        return KEY.unpack_from(self._map, index * RECORD.size)[0]
+
+    def lookup(self, key: int) -> Iterator[PositionHit]:
+        """Records for a key: binary search for the first one, then read forwards"""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        while low < self.count:
+            record_key, game_id, ply, flags = RECORD.unpack_from(self._map, low * RECORD.size)
+            if record_key != key:
+                break
+            yield PositionHit(game_id, ply, flags)
+            low += 1
+
+    def records(self) -> Iterator[Tuple[int, int, int, int]]:
+        """All records in key order"""
+        for index in range(self.count):
+            yield RECORD.unpack_from(self._map, index * RECORD.size)
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+class PositionIndex:
+    """Directory of sorted record segments mapping position keys to game plies"""
+
+    def __init__(self, directory: str, buffer_records: int = DEFAULT_BUFFER_RECORDS):
+        """Open (or create) the index in directory"""
+        self.directory = directory
+        self.buffer_records = buffer_records
+        os.makedirs(directory, exist_ok=True)
+        self._buffer: List[Tuple[int, int, int, int]] = []
+        self._segments = [_Segment(os.path.join(directory, name)) for name in self._segment_names()]
+        self.sources = self._load_sources()
+
+    def _segment_names(self) -> List[str]:
+        return sorted(name for name in os.listdir(self.directory)
+                      if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX))
+
+    def _load_sources(self) -> List[dict]:
+        path = os.path.join(self.directory, SOURCES_FILE)
+        if not os.path.exists(path):
+            return []
+        with open(path, "r", encoding="utf-8") as stream:
+            return json.load(stream)
+
+    def _save_sources(self) -> None:
+        path = os.path.join(self.directory, SOURCES_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as stream:
+            json.dump(self.sources, stream, indent=2)
+        os.replace(path + ".tmp", path)
+
+    @property
+    def next_game_id(self) -> int:
+        """First game id not used by any recorded source"""
+        return max((source["first_game_id"] + source["games"] for source in self.sources), default=0)
+
+    def add_position(self, key: int, game_id: int, ply: int, flags: int = 0) -> None:
+        """Buffer one occurrence; it becomes searchable after the next flush()"""
+        self._buffer.append((key, game_id, ply, flags))
+        if len(self._buffer) >= self.buffer_records:
+            self.flush()
+
+    def add_game(self, game: PgnGame, game_id: int, lost_material_plies: Iterable[int] = ()) -> int:
+        """Index every position of a game (ply 0 is the start); returns the positions added.
+
+        lost_material_plies are the plies whose move lost material (1 = the first move),
+        flagged on the position the move was played from. Replay stops at an illegal move.
+        """
+        lost = set(lost_material_plies)
+        board = BoardState.from_fen(game.start_fen)
+        self.add_position(board.zobrist_key, game_id, 0, FLAG_LOST_MATERIAL if 1 in lost else 0)
+        for ply, san in enumerate(game.moves, start=1):
+            try:
+                board.push(board.parse_san(san))
+            except ValueError:
+                return ply
+            self.add_position(board.zobrist_key, game_id, ply, FLAG_LOST_MATERIAL if ply + 1 in lost else 0)
+        return len(game.moves) + 1
+
+    def add_source(self, path: str, first_game_id: int, games: int) -> None:
+        """Record which PGN file a range of game ids came from"""
+        self.sources.append({"path": os.path.abspath(path), "first_game_id": first_game_id, "games": games})
+        self._save_sources()
+
+    def _next_segment_path(self) -> str:
+        names = self._segment_names()
+        number = int(names[-1][len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]) + 1 if names else 1
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}")
+
+    def _write_segment(self, records: Iterable[Tuple[int, int, int, int]]) -> Optional[_Segment]:
+        """Write sorted records as a new segment (atomically); None if there were none"""
+        path = self._next_segment_path()
+        count = 0
+        with open(path + ".tmp", "wb") as stream:
+            for record in records:
+                stream.write(RECORD.pack(*record))
+                count += 1
+        if not count:
+            os.remove(path + ".tmp")
+            return None
+        os.replace(path + ".tmp", path)
+        return _Segment(path)
+
+    def flush(self) -> None:
+        """Write buffered records as a new sorted segment"""
+        if not self._buffer:
+            return
+        self._buffer.sort()
+        segment = self._write_segment(self._buffer)
+        self._buffer = []
+        if segment:
+            self._segments.append(segment)
+
+    def compact(self) -> None:
+        """Merge all segments into one (a streaming merge, so memory stays flat)"""
+        self.flush()
+        if len(self._segments) < 2:
+            return
+        old_segments = self._segments
+        merged = self._write_segment(heapq.merge(*(segment.records() for segment in old_segments)))
+        for segment in old_segments:
+            segment.close()
+            os.remove(segment.path)
+        self._segments = [merged] if merged else []
+
+    def lookup(self, key: int) -> List[PositionHit]:
+        """Every recorded occurrence of a position key, ordered by game id and ply"""
+        hits = [hit for segment in self._segments for hit in segment.lookup(key)]
+        hits.sort(key=lambda hit: (hit.game_id, hit.ply))
+        return hits
+
+    def lookup_board(self, board: BoardState) -> List[PositionHit]:
+        """Every recorded occurrence of a board's position"""
+        return self.lookup(board.zobrist_key)
+
+    def source_of(self, game_id: int) -> Optional[Tuple[str, int]]:
+        """(PGN path, game number within it) for a game id, if known"""
+        for source in self.sources:
+            if source["first_game_id"] <= game_id < source["first_game_id"] + source["games"]:
+                return source["path"], game_id - source["first_game_id"]
+        return None
+
+    def __len__(self) -> int:
+        """Number of searchable records"""
+        return sum(segment.count for segment in self._segments)
+
+    def close(self) -> None:
+        """Flush buffered records and release the memory maps"""
+        self.flush()
+        for segment in self._segments:
+            segment.close()
+        self._segments = []
+
+    def __enter__(self) -> "PositionIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+def _lost_material_plies(annotations_path: Optional[str]) -> Iterator[List[int]]:
+    """Per game, the plies the batch analyzer marked as losing material (empty lists without a file)"""
+    if not annotations_path:
+        while True:
+            yield []
+    with open(annotations_path, "r", encoding="utf-8") as stream:
+        for line in stream:
+            record = json.loads(line)
+            yield [ply["ply"] for ply in record["plies"] if ply["loses_material"]]
+    while True:
+        yield []
+
+def _build(args) -> int:
+    """Add PGN files to the index"""
+    with PositionIndex(args.index) as index:
+        lost_plies = _lost_material_plies(args.annotations)
+        for path in args.inputs:
+            first_game_id = index.next_game_id
+            games = 0
+            positions = 0
+            for game in PgnFile(path):
+                positions += index.add_game(game, first_game_id + games, next(lost_plies))
+                games += 1
+            index.add_source(path, first_game_id, games)
+            print(f"{path}: {games} games, {positions} positions", file=sys.stderr)
+        if args.compact:
+            index.compact()
+        index.flush()
+        print(f"Index holds {len(index)} positions", file=sys.stderr)
+    return 0
+
+def _query(args) -> int:
+    """Print the games and plies where a position occurred"""
+    with PositionIndex(args.index) as index:
+        hits = index.lookup_board(BoardState.from_fen(args.fen))
+        for hit in hits:
+            source = index.source_of(hit.game_id)
+            where = f"{source[0]} game {source[1]}" if source else f"game id {hit.game_id}"
+            note = " (move played lost material)" if hit.lost_material else ""
+            print(f"{where}, ply {hit.ply}{note}")
+        print(f"{len(hits)} occurrences", file=sys.stderr)
+    return 0
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Build and query Testy's position index")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="add PGN files to the index")
+    build.add_argument("inputs", nargs="+", help="PGN files")
+    build.add_argument("--index", required=True, help="index directory")
+    build.add_argument("--annotations", help="batch_analyzer JSONL for the same games, to flag lost material")
+    build.add_argument("--compact", action="store_true", help="merge all segments afterwards")
+    build.set_defaults(handler=_build)
+
+    query = commands.add_parser("query", help="find where a position occurred")
+    query.add_argument("--index", required=True, help="index directory")
+    query.add_argument("--fen", required=True, help="position to look up")
+    query.set_defaults(handler=_query)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Position Snapshot Module
+
+A compact, immutable encoding of a chess position for caches and for
+sending positions to worker threads or processes. A snapshot holds only
+what defines the position (pieces, side to move, castling rights, en
+passant square and clocks) in a 38-byte string, so hashing, comparing and
+pickling it is cheap compared with a full BoardState, which carries undo
+stacks, move history and analysis caches.
+
+Layout:
+    bytes 0-31   piece placement, two squares per byte (4-bit piece codes)
+    byte  32     flags: bit 0 black to move, bits 1-4 castling rights K, Q, k, q
+    byte  33     en passant square index (row * 8 + col), 255 if none
+    bytes 34-35  halfmove clock (little-endian)
+    bytes 36-37  fullmove number (little-endian)
+"""
+
+import struct
+from typing import List, Optional, Tuple
+
+from chess_board import BoardState, CastlingRights, Color, Piece, PieceType
+
+SNAPSHOT_SIZE = 38
+_NO_EN_PASSANT = 255
+_STATE_FORMAT = "<BBHH"
+
+# 4-bit piece codes: 0 is empty, white pieces 1-6, black pieces 9-14 (bit 3 marks black)
+_PIECE_CODES = {PieceType.PAWN: 1, PieceType.KNIGHT: 2, PieceType.BISHOP: 3,
+                PieceType.ROOK: 4, PieceType.QUEEN: 5, PieceType.KING: 6}
+_CODE_PIECES = {code: piece_type for piece_type, code in _PIECE_CODES.items()}
+_BLACK_FLAG = 8
+
+class PositionSnapshot:
+    """Immutable, hashable 38-byte encoding of a position"""
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: bytes):
+        """Wrap an encoded snapshot (use from_board() to create one from a BoardState)"""
+        if len(data) != SNAPSHOT_SIZE:
+            raise ValueError(f"Snapshot data must be {SNAPSHOT_SIZE} bytes, got {len(data)}")
+        object.__setattr__(self, "_data", bytes(data))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PositionSnapshot is immutable")
+
+    @classmethod
+    def from_board(cls, board_state: BoardState) -> 'PositionSnapshot':
+        """Encode the current position of a BoardState"""
+        placement = bytearray(32)
+        for square in range(64):
+            piece = board_state.board[square >> 3][square & 7]
+            if piece:
+                code = _PIECE_CODES[piece.type] | (_BLACK_FLAG if piece.color == Color.BLACK else 0)
+                # Even squares use the low nibble, odd squares the high nibble
+                placement[square >> 1] |= code << (4 * (square & 1))
+
+        rights = board_state.castling_rights
+        flags = (
+            (1 if board_state.current_turn == Color.BLACK else 0) |
+            (2 if rights.white_kingside else 0) |
+            (4 if rights.white_queenside else 0) |
+            (8 if rights.black_kingside else 0) |
+            (16 if rights.black_queenside else 0)
+        )
+        if board_state.en_passant_target:
+            ep_row, ep_col = board_state.en_passant_target
+            en_passant = ep_row * 8 + ep_col
+        else:
+            en_passant = _NO_EN_PASSANT
+
+        state = struct.pack(_STATE_FORMAT, flags, en_passant,
+                            min(board_state.halfmove_clock, 0xFFFF),
+                            min(board_state.fullmove_number, 0xFFFF))
+        return cls(bytes(placement) + state)
+
+    def to_board(self) -> BoardState:
+        """Decode into a new BoardState (with empty move history and undo stacks)"""
+        grid: List[List[Optional[Piece]]] = [[None for _ in range(8)] for _ in range(8)]
+        for square in range(64):
+            code = (self._data[square >> 1] >> (4 * (square & 1))) & 0xF
+            if code:
+                color = Color.BLACK if code & _BLACK_FLAG else Color.WHITE
+                grid[square >> 3][square & 7] = Piece(_CODE_PIECES[code & 7], color)
+
+        flags, en_passant, halfmove_clock, fullmove_number = self._unpack_state()
+        castling_rights = CastlingRights(bool(flags & 2), bool(flags & 4), bool(flags & 8), bool(flags & 16))
+        en_passant_target = None if en_passant == _NO_EN_PASSANT else (en_passant >> 3, en_passant & 7)
+
+        return BoardState.from_position(grid, Color.BLACK if flags & 1 else Color.WHITE,
+                                        castling_rights, en_passant_target,
+                                        halfmove_clock, fullmove_number)
+
+    def _unpack_state(self) -> Tuple[int, int, int, int]:
+        """Unpack (flags, en passant square, halfmove clock, fullmove number)"""
+        return struct.unpack_from(_STATE_FORMAT, self._data, 32)
+
+    @property
+    def data(self) -> bytes:
+        """The raw 38-byte encoding"""
+        return self._data
+
+    @property
+    def current_turn(self) -> Color:
+        """Side to move"""
+        return Color.BLACK if self._data[32] & 1 else Color.WHITE
+
+    def get_piece(self, row: int, col: int) -> Optional[Piece]:
+        """Decode the piece on one square (a new Piece object each call)"""
+        square = row * 8 + col
+        code = (self._data[square >> 1] >> (4 * (square & 1))) & 0xF
+        if not code:
+            return None
+        return Piece(_CODE_PIECES[code & 7], Color.BLACK if code & _BLACK_FLAG else Color.WHITE)
+
+    def __hash__(self) -> int:
+        return hash(self._data)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, PositionSnapshot):
+            return NotImplemented
+        return self._data == other._data
+
+    def __reduce__(self):
+        # Pickle as the raw bytes only
+        return (PositionSnapshot, (self._data,))
+
+    def __repr__(self) -> str:
+        return f"PositionSnapshot({self._data.hex()})"
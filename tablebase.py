@@ -0,0 +1,100 @@
+"""
+Tablebase Module
+
+Optional probing of local Syzygy endgame tablebases (.rtbw WDL files), so
+positions with few pieces get exact verdicts instead of a search. The file
+format is read through python-chess's chess.syzygy module, an optional
+dependency (pip install chess); when that package is not installed, or no
+table directories are configured, the tablebase is simply unavailable and
+every probe returns None, so callers can always ask.
+
+Probe results are cached by Zobrist key, which makes repeated probes of
+the same position inside a search a dictionary lookup; only a miss pays
+for converting the board to a python-chess position.
+"""
+
+import os
+from typing import Iterable, Optional
+
+from analysis_cache import AnalysisCache
+from chess_board import BoardState
+from config import AnalysisConfig
+
+try:
+    import chess
+    import chess.syzygy
+except ImportError:
+    chess = None
+
+# WDL values from the side to move's view
+WDL_LOSS, WDL_BLESSED_LOSS, WDL_DRAW, WDL_CURSED_WIN, WDL_WIN = -2, -1, 0, 1, 2
+
+class Tablebase:
+    """Syzygy tables from local directories, with cached WDL probes"""
+
+    def __init__(self, directories: Iterable[str] = (),
+                 cache_entries: int = AnalysisConfig.SYZYGY_PROBE_CACHE_ENTRIES):
+        """Load the tables found in directories (nothing is loaded without python-chess)"""
+        self.max_pieces = 0  # Most pieces covered by a loaded WDL table
+        self._tables = None
+        self._wdl_cache = AnalysisCache(cache_entries)
+
+        directories = [directory for directory in directories if os.path.isdir(directory)]
+        if not directories:
+            return
+        if chess is None:
+            print("Warning: Syzygy tables need python-chess (pip install chess); not probing")
+            return
+        self._tables = chess.syzygy.Tablebase()
+        for directory in directories:
+            self._tables.add_directory(directory)
+            for name in os.listdir(directory):
+                stem, extension = os.path.splitext(name)
+                if extension == ".rtbw":
+                    self.max_pieces = max(self.max_pieces, len(stem) - 1)  # Letters except the "v"
+
+    @property
+    def available(self) -> bool:
+        """Were any tables loaded?"""
+        return self.max_pieces > 0
+
+    def covers(self, board: BoardState) -> bool:
+        """Could the position be in the loaded tables (few enough pieces, no castling rights)?"""
+        rights = board.castling_rights
+        return (self.available and board.occupied.bit_count() <= self.max_pieces and
+                not (rights.white_kingside or rights.white_queenside or
+                     rights.black_kingside or rights.black_queenside))
+
+    def probe_wdl(self, board: BoardState) -> Optional[int]:
+        """Win/draw/loss for the side to move (WDL_LOSS..WDL_WIN), or None if not in the tables.
+
+        Positions missing from the tables are cached too.
+        """
+        if not self.covers(board):
+            return None
+        cached = self._wdl_cache.get(board.zobrist_key)
+        if cached is not None:
+            return cached[0]
+        try:
+            value = self._tables.probe_wdl(chess.Board(board.get_fen_position()))
+        except KeyError:  # MissingTableError, or a position the tables cannot hold
+            value = None
+        self._wdl_cache.put(board.zobrist_key, (value,))
+        return value
+
+    def close(self) -> None:
+        """Release the table files"""
+        if self._tables is not None:
+            self._tables.close()
+            self._tables = None
+            self.max_pieces = 0
+
+# Global tablebase instance
+_tablebase: Optional[Tablebase] = None
+
+def get_tablebase() -> Tablebase:
+    """Get the tablebase for the configured directories (unavailable if none are set)"""
+    global _tablebase
+    if _tablebase is None:
+        _tablebase = Tablebase(AnalysisConfig.SYZYGY_DIRECTORIES)
+    return _tablebase
@@ -0,0 +1,336 @@
+"""
+Tactical Search Module
+
+A shallow material-only search used for blunder detection. Every legal
+move of the side to move is scored by what it wins or loses in material
+once the tactics around it have played out: an iterative-deepening
+alpha-beta search behind each root move, a capture-only quiescence search
+at the horizon (so hanging pieces and exchanges are resolved), MVV-LVA
+ordering for captures and killer moves for quiet moves.
+
+Before searching, every root move gets a static verdict from the static
+exchange evaluation of the position it leads to. The search then runs
+against a hard millisecond deadline (SearchBudget from mate_search) and
+returns the scores of the deepest fully completed iteration. If the
+deadline hits before the first iteration completes, the root moves it did
+finish keep their search scores and the rest keep their static ones, so
+every move is judged even in sharp positions. The static pass itself
+watches the deadline too: moves it has no time left for are judged by the
+material they win on the spot.
+
+With a Syzygy tablebase, positions it covers are scored exactly (won, drawn
+or lost) and not searched further, so a move that throws away a won
+endgame is flagged even when it gives up no material.
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+from chess_board import BoardState, Color, Move, PIECE_VALUES, PieceType
+from mate_search import MATE_SCORE, MAX_MATE_PLIES, SearchAborted, SearchBudget
+from tablebase import Tablebase, WDL_LOSS, WDL_WIN
+
+MAX_KILLER_PLY = 64
+TABLEBASE_WIN_SCORE = 1000  # Score of a tablebase win (pawn units, above any material, below mates)
+
+# Piece types that count towards material (kings are never exchanged)
+MATERIAL_PIECE_TYPES = (PieceType.PAWN, PieceType.KNIGHT, PieceType.BISHOP, PieceType.ROOK, PieceType.QUEEN)
+
+@dataclass
+class MoveVerdict:
+    """Search result for one root move"""
+    move: Move
+    score: int     # Material balance for the mover after best play (pawn units, mates near MATE_SCORE)
+    loss: int = 0  # How much worse than the best alternative (a lower bound for refuted moves)
+
+    @property
+    def loses_material(self) -> bool:
+        """Does the move give away material compared with the best alternative?
+
+        A slower forced mate is not counted as a loss.
+        """
+        return self.loss > 0 and self.score < MATE_SCORE - MAX_MATE_PLIES
+
+@dataclass
+class TacticalResult:
+    """Verdicts for every legal move (best first) from the deepest completed iteration"""
+    verdicts: List[MoveVerdict] = field(default_factory=list)
+    depth: int = 0        # Plies searched before quiescence, counting the root move (0: static verdicts)
+    nodes: int = 0
+    complete: bool = True  # False if the deadline stopped the search before max_depth
+
+    @property
+    def best(self) -> Optional[MoveVerdict]:
+        """The best move's verdict (None if there are no legal moves)"""
+        return self.verdicts[0] if self.verdicts else None
+
+def material_balance(board: BoardState, color: Color) -> int:
+    """Material of color minus material of the opponent, in pawn units"""
+    opponent = Color.BLACK if color == Color.WHITE else Color.WHITE
+    balance = 0
+    for piece_type in MATERIAL_PIECE_TYPES:
+        value = PIECE_VALUES[piece_type]
+        balance += value * (board.piece_bitboards[(color, piece_type)].bit_count() -
+                            board.piece_bitboards[(opponent, piece_type)].bit_count())
+    return balance
+
+def _mvv_lva(move: Move) -> int:
+    """Capture ordering key: most valuable victim first, then least valuable attacker"""
+    score = 0
+    if move.captured_piece:
+        score += 10 * PIECE_VALUES[move.captured_piece.type] - PIECE_VALUES[move.piece.type]
+    if move.promotion:
+        score += 10 * PIECE_VALUES[move.promotion]
+    return score
+
+def _material_gain(move: Move) -> int:
+    """Material a move wins on the spot: the captured piece plus any promotion gain"""
+    gain = PIECE_VALUES[move.captured_piece.type] if move.captured_piece else 0
+    if move.promotion:
+        gain += PIECE_VALUES[move.promotion] - PIECE_VALUES[PieceType.PAWN]
+    return gain
+
+def _move_key(move: Move) -> Tuple[Tuple[int, int], Tuple[int, int], Optional[PieceType]]:
+    """Identity of a move across positions (for killer moves)"""
+    return move.from_square, move.to_square, move.promotion
+
+class TacticalSearch:
+    """Material-only iterative deepening search that scores every root move"""
+
+    def __init__(self, tablebase: Optional[Tablebase] = None):
+        self.tablebase = tablebase
+        self._budget: Optional[SearchBudget] = None
+        self._killers: List[List[tuple]] = []
+
+    def analyze(self, board: BoardState, time_limit_ms: Optional[float] = 50, max_depth: int = 4,
+                node_limit: Optional[int] = None,
+                is_cancelled: Optional[Callable[[], bool]] = None) -> TacticalResult:
+        """Score every legal move of the side to move; the board is left unchanged"""
+        result = TacticalResult()
+        moves = board.generate_legal_moves()
+        if not moves:
+            return result
+
+        self._budget = SearchBudget(node_limit, time_limit_ms, is_cancelled)
+        self._killers = [[] for _ in range(MAX_KILLER_PLY)]
+        # Every move is judged statically before the search starts, and the first
+        # iteration searches the moves in that order
+        static_scores = self._static_scores(board, moves)
+        result.verdicts = [MoveVerdict(move, score) for score, move in static_scores]
+        moves = [move for _, move in static_scores]
+        scores: List[Tuple[int, Move]] = []
+        try:
+            for depth in range(1, max_depth + 1):
+                scores = []
+                best_score = -MATE_SCORE
+                for move in moves:
+                    # Moves only need to be compared with the best so far: anything that
+                    # cannot match it is refuted as soon as it is shown to lose material
+                    alpha = best_score - 1 if scores else -MATE_SCORE
+                    board.push(move)
+                    try:
+                        score = -self._negamax(board, depth - 1, 1, -MATE_SCORE, -alpha)
+                    finally:
+                        board.pop()
+                    scores.append((score, move))
+                    best_score = max(best_score, score)
+
+                # The iteration completed: it replaces the previous one
+                scores.sort(key=lambda item: item[0], reverse=True)
+                moves = [move for _, move in scores]
+                result.verdicts = [MoveVerdict(move, score) for score, move in scores]
+                result.depth = depth
+        except SearchAborted:
+            result.complete = False
+        finally:
+            result.nodes = self._budget.nodes
+            self._budget = None
+
+        if result.depth == 0 and scores:
+            # Not even the first iteration finished: the root moves it searched keep
+            # their search scores, the others their static ones
+            searched = {id(move): score for score, move in scores}
+            merged = [(searched.get(id(move), score), move) for score, move in static_scores]
+            merged.sort(key=lambda item: item[0], reverse=True)
+            result.verdicts = [MoveVerdict(move, score) for score, move in merged]
+
+        if result.verdicts:
+            best_score = result.verdicts[0].score
+            for verdict in result.verdicts:
+                verdict.loss = best_score - verdict.score
+        return result
+
+    def _static_scores(self, board: BoardState, moves: List[Move]) -> List[Tuple[int, Move]]:
+        """(score, move) for every move without searching, best first.
+
+        The score is the material after the move minus the most the opponent wins
+        by a static exchange on any of the mover's pieces (or the tablebase score).
+        Once the deadline has passed, the remaining moves only get the material
+        they win on the spot.
+        """
+        color = board.current_turn
+        balance = material_balance(board, color)
+        scores = []
+        for move in moves:
+            if self._budget.expired():
+                scores.append((balance + _material_gain(move), move))
+                continue
+            board.push(move)
+            try:
+                tablebase_score = self._tablebase_score(board, 1)
+                if tablebase_score is not None:
+                    score = -tablebase_score
+                else:
+                    threat = 0
+                    for (row, col), value in board.get_exchange_evaluations().items():
+                        if value > threat and board.board[row][col].color == color:
+                            threat = value
+                    score = material_balance(board, color) - threat
+            finally:
+                board.pop()
+            scores.append((score, move))
+        scores.sort(key=lambda item: item[0], reverse=True)
+        return scores
+
+    def _negamax(self, board: BoardState, depth: int, ply: int, alpha: int, beta: int) -> int:
+        """Alpha-beta score from the side to move's view"""
+        if depth <= 0:
+            return self._quiescence(board, ply, alpha, beta)
+        self._budget.visit()
+        tablebase_score = self._tablebase_score(board, ply)
+        if tablebase_score is not None:
+            return tablebase_score
+
+        moves = board.generate_legal_moves()
+        if not moves:
+            return -(MATE_SCORE - ply) if board.is_check else 0
+
+        # Fail-soft: the returned bound is as tight as the search found
+        best_score = -MATE_SCORE
+        for move in self._ordered_moves(moves, ply):
+            board.push(move)
+            try:
+                score = -self._negamax(board, depth - 1, ply + 1, -beta, -alpha)
+            finally:
+                board.pop()
+
+            if score > best_score:
+                best_score = score
+            if score >= beta:
+                if not move.captured_piece and not move.promotion:
+                    self._add_killer(move, ply)
+                return score
+            if score > alpha:
+                alpha = score
+        return best_score
+
+    def _quiescence(self, board: BoardState, ply: int, alpha: int, beta: int) -> int:
+        """Resolve captures (and check evasions) until the position is quiet"""
+        self._budget.visit()
+        tablebase_score = self._tablebase_score(board, ply)
+        if tablebase_score is not None:
+            return tablebase_score
+
+        if board.is_check:
+            # No standing pat in check: every evasion is searched
+            moves = board.generate_legal_moves()
+            if not moves:
+                return -(MATE_SCORE - ply)
+            best_score = -MATE_SCORE
+            candidates = self._ordered_moves(moves, ply)
+        else:
+            stand_pat = material_balance(board, board.current_turn)
+            if stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+            best_score = stand_pat
+            candidates = []
+            for move in board.generate_legal_moves(captures_only=True):
+                if self._is_futile_capture(board, move, stand_pat, alpha):
+                    # Not searched, but the fail-soft bound must still cover what it could reach
+                    best_score = max(best_score, stand_pat + _material_gain(move))
+                elif not self._is_losing_capture(board, move):
+                    candidates.append(move)
+            candidates.sort(key=_mvv_lva, reverse=True)
+
+        for move in candidates:
+            board.push(move)
+            try:
+                score = -self._quiescence(board, ply + 1, -beta, -alpha)
+            finally:
+                board.pop()
+
+            if score > best_score:
+                best_score = score
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return best_score
+
+    def _tablebase_score(self, board: BoardState, ply: int) -> Optional[int]:
+        """Exact score for a position in the tablebase (cursed wins and blessed losses are draws)"""
+        if self.tablebase is None or not self.tablebase.covers(board):
+            return None
+        wdl = self.tablebase.probe_wdl(board)
+        if wdl is None:
+            return None
+        if wdl == WDL_WIN:
+            return TABLEBASE_WIN_SCORE - ply
+        if wdl == WDL_LOSS:
+            return -(TABLEBASE_WIN_SCORE - ply)
+        return 0
+
+    def _is_futile_capture(self, board: BoardState, move: Move, stand_pat: int, alpha: int) -> bool:
+        """Can the capture not lift the stand-pat score above alpha even if it goes unanswered?
+
+        Material is the whole evaluation, so this is exact unless the capture gives
+        check (the opponent cannot stand pat) or reaches a tablebase position.
+        """
+        if self.tablebase is not None or stand_pat + _material_gain(move) > alpha:
+            return False
+        return not board.gives_check(move)
+
+    def _is_losing_capture(self, board: BoardState, move: Move) -> bool:
+        """Does a capture hand a more valuable piece to a defended target with no exchange gain?"""
+        if not move.captured_piece or PIECE_VALUES[move.captured_piece.type] >= PIECE_VALUES[move.piece.type]:
+            return False
+        to_row, to_col = move.to_square
+        defenders = board.attack_counts[move.captured_piece.color]
+        if not defenders[to_row * 8 + to_col]:
+            return False
+        return board.static_exchange_evaluation(to_row, to_col) <= 0
+
+    def _ordered_moves(self, moves: List[Move], ply: int) -> List[Move]:
+        """Captures and promotions by MVV-LVA, then killer moves, then the remaining quiet moves"""
+        killers = self._killers[ply] if ply < MAX_KILLER_PLY else []
+
+        def order_key(move: Move) -> int:
+            if move.captured_piece or move.promotion:
+                return 1000 + _mvv_lva(move)
+            if _move_key(move) in killers:
+                return 500
+            return 0
+
+        return sorted(moves, key=order_key, reverse=True)
+
+    def _add_killer(self, move: Move, ply: int) -> None:
+        """Remember a quiet move that caused a cutoff (two killers per ply)"""
+        if ply >= MAX_KILLER_PLY:
+            return
+        killers = self._killers[ply]
+        key = _move_key(move)
+        if key not in killers:
+            killers.insert(0, key)
+            del killers[2:]
+
+def analyze_moves(board: BoardState, time_limit_ms: Optional[float] = 50, max_depth: int = 4,
+                  node_limit: Optional[int] = None,
+                  is_cancelled: Optional[Callable[[], bool]] = None,
+                  tablebase: Optional[Tablebase] = None) -> TacticalResult:
+    """Score every legal move with a fresh search (see TacticalSearch.analyze)"""
+    return TacticalSearch(tablebase).analyze(board, time_limit_ms, max_depth, node_limit, is_cancelled)
+
+def is_mate_score(score: int) -> bool:
+    """Is the score a forced mate for either side?"""
+    return abs(score) >= MATE_SCORE - MAX_MATE_PLIES
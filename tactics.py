@@ -0,0 +1,108 @@
+"""
+Tactics Module
+
+Finds simple tactical patterns for both colors: forks (one piece attacking
+two or more targets that are worth more than it or undefended), pins
+(absolute when the piece behind is the king, relative otherwise) and
+skewers (a valuable piece in front of a lesser one on a slider's line, where
+both are worth attacking).
+
+Everything comes from a single sweep over the pieces. Each piece's attack
+bitboard gives its fork targets, and for sliders the same pass walks the
+precomputed rays to the first and second piece in each direction to
+classify pins and skewers. The result is a TacticsReport of plain
+dataclasses that ChessDisplay draws as lines on the board.
+"""
+
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+from chess_board import (BoardState, Color, PIECE_VALUES, PieceType, RAY_SQUARES,
+                         iter_bits, square_coords)
+
+# Ray directions each slider moves along (indices into RAY_SQUARES; 0-3 orthogonal, 4-7 diagonal)
+SLIDER_DIRECTIONS = {
+    PieceType.ROOK: range(0, 4),
+    PieceType.BISHOP: range(4, 8),
+    PieceType.QUEEN: range(0, 8),
+}
+
+@dataclass(frozen=True)
+class Fork:
+    """A piece attacking two or more valuable or undefended enemy pieces"""
+    color: Color                    # Color of the forking piece
+    attacker: Tuple[int, int]
+    targets: Tuple[Tuple[int, int], ...]
+
+@dataclass(frozen=True)
+class Pin:
+    """An enemy piece that cannot move off a slider's line without exposing the piece behind it"""
+    color: Color                    # Color of the pinning piece
+    attacker: Tuple[int, int]
+    pinned: Tuple[int, int]
+    behind: Tuple[int, int]
+    absolute: bool                  # The piece behind is the king, so moving off the line is illegal
+
+@dataclass(frozen=True)
+class Skewer:
+    """A valuable enemy piece attacked on a line with a lesser piece behind it"""
+    color: Color                    # Color of the skewering piece
+    attacker: Tuple[int, int]
+    front: Tuple[int, int]
+    behind: Tuple[int, int]
+
+@dataclass
+class TacticsReport:
+    """All forks, pins and skewers in a position"""
+    forks: List[Fork] = field(default_factory=list)
+    pins: List[Pin] = field(default_factory=list)
+    skewers: List[Skewer] = field(default_factory=list)
+
+def find_tactics(board: BoardState) -> TacticsReport:
+    """Find forks, pins and skewers for both colors in one pass over the pieces"""
+    report = TacticsReport()
+    grid = board.board
+
+    for square in iter_bits(board.occupied):
+        piece = grid[square >> 3][square & 7]
+        enemy_color = Color.BLACK if piece.color == Color.WHITE else Color.WHITE
+        attacker_value = PIECE_VALUES[piece.type]
+        defended = board.attack_counts[enemy_color]
+
+        # Forks: targets worth more than the attacker, undefended, or the king
+        targets = []
+        for target in iter_bits(board.attacks_from(piece, square) & board.color_bitboards[enemy_color]):
+            target_type = grid[target >> 3][target & 7].type
+            if (target_type == PieceType.KING or PIECE_VALUES[target_type] > attacker_value or
+                    not defended[target]):
+                targets.append(square_coords(target))
+        if len(targets) >= 2:
+            report.forks.append(Fork(piece.color, square_coords(square), tuple(targets)))
+
+        # Pins and skewers: the first two pieces along each of a slider's rays
+        for direction in SLIDER_DIRECTIONS.get(piece.type, ()):
+            front = None
+            for target in RAY_SQUARES[square][direction]:
+                target_piece = grid[target >> 3][target & 7]
+                if target_piece is None:
+                    continue
+                if target_piece.color != enemy_color:
+                    break  # Own piece blocks the line
+                if front is None:
+                    front = target
+                    continue
+
+                # Second enemy piece on the line: compare it with the one in front
+                front_piece = grid[front >> 3][front & 7]
+                front_value = PIECE_VALUES[front_piece.type]
+                behind_value = PIECE_VALUES[target_piece.type]
+                if behind_value > front_value:
+                    report.pins.append(Pin(piece.color, square_coords(square), square_coords(front),
+                                           square_coords(target), target_piece.type == PieceType.KING))
+                elif (front_value > behind_value and (front_value > attacker_value or not defended[front]) and
+                      (behind_value >= attacker_value or not defended[target])):
+                    report.skewers.append(Skewer(piece.color, square_coords(square), square_coords(front),
+                                                 square_coords(target)))
+                break
+
+    return report
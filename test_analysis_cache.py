@@ -0,0 +1,39 @@
+"""Tests for the LRU analysis cache (run with pytest)"""
+
+import pytest
+
+from analysis_cache import AnalysisCache
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AnalysisCache(2)
+    cache.put(1, "a")
+    cache.put(2, "b")
+    assert cache.get(1) == "a"  # 2 is now the least recently used
+    cache.put(3, "c")
+    assert 2 not in cache and 1 in cache and 3 in cache
+    assert cache.stats() == {"hits": 1, "misses": 0, "evictions": 1, "entries": 2}
+
+def test_peek_changes_neither_recency_nor_counters():
+    cache = AnalysisCache(2)
+    cache.put(1, "a")
+    cache.put(2, "b")
+    assert cache.peek(1) == "a"
+    cache.put(3, "c")  # 1 was only peeked at, so it is still the oldest
+    assert 1 not in cache
+    assert cache.get(1) is None
+    assert cache.stats() == {"hits": 0, "misses": 1, "evictions": 1, "entries": 2}
+
+def test_put_refreshes_an_existing_key_and_clear_keeps_counters():
+    cache = AnalysisCache(2)
+    cache.put(1, "a")
+    cache.put(2, "b")
+    cache.put(1, "a2")
+    cache.put(3, "c")
+    assert cache.get(1) == "a2" and 2 not in cache
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats()["hits"] == 1 and cache.stats()["evictions"] == 1
+
+def test_cache_needs_room_for_an_entry():
+    with pytest.raises(ValueError):
+        AnalysisCache(0)
@@ -0,0 +1,53 @@
+"""Tests for the background analysis worker (run with pytest)"""
+
+import time
+
+from analysis_worker import AnalysisWorker
+from chess_board import BoardState
+
+def _wait_for(condition, timeout: float = 5.0) -> None:
+    """Poll until condition() holds (the worker runs on its own thread)"""
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        assert time.perf_counter() < deadline, "worker did not answer in time"
+        time.sleep(0.005)
+
+def _count_pieces(board, is_cancelled):
+    return board.occupied.bit_count()
+
+def _fail_on_start_position(board, is_cancelled):
+    if board.get_fen_position() == BoardState().get_fen_position():
+        raise RuntimeError("analyzer bug")
+    return "fine"
+
+def test_failing_analyzer_does_not_stop_the_worker():
+    worker = AnalysisWorker({"pieces": _count_pieces, "flaky": _fail_on_start_position}, {})
+    worker.start()
+    try:
+        board = BoardState()
+        worker.submit(board)
+        _wait_for(lambda: worker.poll() or worker.get_annotations(board) is not None)
+        assert worker.get_annotations(board) == {"pieces": 32, "flaky": None}
+
+        # The thread is still serving later positions
+        board.make_move(6, 4, 4, 4)
+        worker.submit(board)
+        _wait_for(lambda: worker.poll() or worker.get_annotations(board) is not None)
+        assert worker.get_annotations(board) == {"pieces": 32, "flaky": "fine"}
+    finally:
+        worker.stop()
+
+def test_previews_skip_bad_targets_and_keep_the_board_in_step():
+    worker = AnalysisWorker({}, {"pieces": _count_pieces, "fen": lambda board, _: board.get_fen_position()})
+    worker.start()
+    try:
+        board = BoardState()
+        # (4, 0) is empty, so a move from it cannot be built; (9, 9) is off the board
+        worker.submit_previews(board, (4, 0), [(3, 0)])
+        generation = worker.submit_previews(board, (6, 4), [(4, 4), (9, 9), (5, 4)])
+        _wait_for(lambda: worker.poll() is not None and len(worker.preview_cache) == 2)
+        assert worker.is_current_preview(generation)
+        assert worker.get_preview((6, 4), (9, 9)) is None
+        assert worker.get_preview((6, 4), (5, 4))["fen"].startswith("rnbqkbnr/pppppppp/8/8/8/4P3/PPPP1PPP/")
+    finally:
+        worker.stop()
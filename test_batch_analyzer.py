@@ -0,0 +1,64 @@
+"""Tests for the headless batch analyzer (run with pytest)"""
+
+import json
+import os
+
+import batch_analyzer
+from batch_analyzer import analyze_game, main
+from pgn import read_games
+from tactical_search import TacticalSearch
+
+PGN_TEXT = """[Event "Blunder"]
+[Result "1-0"]
+
+1. e4 e5 2. Nf3 Qg5 3. Nxg5 1-0
+
+[Event "Broken"]
+[Result "*"]
+
+1. e4 e5 2. Ke3 *
+"""
+
+def _games():
+    return list(read_games(iter(PGN_TEXT.splitlines(keepends=True))))
+
+def test_played_blunder_is_flagged():
+    record = analyze_game(_games()[0], TacticalSearch(), None, 2, node_limit=20_000)
+    assert [ply["san"] for ply in record["plies"]] == ["e4", "e5", "Nf3", "Qg5", "Nxg5"]
+    assert [ply["loses_material"] for ply in record["plies"]] == [False, False, False, True, False]
+    assert record["plies"][3]["loss"] >= 9
+    assert record["plies"][3]["hanging"]["black"] == ["g5"]
+
+def test_illegal_move_stops_the_game_with_an_error():
+    record = analyze_game(_games()[1], TacticalSearch(), None, 1, node_limit=1_000)
+    assert len(record["plies"]) == 2
+    assert record["error"].endswith("at ply 3")
+
+def test_command_line_writes_one_line_per_game(tmp_path):
+    pgn_path = tmp_path / "games.pgn"
+    pgn_path.write_text(PGN_TEXT, encoding="utf-8")
+    output = tmp_path / "out.jsonl"
+    assert main([str(pgn_path), "-o", str(output), "--nodes", "2000", "--max-depth", "1", "--quiet"]) == 0
+    records = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert [record["game"] for record in records] == [1, 2]
+    assert records[0]["tags"]["Event"] == "Blunder"
+    assert "error" in records[1]
+
+def test_sharded_output_matches_a_single_process(tmp_path):
+    pgn_path = tmp_path / "games.pgn"
+    pgn_path.write_text(PGN_TEXT * 3, encoding="utf-8")
+    outputs = []
+    for workers in ("1", "2"):
+        output = tmp_path / f"out-{workers}.jsonl"
+        assert main([str(pgn_path), "-o", str(output), "--nodes", "2000", "--max-depth", "1",
+                     "--workers", workers, "--chunk-size", "1", "--quiet"]) == 0
+        outputs.append(output.read_text(encoding="utf-8"))
+    assert outputs[0] == outputs[1]
+    assert len(outputs[0].splitlines()) == 6
+
+def test_worker_count_follows_the_cpu_affinity(monkeypatch):
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: {0, 1, 2}, raising=False)
+    assert batch_analyzer._available_cpus() == 3
+    monkeypatch.delattr(os, "sched_getaffinity")
+    monkeypatch.setattr(os, "cpu_count", lambda: 5)
+    assert batch_analyzer._available_cpus() == 5
@@ -0,0 +1,207 @@
+"""Regression tests for BoardState analysis helpers (run with pytest)"""
+
+import random
+
+import pytest
+
+from chess_board import BoardState, Color, GamePhase
+from config import GameConstants
+from perft import REFERENCE_POSITIONS
+
+KIWIPETE_FEN = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+
+# Static exchange evaluation
+
+def test_queen_attacked_by_pawn_hangs_even_when_defended():
+    board = BoardState.from_fen("4k3/8/8/4p3/3Q4/4P3/8/4K3 w - - 0 1")
+    assert board.static_exchange_evaluation(4, 3) == 8  # exd4 exd4
+    assert board.get_hanging_pieces(Color.WHITE) == [(4, 3)]
+
+def test_defended_piece_whose_recapture_wins_is_not_hanging():
+    board = BoardState.from_fen("3rk3/8/8/8/3N4/4P3/8/4K3 w - - 0 1")
+    assert board.static_exchange_evaluation(4, 3) < 0  # Rxd4 exd4 loses the rook
+    assert board.get_hanging_pieces(Color.WHITE) == []
+
+def test_xray_rook_behind_rook_joins_the_exchange():
+    # Rd7xd5 Rxd5 Rxd5: the d8 rook only attacks d5 once the d7 rook has captured
+    board = BoardState.from_fen("3rk3/3r4/8/3N4/8/8/8/3RK3 w - - 0 1")
+    assert board.static_exchange_evaluation(3, 3) == 3
+    assert board.get_hanging_pieces(Color.WHITE) == [(3, 3)]
+
+def test_king_recaptures_last_when_the_square_is_safe():
+    # exd4 cxd4 Kxd4: the king may take because no white piece is left
+    board = BoardState.from_fen("8/8/8/2k1p3/3N4/2P5/8/4K3 w - - 0 1")
+    assert board.static_exchange_evaluation(4, 3) == 3
+
+def test_king_cannot_capture_a_defended_piece():
+    board = BoardState.from_fen("8/8/8/2k5/3N4/2P5/8/4K3 w - - 0 1")
+    assert board.static_exchange_evaluation(4, 3) < 0
+    assert board.get_hanging_pieces(Color.WHITE) == []
+
+def test_exchange_evaluations_match_per_square_evaluation():
+    board = BoardState.from_fen(KIWIPETE_FEN)
+    evaluations = board.get_exchange_evaluations()
+    assert evaluations
+    for (row, col), value in evaluations.items():
+        assert value == board.static_exchange_evaluation(row, col)
+
+# Move generation
+
+def test_capture_generation_matches_the_full_move_list():
+    for _, fen, _ in REFERENCE_POSITIONS:
+        board = BoardState.from_fen(fen)
+        for move in [None] + board.generate_legal_moves():
+            if move:
+                board.push(move)
+            expected = sorted(move.uci() for move in board.generate_legal_moves()
+                              if move.captured_piece or move.promotion)
+            assert sorted(move.uci() for move in board.generate_legal_moves(captures_only=True)) == expected
+            if move:
+                board.pop()
+
+def test_possible_moves_are_the_legal_move_targets():
+    board = BoardState.from_fen("4k3/1P6/8/8/8/8/8/R3K2R w KQ - 0 1")
+    assert board.get_possible_moves(1, 1) == [(0, 1)]  # Four promotions, one target square
+    assert sorted(board.get_possible_moves(7, 4)) == [(6, 3), (6, 4), (6, 5), (7, 2), (7, 3), (7, 5), (7, 6)]
+    assert board.get_possible_moves(0, 4) == [(0, 3), (0, 5), (1, 3), (1, 4), (1, 5)]  # Not to move, still listed
+
+# Standard algebraic notation
+
+def test_san_round_trips_over_perft_positions():
+    for _, fen, _ in REFERENCE_POSITIONS:
+        board = BoardState.from_fen(fen)
+        for move in board.generate_legal_moves():
+            san = board.move_to_san(move)
+            parsed = board.parse_san(san)
+            assert (parsed.from_square, parsed.to_square, parsed.promotion) == \
+                   (move.from_square, move.to_square, move.promotion), san
+            assert board.move_to_san(parsed) == san
+
+def test_castling_accepts_letter_o_and_zero():
+    board = BoardState.from_fen(KIWIPETE_FEN)
+    for kingside, sans in ((True, ("O-O", "0-0")), (False, ("O-O-O", "0-0-0"))):
+        for san in sans:
+            move = board.parse_san(san)
+            assert move.is_castle and move.castle_kingside == kingside
+            assert board.move_to_san(move) == sans[0]
+
+def test_file_disambiguation():
+    board = BoardState.from_fen("4k3/8/8/8/8/8/8/1N2KN2 w - - 0 1")
+    assert board.parse_san("Nbd2").from_square == (7, 1)
+    assert board.parse_san("Nfd2").from_square == (7, 5)
+    assert board.move_to_san(board.create_move(7, 1, 6, 3)) == "Nbd2"
+
+def test_rank_disambiguation():
+    board = BoardState.from_fen("4k3/8/8/R7/8/8/8/R3K3 w - - 0 1")
+    assert board.parse_san("R1a3").from_square == (7, 0)
+    assert board.parse_san("R5a3").from_square == (3, 0)
+    assert board.move_to_san(board.create_move(3, 0, 5, 0)) == "R5a3"
+
+def test_square_disambiguation_and_overspecified_moves():
+    board = BoardState.from_fen("4k3/8/8/8/8/Q7/8/Q1Q1K3 w - - 0 1")
+    assert board.move_to_san(board.create_move(7, 0, 6, 1)) == "Qa1b2"
+    assert board.move_to_san(board.create_move(5, 0, 6, 1)) == "Q3b2"
+    assert board.move_to_san(board.create_move(7, 2, 6, 1)) == "Qcb2"
+    assert board.parse_san("Qa1b2").from_square == (7, 0)
+    assert board.parse_san("Qc1b2").from_square == (7, 2)  # Over-specified, but still accepted
+
+def test_ambiguous_and_illegal_san_are_rejected():
+    board = BoardState.from_fen("4k3/8/8/8/8/8/8/1N2KN2 w - - 0 1")
+    for san in ("Nd2", "Nd3", "Qd2", "e4"):
+        with pytest.raises(ValueError):
+            board.parse_san(san)
+
+# FEN and position validation
+
+def test_fen_round_trips():
+    for _, fen, _ in REFERENCE_POSITIONS:
+        assert BoardState.from_fen(fen).get_fen_position() == fen
+
+def test_en_passant_target_needs_a_double_pawn_push():
+    BoardState.from_fen("4k3/8/8/8/3pP3/8/8/4K3 b - e3 0 1")  # After e2-e4
+    for fen in ("4k3/8/8/8/8/8/8/4K3 b - e3 0 1",        # No pawn in front of the target
+                "4k3/8/8/8/3pp3/8/8/4K3 b - e3 0 1",      # The pawn is the mover's own
+                "4k3/8/8/8/3pP3/8/8/4K3 w - e3 0 1",      # Wrong side to move for rank 3
+                "4k3/8/8/8/3pP3/8/8/4K3 b - e4 0 1"):     # Not on rank 3 or 6
+        with pytest.raises(ValueError):
+            BoardState.from_fen(fen)
+
+def test_castling_rights_without_rook_or_king_are_dropped():
+    board = BoardState.from_fen("r3k3/8/8/8/8/8/8/4K2R w KQkq - 0 1")
+    assert board.get_fen_position() == "r3k3/8/8/8/8/8/8/4K2R w Kq - 0 1"
+    assert [move.uci() for move in board.generate_legal_moves() if move.is_castle] == ["e1g1"]
+
+    board = BoardState.from_fen("r3k2r/8/8/8/8/8/8/R2K3R w KQkq - 0 1")  # King off e1
+    assert board.get_fen_position() == "r3k2r/8/8/8/8/8/8/R2K3R w kq - 0 1"
+
+def test_malformed_fen_is_rejected():
+    for fen in ("8/8/8/8/8/8/8/8 w - - 0 1",                                  # No kings
+                "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP w KQkq - 0 1",           # Seven ranks
+                "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR x KQkq - 0 1",  # Active color
+                "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KX - 0 1",    # Castling field
+                "rnbqkbnr/pppppppp/9/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"): # Rank too long
+        with pytest.raises(ValueError):
+            BoardState.from_fen(fen)
+
+# Make/unmake and incremental state
+
+def test_push_pop_keeps_incremental_state_over_random_games():
+    rng = random.Random(2024)
+    for fen in (BoardState().get_fen_position(), KIWIPETE_FEN):
+        board = BoardState.from_fen(fen)
+        states = []
+        for _ in range(120):
+            moves = board.generate_legal_moves()
+            if not moves:
+                break
+            states.append((board.get_fen_position(), board.zobrist_key, board.is_check,
+                           {color: list(counts) for color, counts in board.attack_counts.items()}))
+            board.push(rng.choice(moves))
+            fresh = BoardState.from_fen(board.get_fen_position())
+            assert board.zobrist_key == board.compute_zobrist_key() == fresh.zobrist_key
+            assert board.attack_counts == fresh.attack_counts
+        while states:
+            board.pop()
+            assert (board.get_fen_position(), board.zobrist_key, board.is_check,
+                    board.attack_counts) == states.pop()
+
+def test_threefold_repetition_needs_the_same_castling_rights():
+    board = BoardState()
+    knight_dance = ((7, 6, 5, 5), (0, 6, 2, 5), (5, 5, 7, 6), (2, 5, 0, 6))
+    for move in knight_dance * 2:
+        assert board.make_move(*move)
+    assert board.is_threefold_repetition() and board.game_phase == GamePhase.DRAW
+
+    # After the king moves out and back the position looks the same but castling is gone
+    board = BoardState.from_fen("4k3/8/8/8/8/8/8/4K2R w K - 0 1")
+    for move in ((7, 4, 7, 5), (0, 4, 0, 3), (7, 5, 7, 4), (0, 3, 0, 4)) * 2:
+        assert board.make_move(*move)
+    assert board.get_repetition_count() == 2
+    assert board.zobrist_key == board.compute_zobrist_key()
+
+# Copies and undo history
+
+def test_copy_is_independent_and_keeps_repetitions():
+    board = BoardState()
+    for _ in range(2):
+        for uci in ("g1f3", "g8f6", "f3g1", "f6g8"):
+            board.push(next(move for move in board.generate_legal_moves() if move.uci() == uci))
+    clone = board.copy()
+    assert clone.zobrist_key == board.zobrist_key
+    assert clone.get_repetition_count() == board.get_repetition_count() == 3
+    assert clone.attack_counts == board.attack_counts
+    assert not clone.can_undo()
+
+    clone.make_move(6, 4, 4, 4)
+    assert board.get_fen_position() == BoardState().get_fen_position().replace(" 0 1", " 8 5")
+    assert board.board[6][4] is not None and clone.board[6][4] is None
+
+def test_undo_history_is_bounded():
+    board = BoardState()
+    for _ in range(GameConstants.UNDO_HISTORY_LIMIT):
+        for move in ((7, 6, 5, 5), (0, 6, 2, 5), (5, 5, 7, 6), (2, 5, 0, 6)):
+            assert board.make_move(*move)
+    assert len(board.undo_stack) == GameConstants.UNDO_HISTORY_LIMIT
+    while board.undo_move():
+        pass
+    assert len(board.move_history) == 3 * GameConstants.UNDO_HISTORY_LIMIT
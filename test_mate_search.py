@@ -0,0 +1,53 @@
+"""Tests for the budgeted mate-in-N solver (run with pytest)"""
+
+from chess_board import BoardState, Color
+from mate_search import MateSearch, find_mate
+
+MATE_IN_ONE_FEN = "k7/8/1K6/8/8/8/8/7R w - - 0 1"      # Rh8#
+MATE_IN_TWO_FEN = "6k1/8/8/8/8/8/R7/1R4K1 w - - 0 1"   # Ra7 (or Rb7) and mate on the back rank
+
+def _play(board: BoardState, moves) -> BoardState:
+    for move in moves:
+        board.push(move)
+    return board
+
+def test_mate_in_one():
+    board = BoardState.from_fen(MATE_IN_ONE_FEN)
+    result = find_mate(board)
+    assert result.mate_in == 1 and result.complete
+    assert result.first_move.uci() == "h1h8"
+    assert board.get_fen_position() == MATE_IN_ONE_FEN
+
+def test_mate_in_two_line_ends_in_checkmate():
+    board = BoardState.from_fen(MATE_IN_TWO_FEN)
+    result = find_mate(board)
+    assert result.mate_in == 2 and len(result.moves) == 3
+    final = _play(board, result.moves)
+    assert final.is_checkmate(final.current_turn)
+
+def test_threat_of_the_side_not_to_move():
+    # Black to move, but white threatens Rh8#
+    board = BoardState.from_fen("k7/8/1K6/8/8/8/8/7R b - - 0 1")
+    result = find_mate(board, color=Color.WHITE)
+    assert result.mate_in == 1 and result.first_move.uci() == "h1h8"
+    assert find_mate(board).mate_in is None
+
+def test_no_mate_within_the_limit():
+    result = find_mate(BoardState.from_fen(MATE_IN_TWO_FEN), max_moves=1)
+    assert result.mate_in is None and result.complete
+
+def test_budget_expiry_returns_an_incomplete_result():
+    board = BoardState.from_fen(MATE_IN_TWO_FEN)
+    result = find_mate(board, node_limit=5)
+    assert result.mate_in is None and not result.complete
+    assert find_mate(board, time_limit_ms=0).complete is False
+    assert find_mate(board, is_cancelled=lambda: True).complete is False
+    assert board.get_fen_position() == MATE_IN_TWO_FEN
+
+def test_table_is_shared_between_searches():
+    solver = MateSearch()
+    board = BoardState.from_fen(MATE_IN_TWO_FEN)
+    first = solver.find_mate(board)
+    second = solver.find_mate(board)
+    assert first.mate_in == second.mate_in == 2
+    assert second.nodes < first.nodes
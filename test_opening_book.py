@@ -0,0 +1,48 @@
+"""Tests for Polyglot keys and book lookups (run with pytest)"""
+
+from struct import pack
+
+from chess_board import BoardState
+from opening_book import ENTRY, OpeningBook, load_random_table, polyglot_key
+
+def _play(ucis):
+    board = BoardState()
+    for uci in ucis:
+        move = next(move for move in board.generate_legal_moves() if move.uci() == uci)
+        board.push(move)
+    return board
+
+def _key(ucis):
+    return polyglot_key(_play(ucis), load_random_table())
+
+# Reference keys from the Polyglot book format specification
+def test_start_position_key():
+    assert _key([]) == 0x463B96181691FC9C
+
+def test_en_passant_file_counts_only_when_capturable():
+    assert _key(["e2e4"]) == 0x823C9B50FD114196                  # No black pawn can take on e3
+    assert _key(["e2e4", "d7d5", "e4e5"]) == 0x662FAFB965DB29D4
+    assert _key(["e2e4", "d7d5", "e4e5", "f7f5"]) == 0x22A48B5A8E47FF78  # exf6 is possible
+
+def test_lost_castling_rights_change_the_key():
+    assert _key(["e2e4", "d7d5", "e4e5", "f7f5", "e1e2"]) == 0x652A607CA3F242C1
+    assert _key(["e2e4", "d7d5", "e4e5", "f7f5", "e1e2", "e8f7"]) == 0x00FDD303C946BDD9
+    assert _key(["a2a4", "b7b5", "h2h4", "b5b4", "c2c4"]) == 0x3C8123EA7B067637
+
+def test_book_lookup_sorts_by_weight_and_decodes_castling(tmp_path):
+    table = load_random_table()
+    start = BoardState()
+    castling_position = BoardState.from_fen("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+    e2e4 = (1 << 9) | (4 << 6) | (3 << 3) | 4   # From rank 2 file e, to rank 4 file e
+    d2d4 = (1 << 9) | (3 << 6) | (3 << 3) | 3
+    e1h1 = (0 << 9) | (4 << 6) | (0 << 3) | 7   # Polyglot castling: king takes its rook
+    entries = sorted([(polyglot_key(start, table), e2e4, 10, 0),
+                      (polyglot_key(start, table), d2d4, 20, 0),
+                      (polyglot_key(castling_position, table), e1h1, 1, 0)])
+    path = tmp_path / "book.bin"
+    path.write_bytes(b"".join(ENTRY.pack(*entry) for entry in entries))
+
+    with OpeningBook(str(path)) as book:
+        assert [entry.uci for entry in book.entries(start)] == ["d2d4", "e2e4"]
+        assert [move.uci() for move in book.moves(castling_position)] == ["e1g1"]
+        assert _play(["e2e4"]) not in book
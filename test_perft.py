@@ -0,0 +1,24 @@
+"""Perft reference counts for the legal move generator (run with pytest)"""
+
+import pytest
+
+from chess_board import BoardState
+from perft import REFERENCE_POSITIONS, divide, perft
+
+# Every count up to depth 3 (the deeper ones are left to python perft.py)
+SHALLOW_COUNTS = [(name, fen, depth, nodes) for name, fen, counts in REFERENCE_POSITIONS
+                  for depth, nodes in counts.items() if depth <= 3]
+
+@pytest.mark.parametrize("name, fen, depth, nodes", SHALLOW_COUNTS,
+                         ids=[f"{name} depth {depth}" for name, _, depth, _ in SHALLOW_COUNTS])
+def test_reference_counts(name, fen, depth, nodes):
+    board = BoardState.from_fen(fen)
+    assert perft(board, depth) == nodes
+    assert board.get_fen_position() == fen  # push()/pop() left the board as it was
+
+def test_divide_adds_up_to_perft():
+    _, fen, counts = REFERENCE_POSITIONS[1]  # Kiwipete: castling, en passant and pins
+    board = BoardState.from_fen(fen)
+    breakdown = divide(board, 2)
+    assert len(breakdown) == counts[1]
+    assert sum(breakdown.values()) == counts[2]
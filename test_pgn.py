@@ -0,0 +1,49 @@
+"""Round-trip tests for the PGN reader and writer (run with pytest)"""
+
+from chess_board import BoardState
+from pgn import SEVEN_TAG_ROSTER, _iter_games, format_game, game_from_board, replay
+
+CUSTOM_FEN = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R b KQkq - 3 12"
+
+def _play(board: BoardState, sans):
+    for san in sans:
+        move = board.parse_san(san)
+        board.make_move_with_promotion(*move.from_square, *move.to_square, move.promotion)
+    return board
+
+def _parse(text: str):
+    return [game for _, game in _iter_games(enumerate(text.splitlines(keepends=True)))]
+
+def _tag_names(text: str):
+    return [line[1:].split()[0] for line in text.splitlines() if line.startswith("[")]
+
+def test_custom_start_position_round_trips():
+    board = _play(BoardState.from_fen(CUSTOM_FEN), ["Bxe2", "Qxe2", "O-O", "O-O-O", "Rfd8"])
+    text = format_game(game_from_board(board, {"White": "A", "Annotator": "B", "Event": "Test"}))
+    assert _tag_names(text) == list(SEVEN_TAG_ROSTER) + ["Annotator", "SetUp", "FEN"]
+    assert "12... Bxe2 13. Qxe2 O-O 14. O-O-O Rfd8 *" in text
+
+    games = _parse(text)
+    assert len(games) == 1
+    game = games[0]
+    assert game.tags["FEN"] == CUSTOM_FEN and game.tags["SetUp"] == "1"
+    assert game.moves == ["Bxe2", "Qxe2", "O-O", "O-O-O", "Rfd8"]
+    assert replay(game).get_fen_position() == board.get_fen_position()
+    assert format_game(game) == text
+
+def test_standard_start_omits_setup_tags():
+    board = _play(BoardState(), ["e4", "e5", "Qh5", "Nc6", "Bc4", "Nf6", "Qxf7#"])
+    # Stale position tags from another game are dropped
+    text = format_game(game_from_board(board, {"FEN": CUSTOM_FEN, "SetUp": "1", "Site": "Here"}))
+    assert _tag_names(text) == list(SEVEN_TAG_ROSTER)
+    assert '[Result "1-0"]' in text
+
+    game = _parse(text)[0]
+    assert "FEN" not in game.tags
+    assert replay(game).is_in_checkmate
+
+def test_fen_tag_before_setup_is_written_after_it():
+    text = ('[FEN "%s"]\n[SetUp "1"]\n[Event "Out of order"]\n\n12... Bxe2 *\n' % CUSTOM_FEN)
+    written = format_game(_parse(text)[0])
+    assert _tag_names(written) == list(SEVEN_TAG_ROSTER) + ["SetUp", "FEN"]
+    assert replay(_parse(written)[0]).fullmove_number == 13
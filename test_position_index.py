@@ -0,0 +1,69 @@
+"""Tests for the on-disk position index (run with pytest)"""
+
+import os
+
+from chess_board import BoardState
+from pgn import PgnFile
+from position_index import PositionHit, PositionIndex, main
+
+PGN_TEXT = """[Event "First"]
+[Result "*"]
+
+1. e4 e5 2. Nf3 Nc6 *
+
+[Event "Second"]
+[Result "*"]
+
+1. Nf3 Nc6 2. e4 e5 3. Bb5 *
+"""
+
+def _segments(directory):
+    return [name for name in os.listdir(directory) if name.endswith(".idx")]
+
+def _board(*sans):
+    board = BoardState()
+    for san in sans:
+        board.push(board.parse_san(san))
+    return board
+
+def test_build_compact_and_query(tmp_path):
+    pgn_path = tmp_path / "games.pgn"
+    pgn_path.write_text(PGN_TEXT, encoding="utf-8")
+    directory = str(tmp_path / "games.idx")
+
+    with PositionIndex(directory, buffer_records=4) as index:
+        for game_id, game in enumerate(PgnFile(str(pgn_path))):
+            index.add_game(game, game_id, lost_material_plies=[5] if game_id else [])
+        index.add_source(str(pgn_path), 0, 2)
+        index.flush()
+        assert len(_segments(directory)) > 1
+        assert len(index) == 5 + 6
+
+        # Both move orders reach the same position after four plies
+        transposed = _board("e4", "e5", "Nf3", "Nc6")
+        assert index.lookup_board(transposed) == [PositionHit(0, 4), PositionHit(1, 4, 1)]
+        assert index.lookup_board(BoardState())[0] == PositionHit(0, 0)
+        assert index.lookup_board(_board("d4")) == []
+
+        index.compact()
+        assert len(_segments(directory)) == 1
+        assert len(index) == 11
+
+    # Reopened from disk, with the game's source
+    with PositionIndex(directory) as index:
+        hits = index.lookup_board(_board("e4", "e5", "Nf3", "Nc6"))
+        assert [(hit.game_id, hit.ply, hit.lost_material) for hit in hits] == [(0, 4, False), (1, 4, True)]
+        assert index.source_of(1) == (str(pgn_path), 1)
+        assert index.source_of(2) is None
+        assert index.next_game_id == 2
+
+def test_command_line_build_and_query(tmp_path, capsys):
+    pgn_path = tmp_path / "games.pgn"
+    pgn_path.write_text(PGN_TEXT, encoding="utf-8")
+    directory = str(tmp_path / "cli.idx")
+    assert main(["build", str(pgn_path), "--index", directory, "--compact"]) == 0
+    fen = _board("e4", "e5", "Nf3", "Nc6").get_fen_position()
+    capsys.readouterr()
+    assert main(["query", "--index", directory, "--fen", fen]) == 0
+    output = capsys.readouterr().out.splitlines()
+    assert output == [f"{pgn_path} game 0, ply 4", f"{pgn_path} game 1, ply 4"]
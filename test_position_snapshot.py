@@ -0,0 +1,40 @@
+"""Tests for the compact position snapshot (run with pytest)"""
+
+import pickle
+
+import pytest
+
+from chess_board import BoardState, Color, PieceType
+from perft import REFERENCE_POSITIONS
+from position_snapshot import SNAPSHOT_SIZE, PositionSnapshot
+
+EN_PASSANT_FEN = "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3"
+
+def test_round_trip_keeps_the_position():
+    for fen in [fen for _, fen, _ in REFERENCE_POSITIONS] + [EN_PASSANT_FEN]:
+        board = BoardState.from_fen(fen)
+        snapshot = PositionSnapshot.from_board(board)
+        assert len(snapshot.data) == SNAPSHOT_SIZE
+        restored = snapshot.to_board()
+        assert restored.get_fen_position() == fen
+        assert restored.zobrist_key == board.zobrist_key
+        assert PositionSnapshot.from_board(restored) == snapshot
+
+def test_pickle_and_hashing():
+    snapshot = PositionSnapshot.from_board(BoardState.from_fen(EN_PASSANT_FEN))
+    data = pickle.dumps(snapshot)
+    assert len(data) < 100  # Only the raw bytes are pickled
+    copy = pickle.loads(data)
+    assert copy == snapshot and hash(copy) == hash(snapshot)
+    assert len({snapshot, copy, PositionSnapshot.from_board(BoardState())}) == 2
+
+def test_accessors_and_immutability():
+    snapshot = PositionSnapshot.from_board(BoardState.from_fen(EN_PASSANT_FEN))
+    assert snapshot.current_turn == Color.WHITE
+    piece = snapshot.get_piece(3, 4)
+    assert (piece.type, piece.color) == (PieceType.PAWN, Color.WHITE)
+    assert snapshot.get_piece(4, 4) is None
+    with pytest.raises(AttributeError):
+        snapshot._data = bytes(SNAPSHOT_SIZE)
+    with pytest.raises(ValueError):
+        PositionSnapshot(b"too short")
@@ -0,0 +1,62 @@
+"""Tests for cached tablebase probing with stub tables (run with pytest)"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import tablebase
+from chess_board import BoardState
+from mate_search import find_mate
+from tactical_search import TABLEBASE_WIN_SCORE, analyze_moves
+from tablebase import Tablebase, WDL_DRAW, WDL_LOSS
+
+MATE_IN_ONE_FEN = "k7/8/1K6/8/8/8/8/7R w - - 0 1"  # Rh8#
+
+class StubTables:
+    """Stands in for chess.syzygy.Tablebase: one WDL value for every position"""
+
+    def __init__(self, wdl: int):
+        self.wdl = wdl
+        self.probed = []  # FENs that reached the tables
+
+    def probe_wdl(self, position: str) -> int:
+        self.probed.append(position)
+        return self.wdl
+
+@pytest.fixture
+def stub_tablebase(monkeypatch):
+    """Make a Tablebase backed by StubTables (positions are passed on as FENs)"""
+    monkeypatch.setattr(tablebase, "chess", SimpleNamespace(Board=str))
+
+    def make(wdl: int) -> Tablebase:
+        table = Tablebase()
+        table._tables = StubTables(wdl)
+        table.max_pieces = 3
+        return table
+    return make
+
+def test_second_probe_comes_from_the_cache(stub_tablebase):
+    table = stub_tablebase(WDL_DRAW)
+    board = BoardState.from_fen(MATE_IN_ONE_FEN)
+    assert table.probe_wdl(board) == WDL_DRAW
+    assert table.probe_wdl(board) == WDL_DRAW
+    assert table._tables.probed == [MATE_IN_ONE_FEN]
+    assert table.probe_wdl(BoardState()) is None  # Too many pieces: never probed
+
+def test_mate_search_stops_at_a_tablebase_draw(stub_tablebase):
+    # The stub claims a draw, so the mate is never searched for
+    table = stub_tablebase(WDL_DRAW)
+    result = find_mate(BoardState.from_fen(MATE_IN_ONE_FEN), max_moves=3, tablebase=table)
+    assert result.mate_in is None and result.complete
+    assert result.nodes == 3  # The root of each iteration only
+    assert len(table._tables.probed) == 1
+
+def test_tactical_search_scores_tablebase_positions_without_searching(stub_tablebase):
+    table = stub_tablebase(WDL_LOSS)  # Every reply position is lost for the opponent
+    board = BoardState.from_fen(MATE_IN_ONE_FEN)
+    moves = board.generate_legal_moves()
+    result = analyze_moves(board, time_limit_ms=None, max_depth=3, tablebase=table)
+    assert result.depth == 3 and result.complete
+    assert all(verdict.score == TABLEBASE_WIN_SCORE - 1 for verdict in result.verdicts)
+    assert result.nodes == 3 * len(moves)
+    assert len(table._tables.probed) == len(moves)  # Later iterations hit the cache
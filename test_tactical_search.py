@@ -0,0 +1,38 @@
+"""Regression tests for the budgeted tactical search (run with pytest)"""
+
+from chess_board import BoardState
+from tactical_search import analyze_moves
+
+KIWIPETE_FEN = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+
+def test_every_move_is_judged_within_the_default_budget():
+    board = BoardState.from_fen(KIWIPETE_FEN)
+    result = analyze_moves(board)
+    assert len(result.verdicts) == len(board.generate_legal_moves()) == 48
+    assert board.get_fen_position() == KIWIPETE_FEN
+
+def test_static_verdicts_cover_an_aborted_first_iteration():
+    board = BoardState.from_fen(KIWIPETE_FEN)
+    result = analyze_moves(board, time_limit_ms=None, node_limit=1)
+    assert result.depth == 0 and not result.complete
+    assert len(result.verdicts) == 48
+    verdicts = {verdict.move.uci(): verdict for verdict in result.verdicts}
+    assert verdicts["f3f5"].loses_material  # exf5 wins the queen
+    assert not verdicts["e2a6"].loses_material  # Bxa6 wins a bishop for a bishop
+
+def test_search_finds_the_queen_blunder():
+    board = BoardState.from_fen(KIWIPETE_FEN)
+    result = analyze_moves(board, time_limit_ms=None, max_depth=1)
+    assert result.depth == 1 and result.complete
+    verdicts = {verdict.move.uci(): verdict for verdict in result.verdicts}
+    assert verdicts["f3f5"].loses_material
+    assert not verdicts["e2a6"].loses_material
+
+def test_static_pass_stops_at_the_deadline():
+    board = BoardState.from_fen(KIWIPETE_FEN)
+    result = analyze_moves(board, is_cancelled=lambda: True)
+    assert result.depth == 0 and not result.complete
+    assert len(result.verdicts) == 48
+    verdicts = {verdict.move.uci(): verdict for verdict in result.verdicts}
+    assert verdicts["e2a6"].score == 3  # Only the bishop it takes on the spot
+    assert verdicts["f3f5"].score == 0
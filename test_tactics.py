@@ -0,0 +1,35 @@
+"""Tests for the fork, pin and skewer detector (run with pytest)"""
+
+from chess_board import BoardState, Color
+from tactics import Fork, Pin, Skewer, find_tactics
+
+def _tactics(fen):
+    return find_tactics(BoardState.from_fen(fen))
+
+def test_knight_forks_king_and_rook():
+    report = _tactics("r3k3/2N5/8/8/8/8/8/4K3 b - - 0 1")
+    assert report.forks == [Fork(Color.WHITE, (1, 2), ((0, 0), (0, 4)))]
+
+def test_defended_pieces_worth_less_than_the_attacker_are_not_fork_targets():
+    # The queen hits two pawns, each defended by a pawn
+    assert _tactics("k7/8/2p3p1/3p1p2/4Q3/8/8/4K3 w - - 0 1").forks == []
+    # Without the defenders both pawns hang
+    assert _tactics("k7/8/8/3p1p2/4Q3/8/8/4K3 w - - 0 1").forks == [Fork(Color.WHITE, (4, 4), ((3, 3), (3, 5)))]
+
+def test_absolute_pin_against_the_king():
+    report = _tactics("4k3/4n3/8/8/4R3/8/8/4K3 w - - 0 1")
+    assert report.pins == [Pin(Color.WHITE, (4, 4), (1, 4), (0, 4), True)]
+    assert report.skewers == []
+
+def test_relative_pin_against_the_queen():
+    report = _tactics("k7/8/5q2/4n3/8/8/8/B5K1 w - - 0 1")
+    assert report.pins == [Pin(Color.WHITE, (7, 0), (3, 4), (2, 5), False)]
+
+def test_skewer_queen_in_front_of_rook():
+    report = _tactics("r3k3/8/8/q7/8/8/8/R5K1 w - - 0 1")
+    assert report.skewers == [Skewer(Color.WHITE, (7, 0), (3, 0), (0, 0))]
+    assert report.pins == []
+
+def test_own_piece_blocks_the_line():
+    report = _tactics("4k3/4n3/8/4P3/4R3/8/8/4K3 w - - 0 1")
+    assert report.pins == [] and report.skewers == []